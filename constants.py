@@ -5,6 +5,13 @@ NCOLS = 28
 SCREENWIDTH = NCOLS * TILEWIDTH
 SCREENHEIGHT = NROWS * TILEHEIGHT
 SCREENSIZE = (SCREENWIDTH, SCREENHEIGHT)
+FPS = 30
+SIMSTEP = 1.0 / FPS
+MINTIMESCALE = 0.25
+MAXTIMESCALE = 16
+MAXSTEPS = 64
+# Frame times this close to SIMSTEP count as exactly one step
+SNAPTOLERANCE = 0.002
 BLACK = (0, 0, 0)
 YELLOW = (255, 255, 0)
 WHITE = (255, 255, 255)
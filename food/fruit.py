@@ -9,13 +9,6 @@ class Fruit(Entity):
         self.name = FRUIT
         self.color = GREEN
         self.lifespan = 5
-        self.timer = 0
-        self.destroy = False
         self.points = 100 + level * 20
         self.setBetweenNodes(RIGHT)
         self.sprites = FruitSprites(self, level)
-
-    def update(self, dt):
-        self.timer += dt
-        if self.timer >= self.lifespan:
-            self.destroy = True
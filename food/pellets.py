@@ -1,7 +1,9 @@
 import pygame
 from movement.vector import Vector2
 from constants import *
+from movement.collision import CollisionGrid
 import numpy as np
+from maze.mazedata import readMazeFile
 
 
 class Pellet(object):
@@ -14,11 +16,14 @@ class Pellet(object):
         self.collideRadius = int(2 * TILEWIDTH / 16)
         self.points = 10
         self.visible = True
+        self.lastPosition = None
 
-    def render(self, screen):
+    def render(self, screen, camera=None):
         if self.visible:
             adjust = Vector2(TILEWIDTH, TILEHEIGHT) / 2
             p = self.position + adjust
+            if camera is not None:
+                p = camera.apply(p)
             pygame.draw.circle(screen, self.color, p.asInt(), self.radius)
 
 
@@ -28,29 +33,41 @@ class PowerPellet(Pellet):
         self.name = POWERPELLET
         self.radius = int(8 * TILEWIDTH / 16)
         self.points = 50
+        # Interval of the group's flashing timer
         self.flashTime = 0.2
-        self.timer = 0
 
-    def update(self, dt):
-        self.timer += dt
-        if self.timer >= self.flashTime:
-            self.visible = not self.visible
-            self.timer = 0
+    def flash(self):
+        self.visible = not self.visible
 
 
 class PelletGroup(object):
     def __init__(self, pelletfile):
         self.pelletList = []
         self.powerpellets = []
+        self.grid = CollisionGrid()
         self.createPelletList(pelletfile)
         self.numEaten = 0
 
-    def update(self, dt):
+    def startFlashing(self, scheduler, due=None):
+        """Flash the power pellets together on one repeating timer instead
+        of updating each of them every frame, the first time at due when it
+        is given"""
+        if not self.powerpellets:
+            return None
+        interval = self.powerpellets[0].flashTime
+        if due is None:
+            due = scheduler.now(realtime=True) + interval
+        return scheduler.at(
+            due, self.flashPowerPellets, realtime=True, interval=interval
+        )
+
+    def flashPowerPellets(self):
         for powerpellet in self.powerpellets:
-            powerpellet.update(dt)
+            powerpellet.flash()
 
     def createPelletList(self, pelletfile):
         data = self.readPelletfile(pelletfile)
+        self.nrows, self.ncols = np.atleast_2d(data).shape
         for row in range(data.shape[0]):
             for col in range(data.shape[1]):
                 if data[row][col] in [".", "+"]:
@@ -59,15 +76,35 @@ class PelletGroup(object):
                     pp = PowerPellet(row, col)
                     self.pelletList.append(pp)
                     self.powerpellets.append(pp)
+        for pellet in self.pelletList:
+            self.grid.add(pellet)
 
     def readPelletfile(self, textfile):
-        return np.loadtxt(textfile, dtype="<U1")
+        return readMazeFile(textfile)
+
+    def getNearby(self, position, reach=0):
+        return self.grid.nearby(position, reach)
+
+    def removePellets(self, pellets):
+        """Remove many pellets in one pass over the lists"""
+        pellets = set(pellets)
+        self.pelletList[:] = [p for p in self.pelletList if p not in pellets]
+        self.powerpellets[:] = [p for p in self.powerpellets if p not in pellets]
+        for pellet in pellets:
+            self.grid.remove(pellet)
+
+    def removePellet(self, pellet):
+        self.pelletList.remove(pellet)
+        self.grid.remove(pellet)
+        if pellet in self.powerpellets:
+            self.powerpellets.remove(pellet)
 
     def isEmpty(self):
         if len(self.pelletList) == 0:
             return True
         return False
 
-    def render(self, screen):
+    def render(self, screen, camera=None):
         for pellet in self.pelletList:
-            pellet.render(screen)
+            if camera is None or camera.isVisible(pellet.position):
+                pellet.render(screen, camera)
@@ -0,0 +1,100 @@
+import gc
+import time
+from constants import *
+
+
+class GCBudget(object):
+    """Keeps cyclic garbage collection out of gameplay frames. Automatic
+    collection is switched off; young generations are collected in the time
+    left over at the end of a frame and full collections wait for a pause
+    or a level change. If garbage piles up with no idle time to spare,
+    a young collection runs anyway so memory stays bounded."""
+
+    def __init__(self, enabled=False, budget=SIMSTEP, minIdle=0.002, ceiling=20):
+        self.enabled = enabled
+        self.budget = budget
+        self.minIdle = minIdle
+        self.ceiling = ceiling
+        self.frameStart = 0
+        self.fullPending = False
+        self.collections = [0, 0, 0]
+        self.gcTime = 0
+        self.maxPause = 0
+        self.forced = 0
+        self.wasEnabled = True
+
+    def start(self):
+        if self.enabled:
+            self.wasEnabled = gc.isenabled()
+            gc.disable()
+
+    def stop(self):
+        if self.enabled and self.wasEnabled:
+            gc.enable()
+
+    def beginFrame(self):
+        self.frameStart = time.perf_counter()
+
+    def collect(self, generation):
+        start = time.perf_counter()
+        gc.collect(generation)
+        elapsed = time.perf_counter() - start
+        self.collections[generation] += 1
+        self.gcTime += elapsed
+        self.maxPause = max(self.maxPause, elapsed)
+        return elapsed
+
+    def youngGeneration(self):
+        """The generation the collector would have picked by now, or None
+        if no generation has crossed its threshold"""
+        counts = gc.get_count()
+        thresholds = gc.get_threshold()
+        if thresholds[0] == 0 or counts[0] < thresholds[0]:
+            return None
+        if counts[1] >= thresholds[1]:
+            return 1
+        return 0
+
+    def idle(self, paused=False):
+        """Called once the frame is drawn, before the clock sleeps. Frames
+        of gameplay arm the full collection for the next pause"""
+        if not self.enabled:
+            return
+        if not paused:
+            self.fullPending = True
+        generation = self.youngGeneration()
+        if generation is None:
+            return
+        remaining = self.budget - (time.perf_counter() - self.frameStart)
+        if remaining >= self.minIdle:
+            self.collect(generation)
+        elif gc.get_count()[0] >= gc.get_threshold()[0] * self.ceiling:
+            self.forced += 1
+            self.collect(generation)
+
+    def collectPaused(self):
+        """Full collection, at most once per stretch of gameplay"""
+        if self.fullPending:
+            self.collectFull()
+
+    def collectFull(self):
+        if self.enabled:
+            self.fullPending = False
+            self.collect(2)
+
+    def getStats(self):
+        return {
+            "collections": list(self.collections),
+            "forced": self.forced,
+            "total_ms": self.gcTime * 1e3,
+            "max_ms": self.maxPause * 1e3,
+        }
+
+    def formatReport(self):
+        stats = self.getStats()
+        gen0, gen1, gen2 = stats["collections"]
+        return (
+            f"GC: gen0 {gen0}, gen1 {gen1}, gen2 {gen2} "
+            f"({stats['forced']} forced), {stats['total_ms']:.1f} ms total, "
+            f"{stats['max_ms']:.2f} ms worst"
+        )
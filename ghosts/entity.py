@@ -1,3 +1,4 @@
+import math
 import pygame
 from pygame.locals import *
 from movement.vector import Vector2
@@ -27,6 +28,9 @@ class Entity(object):
         self.disablePortal = False
         self.goal = None
         self.directionMethod = self.goalDirection
+        self.lastPosition = None
+        # Nodes passed between lastPosition and position
+        self.waypoints = []
         self.setStartNode(node)
         self.image = None
 
@@ -34,6 +38,8 @@ class Entity(object):
         self.node = node
         self.startNode = node
         self.target = node
+        self.lastPosition = None
+        self.waypoints.clear()
         self.setPosition()
 
     def reset(self):
@@ -50,16 +56,38 @@ class Entity(object):
     def setPosition(self):
         self.position = self.node.position.copy()
 
+    def savePosition(self, position):
+        """Copy position into lastPosition, reusing the vector once it
+        exists so a step does not allocate, and start a new path there"""
+        self.waypoints.clear()
+        if self.lastPosition is None:
+            self.lastPosition = position.copy()
+        else:
+            self.lastPosition.x = position.x
+            self.lastPosition.y = position.y
+
+    def move(self, distance):
+        """Advance along the current direction in place"""
+        step = self.directions[self.direction]
+        self.position.x += step.x * distance
+        self.position.y += step.y * distance
+
     def update(self, dt):
-        self.position += self.directions[self.direction] * self.speed * dt
-        if self.overshotTarget():
+        self.savePosition(self.position)
+        self.move(self.speed * dt)
+        # A long step can pass several nodes, keep walking until the
+        # travel distance is used up
+        while self.overshotTarget():
+            overshoot = self.overshootDistance()
             self.node = self.target
+            self.reachedNode(self.node)
             directions = self.validDirections()
             # direction = self.randomDirection(directions)
-            direction = self.directionMethod(directions)
+            direction = self.chooseDirection(directions)
             if not self.disablePortal:
                 if self.node.neighbors[PORTAL] is not None:
                     self.node = self.node.neighbors[PORTAL]
+                    self.savePosition(self.node.position)
             self.target = self.getNewTarget(direction)
             if self.target is not self.node:
                 self.direction = direction
@@ -67,6 +95,19 @@ class Entity(object):
                 self.target = self.getNewTarget(self.direction)
 
             self.setPosition()
+            self.waypoints.append(self.node.position)
+            if self.target is self.node or overshoot <= 0:
+                break
+            self.move(overshoot)
+
+    def reachedNode(self, node):
+        """Called for every node passed on the way, before the next
+        direction is chosen"""
+        pass
+
+    def chooseDirection(self, directions):
+        """Direction taken at a node out of the valid ones"""
+        return self.directionMethod(directions)
 
     def validDirection(self, direction):
         if direction is not STOP:
@@ -95,13 +136,22 @@ class Entity(object):
 
     def overshotTarget(self):
         if self.target is not None:
-            vec1 = self.target.position - self.node.position
-            vec2 = self.position - self.node.position
-            node2Target = vec1.magnitudeSquared()
-            node2Self = vec2.magnitudeSquared()
-            return node2Self >= node2Target
+            origin = self.node.position
+            tx = self.target.position.x - origin.x
+            ty = self.target.position.y - origin.y
+            sx = self.position.x - origin.x
+            sy = self.position.y - origin.y
+            return sx * sx + sy * sy >= tx * tx + ty * ty
         return False
 
+    def overshootDistance(self):
+        origin = self.node.position
+        node2Target = math.hypot(
+            self.target.position.x - origin.x, self.target.position.y - origin.y
+        )
+        node2Self = math.hypot(self.position.x - origin.x, self.position.y - origin.y)
+        return node2Self - node2Target
+
     def reverseDirection(self):
         self.direction *= -1
         temp = self.node
@@ -127,12 +177,18 @@ class Entity(object):
         index = distances.index(min(distances))
         return directions[index]
 
-    def render(self, screen):
+    def render(self, screen, camera=None):
         if self.visible:
+            if camera is not None and not camera.isVisible(self.position):
+                return
             if self.image is not None:
                 adjust = Vector2(TILEWIDTH, TILEHEIGHT) / 2
                 p = self.position - adjust
+                if camera is not None:
+                    p = camera.apply(p)
                 screen.blit(self.image, p.asTuple())
             else:
-                p = self.position.asInt()
-                pygame.draw.circle(screen, self.color, p, self.radius)
+                p = self.position
+                if camera is not None:
+                    p = camera.apply(p)
+                pygame.draw.circle(screen, self.color, p.asInt(), self.radius)
@@ -1,14 +1,23 @@
+import json
 import pygame
+import numpy as np
 from pygame.locals import *
 from movement.vector import Vector2
 from constants import *
 from ghosts.entity import Entity
-from modes.modes import ModeController
+from modes.modes import ModeController, ModeTimeline
+from scheduler import Scheduler
+from movement.collision import CollisionGrid
 from styles.sprite.sprites import GhostSprites
 
 
 class Ghost(Entity):
     def __init__(self, node, pacman=None, blinky=None):
+        # Collision grid and goal arrays of the group the ghost belongs to,
+        # if any, with the ghost's row in them
+        self.grid = None
+        self.group = None
+        self.index = 0
         Entity.__init__(self, node)
         self.name = GHOST
         self.points = 200
@@ -18,20 +27,57 @@ class Ghost(Entity):
         self.mode = ModeController(self)
         self.blinky = blinky
         self.homeNode = node
+        self.spawnNode = None
+        # Direction asked for by a remote player, None leaves the ghost to
+        # its personality
+        self.input = None
+        self.setMazeSize(NCOLS, NROWS)
 
     def update(self, dt):
         self.sprites.update(dt)
-        self.mode.update(dt)
-        if self.mode.current is SCATTER:
-            self.scatter()
-        elif self.mode.current is CHASE:
-            self.chase()
+        # A group computes the goals of all its ghosts at once
+        if self.group is None:
+            if self.mode.current is SCATTER:
+                self.scatter()
+            elif self.mode.current is CHASE:
+                self.chase()
         Entity.update(self, dt)
+        self.updateGrid()
+
+    def setStartNode(self, node):
+        Entity.setStartNode(self, node)
+        self.updateGrid()
+
+    def updateGrid(self):
+        """Move the ghost to the grid bucket of its tile, a no-op while the
+        tile is the same"""
+        if self.grid is not None:
+            self.grid.update(self)
 
     def reset(self):
         Entity.reset(self)
         self.points = 200
         self.directionMethod = self.goalDirection
+        self.mode.reset()
+
+    def reachedNode(self, node):
+        if node is self.spawnNode:
+            self.mode.endSpawn()
+
+    def goalDirection(self, directions):
+        if self.group is not None and self.mode.current in (SCATTER, CHASE):
+            self.goal = self.group.getGoal(self)
+        return Entity.goalDirection(self, directions)
+
+    def chooseDirection(self, directions):
+        # Eyes find their own way home
+        if self.input is None or self.mode.current is SPAWN:
+            return self.directionMethod(directions)
+        if self.input in directions:
+            return self.input
+        if self.direction in directions:
+            return self.direction
+        return self.directionMethod(directions)
 
     def scatter(self):
         self.goal = Vector2()
@@ -39,6 +85,10 @@ class Ghost(Entity):
     def chase(self):
         self.goal = self.pacman.position
 
+    def setMazeSize(self, ncols, nrows):
+        self.ncols = ncols
+        self.nrows = nrows
+
     def startFreight(self):
         self.mode.setFreightMode()
         if self.mode.current == FREIGHT:
@@ -80,7 +130,7 @@ class Pinky(Ghost):
         self.sprites = GhostSprites(self)
 
     def scatter(self):
-        self.goal = Vector2(TILEWIDTH * NCOLS, 0)
+        self.goal = Vector2(TILEWIDTH * self.ncols, 0)
 
     def chase(self):
         self.goal = (
@@ -97,15 +147,16 @@ class Inky(Ghost):
         self.sprites = GhostSprites(self)
 
     def scatter(self):
-        self.goal = Vector2(TILEWIDTH * NCOLS, TILEHEIGHT * NROWS)
+        self.goal = Vector2(TILEWIDTH * self.ncols, TILEHEIGHT * self.nrows)
 
     def chase(self):
+        blinky = self.blinky if self.blinky is not None else self
         vec1 = (
             self.pacman.position
             + self.pacman.directions[self.pacman.direction] * TILEWIDTH * 2
         )
-        vec2 = (vec1 - self.blinky.position) * 2
-        self.goal = self.blinky.position + vec2
+        vec2 = (vec1 - blinky.position) * 2
+        self.goal = blinky.position + vec2
 
 
 class Clyde(Ghost):
@@ -116,7 +167,7 @@ class Clyde(Ghost):
         self.sprites = GhostSprites(self)
 
     def scatter(self):
-        self.goal = Vector2(0, TILEHEIGHT * NROWS)
+        self.goal = Vector2(0, TILEHEIGHT * self.nrows)
 
     def chase(self):
         d = self.pacman.position - self.position
@@ -130,30 +181,184 @@ class Clyde(Ghost):
             )
 
 
+def getPositions(vectors):
+    """(n, 2) array of the x, y of n vectors"""
+    return np.fromiter(
+        (value for vector in vectors for value in (vector.x, vector.y)),
+        float,
+        2 * len(vectors),
+    ).reshape(-1, 2)
+
+
+# Tiles ahead of Pac-Man each personality chases
+LEADS = {BLINKY: 0, PINKY: 4, INKY: 2, CLYDE: 4}
+PERSONALITIES = {"blinky": BLINKY, "pinky": PINKY, "inky": INKY, "clyde": CLYDE}
+DEFAULTGHOSTS = [BLINKY, PINKY, INKY, CLYDE]
+
+
+def loadGhostConfig(configfile):
+    """Read a JSON list of ghost personalities, e.g.
+    ["blinky", "pinky", {"personality": "clyde", "count": 20}]"""
+    with open(configfile) as f:
+        entries = json.load(f)
+    personalities = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"personality": entry}
+        name = entry["personality"].lower()
+        if name not in PERSONALITIES:
+            raise ValueError(f"Unknown ghost personality: {name}")
+        personalities += [PERSONALITIES[name]] * int(entry.get("count", 1))
+    return personalities
+
+
 class GhostGroup(object):
-    def __init__(self, node, pacman):
-        self.blinky = Blinky(node, pacman)
-        self.pinky = Pinky(node, pacman)
-        self.inky = Inky(node, pacman, self.blinky)
-        self.clyde = Clyde(node, pacman)
-        self.ghosts = [self.blinky, self.pinky, self.inky, self.clyde]
+    def __init__(self, node, pacman, personalities=None, level=0, scheduler=None):
+        if personalities is None:
+            personalities = DEFAULTGHOSTS
+        self.pacman = pacman
+        self.ghosts = []
+        for personality in personalities:
+            self.ghosts.append(self.createGhost(personality, node, pacman))
+        for i, ghost in enumerate(self.ghosts):
+            ghost.group = self
+            ghost.index = i
+        kinds = np.array(personalities)
+        self.pinkys = kinds == PINKY
+        self.inkys = kinds == INKY
+        self.clydes = kinds == CLYDE
+        self.clydeRows = np.flatnonzero(self.clydes)
+        self.inkyGhosts = [self.ghosts[i] for i in np.flatnonzero(self.inkys)]
+        self.clydeGhosts = [self.ghosts[i] for i in self.clydeRows]
+        self.leads = np.array([LEADS[kind] for kind in personalities], dtype=float)
+        # Goal of each ghost by main mode, the chase goals are computed
+        # once per step
+        self.goals = {}
+        self.goalsFresh = False
+        self.setScatterGoals(NCOLS, NROWS)
+        self.blinky = self.getFirst(BLINKY)
+        self.pinky = self.getFirst(PINKY)
+        self.inky = self.getFirst(INKY)
+        self.clyde = self.getFirst(CLYDE)
+        for ghost in self.getGhosts(INKY):
+            ghost.blinky = self.blinky
+        # Ghosts keep their own bucket up to date as they move
+        self.grid = CollisionGrid()
+        for ghost in self.ghosts:
+            ghost.grid = self.grid
+            self.grid.add(ghost)
+        # Without the game's scheduler the group keeps its own, ticked by
+        # whoever owns the group
+        self.scheduler = scheduler if scheduler is not None else Scheduler()
+        self.timeline = ModeTimeline(
+            self.scheduler, level, self.setMainMode, self.endFreight
+        )
+
+    def createGhost(self, personality, node, pacman):
+        if personality == BLINKY:
+            return Blinky(node, pacman)
+        elif personality == PINKY:
+            return Pinky(node, pacman)
+        elif personality == INKY:
+            return Inky(node, pacman)
+        elif personality == CLYDE:
+            return Clyde(node, pacman)
+        raise ValueError(f"Unknown ghost personality: {personality}")
+
+    def getGhosts(self, name):
+        return [ghost for ghost in self.ghosts if ghost.name == name]
+
+    def getFirst(self, name):
+        ghosts = self.getGhosts(name)
+        if len(ghosts) > 0:
+            return ghosts[0]
+        return None
+
+    def setScatterGoals(self, ncols, nrows):
+        """Corner of each personality: Blinky top left, Pinky top right,
+        Inky bottom right and Clyde bottom left"""
+        goals = np.zeros((len(self.ghosts), 2))
+        goals[self.pinkys | self.inkys, 0] = TILEWIDTH * ncols
+        goals[self.inkys | self.clydes, 1] = TILEHEIGHT * nrows
+        self.scatterGoals = goals
+        self.goals[SCATTER] = goals.tolist()
+
+    def updateGoals(self):
+        """Chase goals of every ghost from one snapshot of the positions.
+        Only the ghosts whose goal depends on where they are get read."""
+        pacman = self.pacman
+        heading = pacman.directions[pacman.direction]
+        target = np.array((pacman.position.x, pacman.position.y), dtype=float)
+        step = np.array((heading.x, heading.y), dtype=float) * TILEWIDTH
+        goals = target + self.leads[:, np.newaxis] * step
+        # Inky doubles the vector from Blinky to two tiles ahead of Pac-Man
+        if self.inkyGhosts:
+            if self.blinky is not None:
+                position = self.blinky.position
+                anchors = np.array((position.x, position.y), dtype=float)
+            else:
+                anchors = getPositions([ghost.position for ghost in self.inkyGhosts])
+            goals[self.inkys] = 2 * goals[self.inkys] - anchors
+        # Clyde heads for the corner within eight tiles of Pac-Man
+        if self.clydeGhosts:
+            positions = getPositions([ghost.position for ghost in self.clydeGhosts])
+            distances = ((positions - target) ** 2).sum(axis=1)
+            rows = self.clydeRows[distances <= (TILEWIDTH * 8) ** 2]
+            goals[rows] = self.scatterGoals[rows]
+        self.goals[CHASE] = goals.tolist()
+        self.goalsFresh = True
+
+    def getGoal(self, ghost):
+        """Goal of a ghost in scatter or chase mode"""
+        mode = ghost.mode.current
+        if mode is CHASE and not self.goalsFresh:
+            self.updateGoals()
+        x, y = self.goals[mode][ghost.index]
+        return Vector2(x, y)
+
+    def collidingGhosts(self, entity):
+        """Ghosts touching the entity at any point of the last step. Only
+        ghosts within reach of the entity's tile get an exact swept check"""
+        reach = 0
+        for ghost in self.ghosts:
+            reach = max(reach, self.grid.getTravel(ghost))
+        reach += self.grid.getTravel(entity)
+        return self.grid.colliding(entity, reach, swept=True)
 
     def __iter__(self):
         return iter(self.ghosts)
 
     def update(self, dt):
+        # While the group chases, every goal is taken before anyone moves
+        self.goalsFresh = False
+        if self.timeline.mode is CHASE:
+            self.updateGoals()
         for ghost in self:
             ghost.update(dt)
 
+    def setMainMode(self, mode):
+        for ghost in self:
+            ghost.mode.setMainMode(mode)
+
     def startFreight(self):
         for ghost in self:
             ghost.startFreight()
+        self.timeline.startFreight()
         self.resetPoints()
 
+    def endFreight(self):
+        for ghost in self:
+            ghost.mode.endFreight()
+
     def setSpawnNode(self, node):
         for ghost in self:
             ghost.setSpawnNode(node)
 
+    def setMazeSize(self, ncols, nrows):
+        self.setScatterGoals(ncols, nrows)
+        for ghost in self:
+            ghost.setMazeSize(ncols, nrows)
+
     def updatePoints(self):
         for ghost in self:
             ghost.points *= 2
@@ -163,6 +368,7 @@ class GhostGroup(object):
             ghost.points = 200
 
     def reset(self):
+        self.timeline.reset()
         for ghost in self:
             ghost.reset()
 
@@ -174,6 +380,6 @@ class GhostGroup(object):
         for ghost in self:
             ghost.visible = True
 
-    def render(self, screen):
+    def render(self, screen, camera=None):
         for ghost in self:
-            ghost.render(screen)
+            ghost.render(screen, camera)
@@ -1,46 +1,110 @@
+import time
+
+# Taken before the other imports so --startup-report can time them
+STARTED = time.perf_counter()
+
 import argparse
+import random
 import pygame
 from pygame.locals import *
 from constants import *
 from pacman.pacman import Pacman
-from movement.nodes import NodeGroup
-from food.pellets import PelletGroup
-from ghosts.ghost import GhostGroup
+from ghosts.ghost import DEFAULTGHOSTS, GhostGroup, loadGhostConfig
 from food.fruit import Fruit
 from pauser import Pause
+from scheduler import Scheduler
+from replay import ReplayHeader, ReplayPlayer, ReplayRecorder, mazeDigests
+from gcbudget import GCBudget
 from styles.text import TextGroup
+from styles.animation import AnimationClock
 from styles.sprite.sprites import LifeSprites
-from styles.sprite.sprites import MazeSprites
+from styles.sprite.asset_cache import assetcache
+from styles.camera import Camera
 from maze.mazedata import MazeData
+from maze.preloader import LevelAssets, LevelPreloader
+from telemetry.profiler import FrameProfiler
+from telemetry.trace import tracer, traced
+from telemetry.startup import startup
+
+IMPORTED = time.perf_counter()
 
 
 class GameController(object):
-    def __init__(self, bgcolor: tuple[int, int, int]):
-        pygame.init()
+    def __init__(
+        self,
+        bgcolor: tuple[int, int, int],
+        ghostconfig=None,
+        timescale=1,
+        fastest=False,
+        profileFile=None,
+        memoryFile=None,
+        manualGC=False,
+        frametimes=None,
+    ):
+        with startup.phase("init"):
+            pygame.init()
         self.background_color = bgcolor
-        self.screen = pygame.display.set_mode(SCREENSIZE, 0, 32)
+        self.ghostconfig = ghostconfig
+        with startup.phase("init"):
+            self.screen = pygame.display.set_mode(SCREENSIZE, 0, 32)
         self.background = None
         self.background_norm = None
         self.background_flash = None
         self.clock = pygame.time.Clock()
         self.fruit = None
-        self.pause = Pause(True)
+        self.fruitTimer = None
+        self.ghosts = None
+        self.scheduler = Scheduler()
+        # Each game times its own sprites, a server stepping many games
+        # would otherwise advance one clock once per game
+        self.animationclock = AnimationClock()
+        self.pause = Pause(True, self.scheduler)
         self.level = 0
         self.lives = 5
         self.score = 0
-        self.textgroup = TextGroup()
-        self.lifesprites = LifeSprites(self.lives)
+        with startup.phase("assets"):
+            self.textgroup = TextGroup()
+            self.lifesprites = LifeSprites(self.lives)
         self.flashBG = False
         self.flashTime = 0.2
-        self.flashTimer = 0
+        self.flashTimer = None
+        self.pelletTimer = None
         self.fruitCaptured = []
         self.mazedata = MazeData()
+        self.preloader = LevelPreloader(bgcolor)
+        self.camera = Camera()
+        self.profiler = FrameProfiler(enabled=profileFile is not None)
+        self.profileFile = profileFile
+        self.memory = None
+        self.memoryFile = memoryFile
+        if memoryFile is not None:
+            # Imported on demand, tracemalloc is not needed for normal play
+            from telemetry.memory import MemoryTelemetry
+
+            self.memory = MemoryTelemetry()
+            self.profiler.enabled = True
+            self.profiler.memory = self.memory
+        self.accumulator = 0
+        self.timescale = 1
+        self.setTimeScale(timescale)
+        self.fastest = False
+        self.tickCount = 0
+        self.tickReportTime = 0
+        if fastest:
+            self.toggleFastest()
+        self.frametimes = frametimes
+        self.ticks = 0
+        self.replay = None
+        self.gcbudget = GCBudget(enabled=manualGC)
+        if manualGC:
+            self.pause.collector = self.gcbudget
+            self.gcbudget.start()
 
     def restartGame(self):
         self.lives = 5
         self.level = 0
         self.pause.paused = True
-        self.fruit = None
+        self.removeFruit()
         self.startGame()
         self.score = 0
         self.textgroup.updateScore(self.score)
@@ -53,98 +117,220 @@ class GameController(object):
         self.pause.paused = True
         self.pacman.reset()
         self.ghosts.reset()
-        self.fruit = None
+        self.removeFruit()
         self.textgroup.showText(READYTXT)
 
+    @traced("GameController.nextLevel")
     def nextLevel(self):
         self.showEntities()
         self.level += 1
         self.pause.paused = True
         self.startGame()
         self.textgroup.updateLevel(self.level)
+        self.gcbudget.collectFull()
 
-    def setBackground(self):
-        self.background_norm = pygame.surface.Surface(SCREENSIZE).convert()
-        self.background_norm.fill(self.background_color)
-        self.background_flash = pygame.surface.Surface(SCREENSIZE).convert()
-        self.background_flash.fill(self.background_color)
-        self.background_norm = self.mazesprites.constructBackground(
-            self.background_norm, self.level % 5
-        )
-        self.background_flash = self.mazesprites.constructBackground(
-            self.background_flash, 5
+    def setBackground(self, assets):
+        self.background_norm = assets.background_norm
+        self.background_flash = assets.background_flash
+        self.stopFlashing()
+        self.background = self.background_norm
+
+    def startFlashing(self, due=None):
+        """Flash the background every flashTime seconds, the first time at
+        due when it is given"""
+        self.flashBG = True
+        if due is None:
+            due = self.scheduler.now(realtime=True) + self.flashTime
+        self.flashTimer = self.scheduler.at(
+            due, self.flashBackground, realtime=True, interval=self.flashTime
         )
+
+    def stopFlashing(self):
         self.flashBG = False
-        self.background = self.background_norm
+        if self.flashTimer is not None:
+            self.flashTimer.cancel()
+            self.flashTimer = None
 
+    def flashBackground(self):
+        if self.background == self.background_norm:
+            self.background = self.background_flash
+        else:
+            self.background = self.background_norm
+
+    @traced("GameController.startGame")
     def startGame(self):
-        self.mazedata.loadMaze(self.level)
-        self.mazesprites = MazeSprites(
-            "maze\\" + self.mazedata.obj.name + ".txt",
-            "maze\\" + self.mazedata.obj.name + "_rotation.txt",
-        )
-        self.setBackground()
-        self.nodes = NodeGroup("maze\\" + self.mazedata.obj.name + ".txt")
-        self.mazedata.obj.setPortalPairs(self.nodes)
-        self.mazedata.obj.connectHomeNodes(self.nodes)
+        assets = self.preloader.take(self.level)
+        if assets is None:
+            assets = LevelAssets(self.level, self.background_color, startup.phase)
+        self.stopLevelTimers()
+        self.mazedata = assets.mazedata
+        self.nodes = assets.nodes
+        self.pellets = assets.pellets
+        self.pelletTimer = self.pellets.startFlashing(self.scheduler)
+        self.mazesprites = assets.mazesprites
+        self.setBackground(assets)
+        self.camera.setWorldSize(*self.mazesprites.getSize())
         self.pacman = Pacman(
-            self.nodes.getNodeFromTiles(*self.mazedata.obj.pacmanStart)
-        )
-        self.pellets = PelletGroup("maze\\" + self.mazedata.obj.name + ".txt")
-        self.ghosts = GhostGroup(self.nodes.getStartTempNode(), self.pacman)
-        self.ghosts.pinky.setStartNode(
-            self.nodes.getNodeFromTiles(*self.mazedata.obj.addOffset(2, 3))
-        )
-        self.ghosts.inky.setStartNode(
-            self.nodes.getNodeFromTiles(*self.mazedata.obj.addOffset(0, 3))
+            self.nodes.getNodeFromTiles(*self.mazedata.obj.pacmanStart),
+            self.animationclock,
         )
-        self.ghosts.clyde.setStartNode(
-            self.nodes.getNodeFromTiles(*self.mazedata.obj.addOffset(4, 3))
+        self.ghosts = GhostGroup(
+            self.nodes.getStartTempNode(),
+            self.pacman,
+            self.ghostconfig,
+            self.level,
+            self.scheduler,
         )
+        self.ghosts.setMazeSize(self.nodes.ncols, self.nodes.nrows)
+        for ghost in self.ghosts:
+            ghost.setStartNode(
+                self.nodes.getNodeFromTiles(
+                    *self.mazedata.obj.addOffset(
+                        *self.mazedata.obj.ghostStarts[ghost.name]
+                    )
+                )
+            )
         self.ghosts.setSpawnNode(
             self.nodes.getNodeFromTiles(*self.mazedata.obj.addOffset(2, 3))
         )
-        self.ghosts.blinky.setStartNode(
-            self.nodes.getNodeFromTiles(*self.mazedata.obj.addOffset(2, 0))
-        )
         self.nodes.denyHomeAccess(self.pacman)
         self.nodes.denyHomeAccessList(self.ghosts)
-        self.ghosts.inky.startNode.denyAccess(RIGHT, self.ghosts.inky)
-        self.ghosts.clyde.startNode.denyAccess(LEFT, self.ghosts.clyde)
+        for ghost in self.ghosts.getGhosts(INKY):
+            ghost.startNode.denyAccess(RIGHT, ghost)
+        for ghost in self.ghosts.getGhosts(CLYDE):
+            ghost.startNode.denyAccess(LEFT, ghost)
         self.mazedata.obj.denyGhostsAccess(self.ghosts, self.nodes)
+        self.preloader.preload(self.level + 1)
+
+    def stopLevelTimers(self):
+        """Cancel the timers of the level being replaced"""
+        self.removeFruit()
+        if self.pelletTimer is not None:
+            self.pelletTimer.cancel()
+            self.pelletTimer = None
+        if self.ghosts is not None:
+            self.ghosts.timeline.stop()
 
+    @traced("GameController.update")
     def update(self):
-        dt = self.clock.tick(30) / 1000.0
+        if self.frametimes is not None:
+            self.frametimes.frame()
+        if self.fastest:
+            self.clock.tick()
+        else:
+            dt = self.clock.tick(FPS) / 1000.0
+            # clock.tick rounds to whole milliseconds, so on time frames
+            # would alternate between no step and two steps
+            if abs(dt - SIMSTEP) < SNAPTOLERANCE:
+                dt = SIMSTEP
+        # The frame starts after the wait for the frame rate
+        frameStart = self.profiler.begin()
+        self.gcbudget.beginFrame()
+        if self.fastest:
+            self.fastForward()
+        else:
+            self.accumulator += dt * self.timescale
+            steps = 0
+            while self.accumulator >= SIMSTEP and steps < MAXSTEPS:
+                self.step(SIMSTEP)
+                self.accumulator -= SIMSTEP
+                steps += 1
+            if steps == MAXSTEPS:
+                self.accumulator = 0
+        self.camera.follow(self.pacman.position)
+        t = self.profiler.begin()
+        self.checkEvents()
+        self.profiler.end("checkEvents", t)
+        self.render()
+        self.profiler.update(SIMSTEP)
+        t = self.profiler.begin()
+        self.gcbudget.idle(self.pause.paused)
+        self.profiler.end("gc.idle", t)
+        self.profiler.endFrame(frameStart)
+
+    def fastForward(self):
+        """Run as many fixed steps as fit in one frame and report the
+        achieved tick rate once a second"""
+        start = time.perf_counter()
+        while time.perf_counter() - start < SIMSTEP:
+            self.step(SIMSTEP)
+            self.tickCount += 1
+        now = time.perf_counter()
+        if now - self.tickReportTime >= 1:
+            rate = self.tickCount / (now - self.tickReportTime)
+            print(f"{rate:.0f} sim ticks/s ({rate * SIMSTEP:.1f}x)")
+            self.tickCount = 0
+            self.tickReportTime = now
+
+    def setTimeScale(self, timescale):
+        self.timescale = min(max(timescale, MINTIMESCALE), MAXTIMESCALE)
+        self.accumulator = 0
+
+    def toggleFastest(self):
+        self.fastest = not self.fastest
+        self.tickCount = 0
+        self.tickReportTime = time.perf_counter()
+
+    @traced("GameController.step")
+    def step(self, dt):
+        profiler = self.profiler
+        if self.replay is not None:
+            self.replay.tick(self)
+        t = profiler.begin()
+        self.animationclock.tick(dt)
+        profiler.end("animations.tick", t)
+        t = profiler.begin()
         self.textgroup.update(dt)
-        self.pellets.update(dt)
-        if not self.pause.paused:
+        profiler.end("textgroup.update", t)
+        paused = self.pause.paused
+        if not paused:
+            t = profiler.begin()
             self.ghosts.update(dt)
-            if self.fruit is not None:
-                self.fruit.update(dt)
-            self.checkPelletEvents()
-            self.checkGhostEvents()
-            self.checkFruitEvents()
+            profiler.end("ghosts.update", t)
 
+        # Pac-Man moves before the checks too, so the swept tests compare
+        # Pac-Man's path and the ghosts' over the same step
+        t = profiler.begin()
         if self.pacman.alive:
-            if not self.pause.paused:
+            if not paused:
                 self.pacman.update(dt)
         else:
             self.pacman.update(dt)
+        profiler.end("pacman.update", t)
 
-        if self.flashBG:
-            self.flashTimer += dt
-            if self.flashTimer >= self.flashTime:
-                self.flashTimer = 0
-                if self.background == self.background_norm:
-                    self.background = self.background_flash
-                else:
-                    self.background = self.background_norm
-
-        afterPauseMethod = self.pause.update(dt)
-        if afterPauseMethod is not None:
-            afterPauseMethod()
-        self.checkEvents()
-        self.render()
+        if not paused:
+            t = profiler.begin()
+            self.checkPelletEvents()
+            profiler.end("checkPelletEvents", t)
+            t = profiler.begin()
+            self.checkGhostEvents()
+            profiler.end("checkGhostEvents", t)
+            t = profiler.begin()
+            self.checkFruitEvents()
+            profiler.end("checkFruitEvents", t)
+
+        self.pause.update(dt)
+        t = profiler.begin()
+        self.scheduler.update(dt, paused)
+        profiler.end("scheduler.update", t)
+        self.ticks += 1
+
+    def quit(self):
+        if self.profileFile is not None:
+            self.profiler.dump(self.profileFile)
+        if self.memory is not None:
+            self.memory.stop()
+            self.memory.dump(self.memoryFile)
+        if self.gcbudget.enabled:
+            self.gcbudget.stop()
+            print(self.gcbudget.formatReport())
+        if self.frametimes is not None:
+            self.frametimes.close()
+        if self.replay is not None:
+            self.replay.close()
+        assetcache.close()
+        tracer.stop()
+        exit()
 
     def updateScore(self, points):
         self.score += points
@@ -153,63 +339,68 @@ class GameController(object):
     def checkEvents(self):
         for event in pygame.event.get():
             if event.type == QUIT:
-                exit()
+                self.quit()
             elif event.type == KEYDOWN:
                 if event.key == K_SPACE:
-                    if self.pacman.alive:
-                        self.pause.setPause(playerPaused=True)
-                        if not self.pause.paused:
-                            self.textgroup.hideText()
-                            self.showEntities()
-                        else:
-                            self.textgroup.showText(PAUSETXT)
-                            self.hideEntities()
+                    if self.replay is not None:
+                        self.replay.pressPause()
+                    else:
+                        self.togglePause()
+                elif event.key in (K_PLUS, K_EQUALS, K_KP_PLUS):
+                    self.setTimeScale(self.timescale * 2)
+                elif event.key in (K_MINUS, K_KP_MINUS):
+                    self.setTimeScale(self.timescale / 2)
+                elif event.key == K_1:
+                    self.setTimeScale(1)
+                elif event.key == K_0:
+                    self.toggleFastest()
+                elif event.key == K_F3:
+                    self.profiler.toggleOverlay()
+
+    def togglePause(self):
+        if self.pacman.alive:
+            self.pause.setPause(playerPaused=True)
+            if not self.pause.paused:
+                self.textgroup.hideText()
+                self.showEntities()
+            else:
+                self.textgroup.showText(PAUSETXT)
+                self.hideEntities()
 
     def checkGhostEvents(self):
-        for ghost in self.ghosts:
-            if self.pacman.collideGhost(ghost):
-                if ghost.mode.current is FREIGHT:
-                    self.pacman.visible = False
-                    ghost.visible = False
-                    self.updateScore(ghost.points)
-                    self.textgroup.addText(
-                        str(ghost.points),
-                        WHITE,
-                        ghost.position.x,
-                        ghost.position.y,
-                        8,
-                        time=1,
-                    )
-                    self.ghosts.updatePoints()
-                    self.pause.setPause(pauseTime=1, func=self.showEntities)
-                    ghost.startSpawn()
-                    self.nodes.allowHomeAccess(ghost)
-                elif ghost.mode.current is not SPAWN:
-                    if self.pacman.alive:
-                        self.lives -= 1
-                        self.lifesprites.removeImage()
-                        self.pacman.die()
-                        self.ghosts.hide()
-                        if self.lives <= 0:
-                            self.textgroup.showText(GAMEOVERTXT)
-                            self.pause.setPause(pauseTime=3, func=self.restartGame)
-                        else:
-                            self.pause.setPause(pauseTime=3, func=self.resetLevel)
+        for ghost in self.ghosts.collidingGhosts(self.pacman):
+            if ghost.mode.current is FREIGHT:
+                self.pacman.visible = False
+                ghost.visible = False
+                self.updateScore(ghost.points)
+                self.textgroup.addPopup(
+                    ghost.points, ghost.position.x, ghost.position.y
+                )
+                self.ghosts.updatePoints()
+                self.pause.setPause(pauseTime=1, func=self.showEntities)
+                ghost.startSpawn()
+                self.nodes.allowHomeAccess(ghost)
+            elif ghost.mode.current is not SPAWN:
+                if self.pacman.alive:
+                    self.lives -= 1
+                    self.lifesprites.removeImage()
+                    self.pacman.die()
+                    self.ghosts.hide()
+                    if self.lives <= 0:
+                        self.textgroup.showText(GAMEOVERTXT)
+                        self.pause.setPause(pauseTime=3, func=self.restartGame)
+                    else:
+                        self.pause.setPause(pauseTime=3, func=self.resetLevel)
 
     def checkFruitEvents(self):
         if self.pellets.numEaten == 50 or self.pellets.numEaten == 140:
             if self.fruit is None:
-                self.fruit = Fruit(self.nodes.getNodeFromTiles(9, 20))
+                self.addFruit()
         if self.fruit is not None:
             if self.pacman.collideCheck(self.fruit):
                 self.updateScore(self.fruit.points)
-                self.textgroup.addText(
-                    str(self.fruit.points),
-                    WHITE,
-                    self.fruit.position.x,
-                    self.fruit.position.y,
-                    8,
-                    time=1,
+                self.textgroup.addPopup(
+                    self.fruit.points, self.fruit.position.x, self.fruit.position.y
                 )
                 fruitCaptured = False
                 for fruit in self.fruitCaptured:
@@ -218,26 +409,46 @@ class GameController(object):
                         break
                 if not fruitCaptured:
                     self.fruitCaptured.append(self.fruit.image)
-                self.fruit = None
-            elif self.fruit.destroy:
-                self.fruit = None
+                self.removeFruit()
+
+    def addFruit(self, due=None):
+        """Show the fruit until due, by default for its lifespan"""
+        self.fruit = Fruit(self.nodes.getNodeFromTiles(*self.mazedata.obj.fruitStart))
+        if due is None:
+            due = self.scheduler.now() + self.fruit.lifespan
+        self.fruitTimer = self.scheduler.at(due, self.removeFruit)
+
+    def removeFruit(self):
+        self.fruit = None
+        if self.fruitTimer is not None:
+            self.fruitTimer.cancel()
+            self.fruitTimer = None
 
     def checkPelletEvents(self):
-        pellet = self.pacman.eatPellets(self.pellets.pelletList)
-        if pellet:
+        reach = self.pellets.grid.getTravel(self.pacman)
+        pellet = self.pacman.eatPellets(
+            self.pellets.getNearby(self.pacman.position, reach)
+        )
+        while pellet:
             self.pellets.numEaten += 1
             self.updateScore(pellet.points)
             if self.pellets.numEaten == 30:
-                self.ghosts.inky.startNode.allowAccess(RIGHT, self.ghosts.inky)
+                for ghost in self.ghosts.getGhosts(INKY):
+                    ghost.startNode.allowAccess(RIGHT, ghost)
             if self.pellets.numEaten == 70:
-                self.ghosts.clyde.startNode.allowAccess(LEFT, self.ghosts.clyde)
-            self.pellets.pelletList.remove(pellet)
+                for ghost in self.ghosts.getGhosts(CLYDE):
+                    ghost.startNode.allowAccess(LEFT, ghost)
+            self.pellets.removePellet(pellet)
             if pellet.name == POWERPELLET:
                 self.ghosts.startFreight()
             if self.pellets.isEmpty():
-                self.flashBG = True
+                self.startFlashing()
                 self.hideEntities()
                 self.pause.setPause(pauseTime=3, func=self.nextLevel)
+                break
+            pellet = self.pacman.eatPellets(
+                self.pellets.getNearby(self.pacman.position, reach)
+            )
 
     def showEntities(self):
         self.pacman.visible = True
@@ -248,13 +459,23 @@ class GameController(object):
         self.ghosts.hide()
 
     def render(self):
-        self.screen.blit(self.background, (0, 0))
-        self.pellets.render(self.screen)
+        profiler = self.profiler
+        t = profiler.begin()
+        self.screen.blit(self.background, (0, 0), self.camera.getRect())
+        profiler.end("render.background", t)
+        t = profiler.begin()
+        self.pellets.render(self.screen, self.camera)
+        profiler.end("render.pellets", t)
+        t = profiler.begin()
         if self.fruit is not None:
-            self.fruit.render(self.screen)
-        self.pacman.render(self.screen)
-        self.ghosts.render(self.screen)
-        self.textgroup.render(self.screen)
+            self.fruit.render(self.screen, self.camera)
+        self.pacman.render(self.screen, self.camera)
+        profiler.end("render.pacman", t)
+        t = profiler.begin()
+        self.ghosts.render(self.screen, self.camera)
+        profiler.end("render.ghosts", t)
+        t = profiler.begin()
+        self.textgroup.render(self.screen, self.camera)
         for i in range(len(self.lifesprites.images)):
             x = self.lifesprites.images[i].get_width() * i
             y = SCREENHEIGHT - self.lifesprites.images[i].get_height()
@@ -264,7 +485,11 @@ class GameController(object):
             x = SCREENWIDTH - self.fruitCaptured[i].get_width() * (i + 1)
             y = SCREENHEIGHT - self.fruitCaptured[i].get_height()
             self.screen.blit(self.fruitCaptured[i], (x, y))
+        profiler.end("render.hud", t)
+        profiler.render(self.screen)
+        t = profiler.begin()
         pygame.display.update()
+        profiler.end("render.display", t)
 
 
 def parse_args():
@@ -278,20 +503,173 @@ def parse_args():
         default=[0, 0, 0],
         help="Background color as three integers (0-255). Default is black (0, 0, 0).",
     )
+    parser.add_argument(
+        "--ghosts",
+        metavar="CONFIG",
+        default=None,
+        help="JSON file listing ghost personalities. Default is the classic four.",
+    )
+
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1,
+        help=f"Simulation time scale ({MINTIMESCALE}-{MAXTIMESCALE}). "
+        "Change at runtime with +/-, 1 resets.",
+    )
+    parser.add_argument(
+        "--fastest",
+        action="store_true",
+        help="Run the simulation as fast as possible and report sim ticks/s. "
+        "Toggle at runtime with 0.",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        default=None,
+        help="Time each game loop stage and write the stats as JSON on exit. "
+        "F3 toggles the on-screen overlay.",
+    )
+    parser.add_argument(
+        "--manual-gc",
+        action="store_true",
+        help="Disable automatic garbage collection during play and collect in "
+        "idle frame time, pauses and level changes instead. Prints GC time on exit.",
+    )
+    parser.add_argument(
+        "--memory",
+        metavar="FILE",
+        default=None,
+        help="Track allocations and garbage collection per game loop stage "
+        "(tracemalloc, slow) and write a JSON summary on exit.",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="FILE",
+        default=None,
+        help="Record frame times in a histogram and append p50/p90/p99/p99.9/max "
+        "as InfluxDB line protocol to FILE ('-' for stdout).",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=10,
+        help="Seconds between frame time exports. Default is 10.",
+    )
+    parser.add_argument(
+        "--metrics-build",
+        default="dev",
+        help="Build tag written with every frame time line. Default is dev.",
+    )
+    parser.add_argument(
+        "--no-asset-cache",
+        action="store_true",
+        help="Decode every image on launch instead of reusing the scaled "
+        "pixels kept in .cache/assets.",
+    )
+    parser.add_argument(
+        "--startup-report",
+        action="store_true",
+        help="Print time to first frame split into imports, pygame init, "
+        "asset loading and maze building.",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        default=None,
+        help="Record game loop and loading spans as a Chrome trace-event "
+        "JSON file (open in chrome://tracing or Perfetto).",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="FILE",
+        default=None,
+        help="Record the input of every tick to a replay file.",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="FILE",
+        default=None,
+        help="Play a recorded replay back, the keyboard takes over when it "
+        "ends. Combine with --fastest to check a replay quickly.",
+    )
+    parser.add_argument(
+        "--replay-from",
+        metavar="SECONDS",
+        type=float,
+        default=0,
+        help="Start the replay this far in, restored from the keyframe "
+        "before and simulated from there without drawing.",
+    )
 
     args = parser.parse_args()
 
     # Validate RGB values
     if any(c < 0 or c > 255 for c in args.bgcolor):
         parser.error("RGB values must be in the range 0-255.")
+    if args.record is not None and args.replay is not None:
+        parser.error("--record and --replay cannot be combined.")
+    if args.replay_from and args.replay is None:
+        parser.error("--replay-from needs --replay.")
 
     return args
 
 
 if __name__ == "__main__":
     args = parse_args()
+    if args.startup_report:
+        startup.start(STARTED)
+        startup.add("import", IMPORTED - STARTED)
+    if not args.no_asset_cache:
+        assetcache.open()
+    if args.trace is not None:
+        tracer.start(args.trace)
 
-    game = GameController(args.bgcolor)
+    ghostconfig = None
+    if args.ghosts is not None:
+        ghostconfig = loadGhostConfig(args.ghosts)
+    replay = None
+    if args.replay is not None:
+        replay = ReplayPlayer(args.replay)
+        for problem in replay.header.mismatches(mazeDigests(MazeData())):
+            print(f"warning: {problem}")
+        ghostconfig = replay.header.ghosts
+    elif args.record is not None:
+        header = ReplayHeader(
+            random.getrandbits(32),
+            mazeDigests(MazeData()),
+            ghostconfig if ghostconfig is not None else DEFAULTGHOSTS,
+        )
+        replay = ReplayRecorder(args.record, header)
+    frametimes = None
+    if args.metrics is not None:
+        from telemetry.histogram import FrameTimeReporter
+
+        frametimes = FrameTimeReporter(
+            args.metrics, args.metrics_interval, args.metrics_build
+        )
+    game = GameController(
+        args.bgcolor,
+        ghostconfig,
+        args.speed,
+        args.fastest,
+        args.profile,
+        args.memory,
+        args.manual_gc,
+        frametimes,
+    )
     game.startGame()
+    if args.replay_from:
+        replay.start(game, int(args.replay_from * FPS))
+    game.replay = replay
+    if game.memory is not None:
+        game.memory.start()
+    with startup.phase("first frame"):
+        game.update()
+    for line in startup.finish():
+        print(line)
+    # Everything the first level needs is cached now, keep it if the game
+    # does not quit cleanly
+    assetcache.flush()
     while True:
         game.update()
@@ -0,0 +1,89 @@
+import threading
+import pygame
+from maze.mazedata import MazeData
+from movement.nodes import NodeGroup
+from food.pellets import PelletGroup
+from styles.sprite.sprites import MazeSprites
+from telemetry.trace import NULLSPAN, tracer, traced
+
+
+def untimed(name):
+    return NULLSPAN
+
+
+class LevelAssets(object):
+    """The parts of a level that do not depend on game state: the maze, its
+    node graph, the pellets and both backgrounds. Entities are created by
+    GameController.startGame on top of these."""
+
+    @traced("LevelAssets.build", "load")
+    def __init__(self, level, bgcolor, phase=untimed):
+        self.level = level
+        with phase("maze"):
+            self.mazedata = MazeData()
+            self.mazedata.loadMaze(level)
+            maze = self.mazedata.obj
+            self.nodes = NodeGroup(maze.getFile())
+            maze.setPortalPairs(self.nodes)
+            maze.connectHomeNodes(self.nodes)
+            self.pellets = PelletGroup(maze.getFile())
+        with phase("assets"):
+            self.mazesprites = MazeSprites(maze.getFile(), maze.getFile("_rotation"))
+            self.background_norm = self.createBackground(bgcolor, level % 5)
+            self.background_flash = self.createBackground(bgcolor, 5)
+
+    def createBackground(self, bgcolor, y):
+        background = pygame.surface.Surface(self.mazesprites.getSize()).convert()
+        background.fill(bgcolor)
+        return self.mazesprites.constructBackground(background, y)
+
+
+class LevelPreloader(object):
+    """Builds the LevelAssets of an upcoming level on a worker thread while
+    the current one is played. take() hands them over at the level change,
+    waiting for the worker only if it has not finished yet."""
+
+    def __init__(self, bgcolor):
+        self.bgcolor = bgcolor
+        self.level = None
+        self.result = None
+        self.error = None
+        self.thread = None
+
+    def preload(self, level):
+        if self.level == level:
+            return
+        self.wait()
+        self.level = level
+        self.result = None
+        self.error = None
+        self.thread = threading.Thread(
+            target=self.run, args=(level,), name="level-preloader", daemon=True
+        )
+        self.thread.start()
+
+    def run(self, level):
+        try:
+            with tracer.span("LevelPreloader.run", "load", level=level):
+                self.result = LevelAssets(level, self.bgcolor)
+        except Exception as e:
+            self.error = e
+
+    def wait(self):
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def take(self, level):
+        """Preloaded assets for level, or None if a different level was
+        preloaded or the build failed. A failure is reported here, the
+        caller builds the level itself. Either way the slot is emptied"""
+        if self.level != level:
+            return None
+        self.wait()
+        if self.error is not None:
+            print(f"warning: preloading level {level} failed: {self.error!r}")
+        result = self.result
+        self.level = None
+        self.result = None
+        return result
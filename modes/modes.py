@@ -1,53 +1,116 @@
 from constants import *
 
+# Arcade scatter/chase tables: from which level on a table applies and the
+# alternating scatter, chase, scatter, ... durations in seconds. The phase
+# after the last one lasts for the rest of the level. Levels count from 0,
+# so level 0 is the arcade's level 1.
+SCHEDULES = (
+    (0, (7, 20, 7, 20, 5, 20, 5)),
+    (1, (7, 20, 7, 20, 5, 1033, 1 / 60)),
+    (4, (5, 20, 5, 20, 5, 1037, 1 / 60)),
+)
+FREIGHTTIME = 7
 
-class MainMode(object):
-    def __init__(self):
-        self.timer = 0
-        self.scatter()
 
-    def update(self, dt):
-        self.timer += dt
-        if self.timer >= self.time:
-            if self.mode is SCATTER:
-                self.chase()
-            elif self.mode is CHASE:
-                self.scatter()
+def getSchedule(level):
+    phases = SCHEDULES[0][1]
+    for first, durations in SCHEDULES:
+        if level >= first:
+            phases = durations
+    return phases
 
-    def scatter(self):
+
+class ModeTimeline(object):
+    """Scatter/chase phases of a level and the end of frightened mode, shared
+    by every ghost of a GhostGroup. Both are timers on the game scheduler,
+    the callbacks run when a boundary is reached."""
+
+    def __init__(self, scheduler, level=0, onModeChange=None, onFreightEnd=None):
+        self.scheduler = scheduler
+        self.phases = getSchedule(level)
+        self.onModeChange = onModeChange
+        self.onFreightEnd = onFreightEnd
+        self.changeTimer = None
+        self.freightTimer = None
+        self.reset()
+
+    def reset(self):
+        self.stop()
+        self.phase = 0
         self.mode = SCATTER
-        self.time = 7
-        self.timer = 0
+        self.scheduleChange(self.scheduler.now() + self.phases[0])
+
+    def stop(self):
+        for timer in (self.changeTimer, self.freightTimer):
+            if timer is not None:
+                timer.cancel()
+        self.changeTimer = None
+        self.freightTimer = None
+
+    def scheduleChange(self, due):
+        # Boundaries are absolute times so phases do not drift with the step
+        self.changeTimer = self.scheduler.at(due, self.change)
+
+    def change(self):
+        self.phase += 1
+        self.mode = CHASE if self.phase % 2 else SCATTER
+        if self.phase < len(self.phases):
+            self.scheduleChange(self.changeTimer.due + self.phases[self.phase])
+        else:
+            self.changeTimer = None
+        if self.onModeChange is not None:
+            self.onModeChange(self.mode)
 
-    def chase(self):
-        self.mode = CHASE
-        self.time = 20
-        self.timer = 0
+    def restore(self, phase, mode, changeDue=None, freightDue=None):
+        """Carry on from a saved phase, with the next boundary and the end
+        of frightened mode due at the given times"""
+        self.stop()
+        self.phase = phase
+        self.mode = mode
+        if changeDue is not None:
+            self.scheduleChange(changeDue)
+        if freightDue is not None:
+            self.freightTimer = self.scheduler.at(freightDue, self.endFreight)
+
+    def startFreight(self, duration=FREIGHTTIME):
+        """Frightened mode ends duration seconds from now, a power pellet
+        eaten while it lasts starts it over"""
+        if self.freightTimer is not None:
+            self.freightTimer.cancel()
+        self.freightTimer = self.scheduler.after(duration, self.endFreight)
+
+    def endFreight(self):
+        self.freightTimer = None
+        if self.onFreightEnd is not None:
+            self.onFreightEnd()
 
 
 class ModeController(object):
+    """Mode of one ghost. Scatter and chase follow the group's timeline,
+    freight and spawn are left through endFreight and endSpawn."""
+
     def __init__(self, entity):
-        self.timer = 0
-        self.time = None
-        self.mainmode = MainMode()
-        self.current = self.mainmode.mode
         self.entity = entity
+        self.reset()
+
+    def reset(self, mainmode=SCATTER):
+        self.mainmode = mainmode
+        self.current = mainmode
+
+    def setMainMode(self, mode):
+        self.mainmode = mode
+        if self.current in [SCATTER, CHASE]:
+            self.current = mode
 
-    def update(self, dt):
-        self.mainmode.update(dt)
+    def endFreight(self):
         if self.current is FREIGHT:
-            self.timer += dt
-            if self.timer >= self.time:
-                self.time = None
-                self.entity.normalMode()
-                self.current = self.mainmode.mode
-        elif self.current in [SCATTER, CHASE]:
-            self.current = self.mainmode.mode
+            self.entity.normalMode()
+            self.current = self.mainmode
 
+    def endSpawn(self):
         if self.current is SPAWN:
-            if self.entity.node == self.entity.spawnNode:
-                self.entity.normalMode()
-                self.current = self.mainmode.mode
+            self.entity.normalMode()
+            self.current = self.mainmode
 
     def setSpawnMode(self):
         if self.current is FREIGHT:
@@ -55,8 +118,4 @@ class ModeController(object):
 
     def setFreightMode(self):
         if self.current in [SCATTER, CHASE]:
-            self.timer = 0
-            self.time = 7
             self.current = FREIGHT
-        elif self.current is FREIGHT:
-            self.timer = 0
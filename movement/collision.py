@@ -0,0 +1,173 @@
+import math
+from movement.vector import Vector2
+from constants import *
+
+
+def sweptCollide(start, end, otherstart, otherend, radius):
+    """True if two points moving in straight lines over the same step come
+    within radius of each other at any moment of the step"""
+    px = start.x - otherstart.x
+    py = start.y - otherstart.y
+    vx = (end.x - start.x) - (otherend.x - otherstart.x)
+    vy = (end.y - start.y) - (otherend.y - otherstart.y)
+    vv = vx * vx + vy * vy
+    t = 0
+    if vv > 0:
+        t = min(max(-(px * vx + py * vy) / vv, 0), 1)
+    dx = px + vx * t
+    dy = py + vy * t
+    return dx * dx + dy * dy <= radius * radius
+
+
+def getPath(entity):
+    """Points an entity went through over its last step: lastPosition,
+    every node it passed and position"""
+    if entity.lastPosition is None:
+        return [entity.position]
+    return [entity.lastPosition, *entity.waypoints, entity.position]
+
+
+def getPathLength(path):
+    length = 0
+    for i in range(len(path) - 1):
+        length += abs(path[i + 1].x - path[i].x) + abs(path[i + 1].y - path[i].y)
+    return length
+
+
+def getPathTimes(path):
+    """Fraction of the step at which each point of a path is reached,
+    moving at a constant speed"""
+    lengths = [0]
+    for a, b in zip(path, path[1:]):
+        lengths.append(lengths[-1] + abs(b.x - a.x) + abs(b.y - a.y))
+    if lengths[-1] == 0:
+        return [0] * len(path)
+    return [length / lengths[-1] for length in lengths]
+
+
+def getPathPoint(path, times, t):
+    for i in range(len(path) - 1):
+        if times[i + 1] >= t:
+            a, b = path[i], path[i + 1]
+            span = times[i + 1] - times[i]
+            f = (t - times[i]) / span if span > 0 else 0
+            return Vector2(a.x + (b.x - a.x) * f, a.y + (b.y - a.y) * f)
+    return path[-1]
+
+
+def sweptCollidePath(path, otherpath, radius):
+    """sweptCollide for entities that turned during the step. Both paths
+    are cut at every point either of them turns, so each piece is a
+    straight move for both."""
+    if len(path) <= 2 and len(otherpath) <= 2:
+        return sweptCollide(path[0], path[-1], otherpath[0], otherpath[-1], radius)
+    times = getPathTimes(path)
+    othertimes = getPathTimes(otherpath)
+    start, otherstart = path[0], otherpath[0]
+    for t in sorted(set(times) | set(othertimes) | {1}):
+        if t == 0:
+            continue
+        end = getPathPoint(path, times, t)
+        otherend = getPathPoint(otherpath, othertimes, t)
+        if sweptCollide(start, end, otherstart, otherend, radius):
+            return True
+        start, otherstart = end, otherend
+    return False
+
+
+def sweptCollideEntities(entity, other, radius):
+    """Swept check of two entities over their last step, entity having
+    moved. Only builds paths when one of them turned"""
+    otherstart = other.lastPosition
+    if otherstart is None:
+        otherstart = other.position
+    elif other.waypoints:
+        return sweptCollidePath(getPath(entity), getPath(other), radius)
+    if entity.waypoints:
+        return sweptCollidePath(getPath(entity), [otherstart, other.position], radius)
+    return sweptCollide(
+        entity.lastPosition, entity.position, otherstart, other.position, radius
+    )
+
+
+class CollisionGrid(object):
+    """Broad phase for collisions. Entities are bucketed by the tile they
+    stand on, so a query only looks at the 3x3 block of tiles around a
+    position instead of every entity on the board."""
+
+    def __init__(self, cellwidth=TILEWIDTH, cellheight=TILEHEIGHT):
+        self.cellwidth = cellwidth
+        self.cellheight = cellheight
+        self.cells = {}
+        self.keys = {}
+
+    def getKey(self, position):
+        return int(position.x // self.cellwidth), int(position.y // self.cellheight)
+
+    def add(self, entity):
+        key = self.getKey(entity.position)
+        self.cells.setdefault(key, []).append(entity)
+        self.keys[id(entity)] = key
+
+    def remove(self, entity):
+        key = self.keys.pop(id(entity), None)
+        if key is not None:
+            self.cells[key].remove(entity)
+            if len(self.cells[key]) == 0:
+                del self.cells[key]
+
+    def update(self, entity):
+        """Move an entity to its new tile, only touching the buckets when the
+        tile actually changed"""
+        key = self.getKey(entity.position)
+        if self.keys.get(id(entity)) != key:
+            self.remove(entity)
+            self.add(entity)
+
+    def clear(self):
+        self.cells = {}
+        self.keys = {}
+
+    def nearby(self, position, reach=0):
+        """Entities in the tiles around position. reach widens the block by
+        enough tiles to cover that many pixels of travel"""
+        col, row = self.getKey(position)
+        span = 1 + math.ceil(reach / min(self.cellwidth, self.cellheight))
+        entities = []
+        for r in range(row - span, row + span + 1):
+            for c in range(col - span, col + span + 1):
+                if (c, r) in self.cells:
+                    entities += self.cells[(c, r)]
+        return entities
+
+    def getTravel(self, entity):
+        if entity.lastPosition is None:
+            return 0
+        if entity.waypoints:
+            return getPathLength(getPath(entity))
+        dx = entity.position.x - entity.lastPosition.x
+        dy = entity.position.y - entity.lastPosition.y
+        return abs(dx) + abs(dy)
+
+    def collides(self, entity, other, swept=False):
+        r = entity.collideRadius + other.collideRadius
+        if swept and entity.lastPosition is not None:
+            return sweptCollideEntities(entity, other, r)
+        dx = entity.position.x - other.position.x
+        dy = entity.position.y - other.position.y
+        return dx * dx + dy * dy <= r * r
+
+    def colliding(self, entity, reach=0, swept=False):
+        return [
+            other
+            for other in self.nearby(entity.position, reach)
+            if self.collides(entity, other, swept)
+        ]
+
+    def isNearby(self, position, other):
+        col, row = self.getKey(position)
+        othercol, otherrow = self.getKey(other)
+        return abs(col - othercol) <= 1 and abs(row - otherrow) <= 1
+
+    def __len__(self):
+        return len(self.keys)
@@ -2,6 +2,8 @@ import pygame
 from movement.vector import Vector2
 from constants import *
 import numpy as np
+from telemetry.trace import traced
+from maze.mazedata import readMazeFile
 
 
 class Node(object):
@@ -33,60 +35,57 @@ class Node(object):
 
 
 class NodeGroup(object):
+    @traced("NodeGroup.build", "load")
     def __init__(self, level):
         self.level = level
         self.nodesLUT = {}
         self.nodeSymbols = ["+", "P", "n"]
         self.pathSymbols = [".", "-", "|", "p"]
         data = self.readMazeFile(level)
+        self.nrows, self.ncols = data.shape
         self.createNodeTable(data)
         self.connectHorizontally(data)
         self.connectVertically(data)
         self.homekey = None
 
     def readMazeFile(self, textfile):
-        return np.loadtxt(textfile, dtype="<U1")
+        return readMazeFile(textfile)
 
     def createNodeTable(self, data, xoffset=0, yoffset=0):
-        for row in list(range(data.shape[0])):
-            for col in list(range(data.shape[1])):
-                if data[row][col] in self.nodeSymbols:
-                    x, y = self.constructKey(col + xoffset, row + yoffset)
-                    self.nodesLUT[(x, y)] = Node(x, y)
+        rows, cols = np.nonzero(np.isin(data, self.nodeSymbols))
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            x, y = self.constructKey(col + xoffset, row + yoffset)
+            self.nodesLUT[(x, y)] = Node(x, y)
 
     def constructKey(self, x, y):
         return x * TILEWIDTH, y * TILEHEIGHT
 
+    def findRunPairs(self, data):
+        """Return (row, col, nextcol) for every pair of nodes that follow each
+        other along a row with only path symbols between them"""
+        nodemask = np.isin(data, self.nodeSymbols)
+        blocked = ~(nodemask | np.isin(data, self.pathSymbols))
+        segments = np.cumsum(blocked, axis=1)
+        rows, cols = np.nonzero(nodemask)
+        segs = segments[rows, cols]
+        linked = (rows[:-1] == rows[1:]) & (segs[:-1] == segs[1:])
+        return rows[:-1][linked], cols[:-1][linked], cols[1:][linked]
+
     def connectHorizontally(self, data, xoffset=0, yoffset=0):
-        for row in list(range(data.shape[0])):
-            key = None
-            for col in list(range(data.shape[1])):
-                if data[row][col] in self.nodeSymbols:
-                    if key is None:
-                        key = self.constructKey(col + xoffset, row + yoffset)
-                    else:
-                        otherkey = self.constructKey(col + xoffset, row + yoffset)
-                        self.nodesLUT[key].neighbors[RIGHT] = self.nodesLUT[otherkey]
-                        self.nodesLUT[otherkey].neighbors[LEFT] = self.nodesLUT[key]
-                        key = otherkey
-                elif data[row][col] not in self.pathSymbols:
-                    key = None
+        rows, cols, nextcols = self.findRunPairs(data)
+        for row, col, nextcol in zip(rows.tolist(), cols.tolist(), nextcols.tolist()):
+            key = self.constructKey(col + xoffset, row + yoffset)
+            otherkey = self.constructKey(nextcol + xoffset, row + yoffset)
+            self.nodesLUT[key].neighbors[RIGHT] = self.nodesLUT[otherkey]
+            self.nodesLUT[otherkey].neighbors[LEFT] = self.nodesLUT[key]
 
     def connectVertically(self, data, xoffset=0, yoffset=0):
-        dataT = data.transpose()
-        for col in list(range(dataT.shape[0])):
-            key = None
-            for row in list(range(dataT.shape[1])):
-                if dataT[col][row] in self.nodeSymbols:
-                    if key is None:
-                        key = self.constructKey(col + xoffset, row + yoffset)
-                    else:
-                        otherkey = self.constructKey(col + xoffset, row + yoffset)
-                        self.nodesLUT[key].neighbors[DOWN] = self.nodesLUT[otherkey]
-                        self.nodesLUT[otherkey].neighbors[UP] = self.nodesLUT[key]
-                        key = otherkey
-                elif dataT[col][row] not in self.pathSymbols:
-                    key = None
+        cols, rows, nextrows = self.findRunPairs(data.transpose())
+        for col, row, nextrow in zip(cols.tolist(), rows.tolist(), nextrows.tolist()):
+            key = self.constructKey(col + xoffset, row + yoffset)
+            otherkey = self.constructKey(col + xoffset, nextrow + yoffset)
+            self.nodesLUT[key].neighbors[DOWN] = self.nodesLUT[otherkey]
+            self.nodesLUT[otherkey].neighbors[UP] = self.nodesLUT[key]
 
     def getNodeFromPixels(self, xpixel, ypixel):
         if (xpixel, ypixel) in self.nodesLUT.keys():
@@ -0,0 +1,227 @@
+import argparse
+import asyncio
+import time
+import pygame
+from pygame.locals import *
+from constants import *
+from movement.vector import Vector2
+from pacman.pacman import Pacman
+from ghosts.ghost import Blinky, Clyde, Inky, Pinky
+from food.fruit import Fruit
+from maze.preloader import LevelAssets
+from styles.animation import animationclock
+from styles.camera import Camera
+from styles.sprite.sprites import LifeSprites
+from styles.text import TextGroup
+from netplay.protocol import (
+    ANYROLE,
+    JOIN,
+    PACMANID,
+    POSITIONSCALE,
+    ROLES,
+    STATE,
+    VISIBLE,
+    ALIVE,
+    WELCOME,
+    WELCOMEDATA,
+    WorldState,
+    applyState,
+    packInput,
+    packMessage,
+    pelletCells,
+    readMessage,
+)
+
+GHOSTCLASSES = {BLINKY: Blinky, PINKY: Pinky, INKY: Inky, CLYDE: Clyde}
+
+
+class NetClient(object):
+    """Network side of a client: joins a session, sends input and keeps a
+    WorldState up to date with the server's broadcasts"""
+
+    def __init__(self):
+        self.state = WorldState()
+        self.reader = None
+        self.writer = None
+        self.sessionId = None
+        self.role = None
+        self.entityId = None
+        self.bytesReceived = 0
+
+    async def connect(self, host, port, role=ANYROLE):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.writer.write(packMessage(JOIN, bytes([role])))
+        message = await readMessage(self.reader)
+        if message is None or message[0] != WELCOME:
+            self.writer.close()
+            raise ConnectionError("the server has no free place")
+        self.sessionId, self.role, self.entityId = WELCOMEDATA.unpack(message[1])
+
+    def sendInput(self, direction):
+        self.writer.write(packInput(direction))
+
+    async def receive(self):
+        """Read one message, False once the server is gone"""
+        message = await readMessage(self.reader)
+        if message is None:
+            return False
+        kind, payload = message
+        self.bytesReceived += len(payload)
+        if kind == STATE:
+            applyState(self.state, payload)
+        return True
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+class ThinClient(object):
+    """Draws a WorldState with the game's sprite classes. The entities only
+    mirror the server, they never move on their own."""
+
+    def __init__(self, net):
+        self.net = net
+        pygame.init()
+        self.screen = pygame.display.set_mode(SCREENSIZE, 0, 32)
+        self.textgroup = TextGroup()
+        self.lifesprites = LifeSprites(0)
+        self.camera = Camera()
+        self.level = None
+        self.entities = {}
+        self.shown = {}
+        self.direction = STOP
+
+    def setLevel(self, level):
+        self.level = level
+        assets = LevelAssets(level, BLACK)
+        self.nodes = assets.nodes
+        self.mazedata = assets.mazedata
+        self.background = assets.background_norm
+        self.pellets = pelletCells(assets.pellets)
+        self.camera.setWorldSize(*assets.mazesprites.getSize())
+        self.entities = {}
+        self.textgroup.updateLevel(level)
+
+    def createEntity(self, kind):
+        node = self.nodes.getNodeFromTiles(*self.mazedata.obj.pacmanStart)
+        if kind == PACMAN:
+            return Pacman(node)
+        if kind == FRUIT:
+            return Fruit(node, self.level)
+        return GHOSTCLASSES[kind](node)
+
+    def sync(self, dt):
+        """Move the local entities to where the server has them"""
+        state = self.net.state
+        if state.level != self.level:
+            self.setLevel(state.level)
+        animationclock.tick(dt)
+        for entityId in [i for i in self.entities if i not in state.entities]:
+            del self.entities[entityId]
+        for entityId, (kind, x, y, direction, mode, flags) in state.entities.items():
+            entity = self.entities.get(entityId)
+            if entity is None or entity.name != kind:
+                entity = self.createEntity(kind)
+                self.entities[entityId] = entity
+            entity.position = Vector2(x / POSITIONSCALE, y / POSITIONSCALE)
+            entity.direction = direction
+            entity.visible = bool(flags & VISIBLE)
+            if kind == PACMAN:
+                alive = bool(flags & ALIVE)
+                if alive and not entity.alive:
+                    entity.sprites.reset()
+                entity.alive = alive
+            elif kind != FRUIT:
+                entity.mode.current = mode
+            if kind != FRUIT:
+                entity.sprites.update(dt)
+        self.updateHud(state)
+
+    def updateHud(self, state):
+        shown = {"score": state.score, "lives": state.lives, "paused": state.paused}
+        if shown == self.shown:
+            return
+        self.textgroup.updateScore(state.score)
+        if shown.get("lives") != self.shown.get("lives"):
+            self.lifesprites.resetLives(state.lives)
+        if state.paused:
+            self.textgroup.showText(READYTXT)
+        else:
+            self.textgroup.hideText()
+        self.shown = shown
+
+    def readInput(self):
+        for event in pygame.event.get():
+            if event.type == QUIT:
+                return False
+        pacman = self.entities.get(PACMANID)
+        if pacman is not None:
+            direction = pacman.getValidKey()
+            if direction != self.direction:
+                self.direction = direction
+                self.net.sendInput(direction)
+        return True
+
+    def render(self):
+        own = self.entities.get(self.net.entityId)
+        if own is not None:
+            self.camera.follow(own.position)
+        self.screen.blit(self.background, (0, 0), self.camera.getRect())
+        for cell in self.net.state.pellets:
+            pellet = self.pellets.get(cell)
+            if pellet is not None and self.camera.isVisible(pellet.position):
+                pellet.render(self.screen, self.camera)
+        for entity in self.entities.values():
+            entity.render(self.screen, self.camera)
+        self.textgroup.render(self.screen)
+        for i, image in enumerate(self.lifesprites.images):
+            x = image.get_width() * i
+            self.screen.blit(image, (x, SCREENHEIGHT - image.get_height()))
+        pygame.display.update()
+
+    async def run(self):
+        receiver = asyncio.create_task(self.receive())
+        last = time.perf_counter()
+        try:
+            while not receiver.done() and self.readInput():
+                now = time.perf_counter()
+                if self.net.state.entities:
+                    self.sync(now - last)
+                    self.render()
+                last = now
+                await asyncio.sleep(SIMSTEP)
+        finally:
+            receiver.cancel()
+            await self.net.close()
+
+    async def receive(self):
+        while await self.net.receive():
+            pass
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pac-Man versus client")
+    parser.add_argument("--host", default="127.0.0.1", help="Server address.")
+    parser.add_argument("--port", type=int, default=7777, help="Default is 7777.")
+    parser.add_argument(
+        "--role",
+        choices=sorted(ROLES),
+        default="any",
+        help="Play Pac-Man or a ghost. Default takes any free place.",
+    )
+    return parser.parse_args()
+
+
+async def play(args):
+    net = NetClient()
+    await net.connect(args.host, args.port, ROLES[args.role])
+    await ThinClient(net).run()
+
+
+if __name__ == "__main__":
+    asyncio.run(play(parse_args()))
@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import random
+from constants import *
+from netplay.client import NetClient
+from netplay.server import GameServer
+
+
+async def bot(host, port, role, done, rng):
+    """A client that turns at random about once a second and reads every
+    message without drawing anything, until done is set"""
+    net = NetClient()
+    await net.connect(host, port, role)
+
+    async def receive():
+        while await net.receive():
+            pass
+
+    receiver = asyncio.create_task(receive())
+    while not done.is_set() and not receiver.done():
+        net.sendInput(rng.choice((UP, DOWN, LEFT, RIGHT)))
+        try:
+            await asyncio.wait_for(done.wait(), rng.uniform(0.5, 1.5))
+        except asyncio.TimeoutError:
+            pass
+    receiver.cancel()
+    await net.close()
+    return net.bytesReceived
+
+
+async def loadtest(sessions, ghosts, seconds, port=0):
+    """Fill sessions games with a Pac-Man and ghosts bots each and return
+    the server's report over the run"""
+    server = GameServer(sessions, reportInterval=0)
+    await server.start("127.0.0.1", port)
+    rng = random.Random(1)
+    done = asyncio.Event()
+    tasks = []
+    for _ in range(sessions):
+        for role in [PACMAN] + [GHOST] * ghosts:
+            tasks.append(
+                asyncio.create_task(bot("127.0.0.1", server.port, role, done, rng))
+            )
+    # Time spent creating the games is not part of the measurement
+    while server.players < len(tasks):
+        await asyncio.sleep(0.1)
+    server.report()
+    await asyncio.sleep(seconds)
+    report = server.report()
+    done.set()
+    await asyncio.gather(*tasks)
+    await server.stop()
+    return report
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Versus server load test")
+    parser.add_argument("--sessions", type=int, default=64)
+    parser.add_argument(
+        "--ghosts", type=int, default=4, help="Ghost players per session."
+    )
+    parser.add_argument("--seconds", type=float, default=10)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(asyncio.run(loadtest(args.sessions, args.ghosts, args.seconds)))
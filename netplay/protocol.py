@@ -0,0 +1,253 @@
+import struct
+from constants import *
+from replay import INPUTCODES, decodeInput, encodeInput, readVarint, writeVarint
+
+# Every message is a u16 payload length, a u8 type and the payload
+FRAME = struct.Struct("<HB")
+JOIN = 1
+WELCOME = 2
+REJECT = 3
+INPUT = 4
+STATE = 5
+
+ANYROLE = 0xFF
+ROLES = {"pacman": PACMAN, "ghost": GHOST, "any": ANYROLE}
+PACMANID = 0
+FRUITID = 0xFF
+WELCOMEDATA = struct.Struct("<HBB")
+
+# Positions are sent in 1/POSITIONSCALE pixels, as a change from the last
+# value the client has
+POSITIONSCALE = 8
+RESET = 0x01
+SCORE, LIVES, LEVEL, PAUSED = 0x01, 0x02, 0x04, 0x08
+# Entity fields: (kind, x, y, direction, mode, flags)
+ENTITYFIELDS = 6
+VISIBLE, ALIVE = 0x01, 0x02
+
+
+def packMessage(kind, payload=b""):
+    return FRAME.pack(len(payload), kind) + payload
+
+
+async def readMessage(reader):
+    """(type, payload) of the next message, None once the peer is gone"""
+    try:
+        size, kind = FRAME.unpack(await reader.readexactly(FRAME.size))
+        return kind, await reader.readexactly(size)
+    except (EOFError, ConnectionError):
+        return None
+
+
+def packInput(direction):
+    return packMessage(INPUT, bytes([encodeInput(direction)]))
+
+
+def unpackInput(payload):
+    """Direction of an INPUT payload, None if it is not a valid one"""
+    if len(payload) != 1 or payload[0] >= len(INPUTCODES):
+        return None
+    return decodeInput(payload[0])[0]
+
+
+def zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def writeCells(out, cells):
+    """Sorted pellet cells as the gaps between them"""
+    writeVarint(out, len(cells))
+    last = 0
+    for cell in sorted(cells):
+        writeVarint(out, cell - last)
+        last = cell
+
+
+def readCells(data, offset):
+    count, offset = readVarint(data, offset)
+    cells = []
+    last = 0
+    for _ in range(count):
+        gap, offset = readVarint(data, offset)
+        last += gap
+        cells.append(last)
+    return cells, offset
+
+
+class WorldState(object):
+    """What a client sees of a game: score, lives, level, the entities by
+    id and the cells that still hold a pellet, see pelletCells"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.tick = 0
+        self.score = 0
+        self.lives = 0
+        self.level = 0
+        self.paused = False
+        self.entities = {}
+        self.pellets = frozenset()
+        # PelletGroup the pellets were read from, on the server
+        self.pelletSource = None
+
+    def position(self, entityId):
+        entity = self.entities[entityId]
+        return entity[1] / POSITIONSCALE, entity[2] / POSITIONSCALE
+
+
+def pelletCells(pellets):
+    """Cell id of every pellet of a PelletGroup, counted row by row over
+    the columns of its maze"""
+    return {
+        int(pellet.position.y // TILEHEIGHT) * pellets.ncols
+        + int(pellet.position.x // TILEWIDTH): pellet
+        for pellet in pellets.pelletList
+    }
+
+
+def entityState(entity, kind, mode=0):
+    flags = VISIBLE if entity.visible else 0
+    if getattr(entity, "alive", True):
+        flags |= ALIVE
+    return (
+        kind,
+        int(round(entity.position.x * POSITIONSCALE)),
+        int(round(entity.position.y * POSITIONSCALE)),
+        entity.direction,
+        mode,
+        flags,
+    )
+
+
+def captureState(game, tick, previous=None):
+    """WorldState of a GameController. The pellet set of previous is
+    reused while no pellet was eaten"""
+    state = WorldState()
+    state.tick = tick
+    state.score = game.score
+    state.lives = game.lives
+    state.level = game.level
+    state.paused = game.pause.paused
+    state.entities[PACMANID] = entityState(game.pacman, PACMAN)
+    for i, ghost in enumerate(game.ghosts):
+        state.entities[i + 1] = entityState(ghost, ghost.name, ghost.mode.current)
+    if game.fruit is not None:
+        state.entities[FRUITID] = entityState(game.fruit, FRUIT)
+    pellets = game.pellets
+    if (
+        previous is not None
+        and previous.pelletSource is pellets
+        and len(previous.pellets) == len(pellets.pelletList)
+    ):
+        state.pellets = previous.pellets
+    else:
+        state.pellets = frozenset(pelletCells(pellets))
+    state.pelletSource = pellets
+    return state
+
+
+def encodeState(previous, state):
+    """STATE payload bringing a client from previous to state, everything
+    when previous is None"""
+    out = bytearray()
+    if previous is None:
+        previous = WorldState()
+        out.append(RESET)
+    else:
+        out.append(0)
+    writeVarint(out, state.tick)
+    mask = 0
+    values = []
+    for bit, name in ((SCORE, "score"), (LIVES, "lives"), (LEVEL, "level")):
+        value = getattr(state, name)
+        if value != getattr(previous, name):
+            mask |= bit
+            values.append(value)
+    if state.paused:
+        mask |= PAUSED
+    out.append(mask)
+    for value in values:
+        writeVarint(out, value)
+
+    removed = [i for i in previous.entities if i not in state.entities]
+    writeVarint(out, len(removed))
+    out += bytes(removed)
+    changed = []
+    for entityId, entity in state.entities.items():
+        old = previous.entities.get(entityId)
+        if old != entity:
+            changed.append((entityId, old, entity))
+    writeVarint(out, len(changed))
+    for entityId, old, entity in changed:
+        if old is None:
+            old = (None, 0, 0, None, None, None)
+        fields = bytearray()
+        mask = 0
+        for i in range(ENTITYFIELDS):
+            if entity[i] == old[i]:
+                continue
+            mask |= 1 << i
+            if i in (1, 2):
+                writeVarint(fields, zigzag(entity[i] - old[i]))
+            elif i == 3:
+                fields.append(entity[i] + 2)
+            else:
+                fields.append(entity[i])
+        out.append(entityId)
+        out.append(mask)
+        out += fields
+
+    if state.pellets is previous.pellets:
+        writeVarint(out, 0)
+        writeVarint(out, 0)
+    else:
+        writeCells(out, previous.pellets - state.pellets)
+        writeCells(out, state.pellets - previous.pellets)
+    return bytes(out)
+
+
+def applyState(state, data):
+    """Update a client's WorldState with a STATE payload"""
+    if data[0] & RESET:
+        state.clear()
+    state.tick, offset = readVarint(data, 1)
+    mask = data[offset]
+    offset += 1
+    for bit, name in ((SCORE, "score"), (LIVES, "lives"), (LEVEL, "level")):
+        if mask & bit:
+            value, offset = readVarint(data, offset)
+            setattr(state, name, value)
+    state.paused = bool(mask & PAUSED)
+
+    count, offset = readVarint(data, offset)
+    for entityId in data[offset : offset + count]:
+        del state.entities[entityId]
+    offset += count
+    count, offset = readVarint(data, offset)
+    for _ in range(count):
+        entityId = data[offset]
+        fieldmask = data[offset + 1]
+        offset += 2
+        entity = list(state.entities.get(entityId, (0, 0, 0, STOP, 0, 0)))
+        for i in range(ENTITYFIELDS):
+            if not fieldmask & (1 << i):
+                continue
+            if i in (1, 2):
+                value, offset = readVarint(data, offset)
+                entity[i] += unzigzag(value)
+            else:
+                entity[i] = data[offset] - 2 if i == 3 else data[offset]
+                offset += 1
+        state.entities[entityId] = tuple(entity)
+
+    removed, offset = readCells(data, offset)
+    added, offset = readCells(data, offset)
+    if removed or added:
+        state.pellets = state.pellets.difference(removed).union(added)
+    return state
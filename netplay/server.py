@@ -0,0 +1,310 @@
+import os
+
+# The sessions run without a window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import asyncio
+import time
+from constants import *
+from main import GameController
+from ghosts.ghost import loadGhostConfig
+from telemetry.histogram import LogHistogram
+from netplay.protocol import (
+    ANYROLE,
+    FRAME,
+    INPUT,
+    JOIN,
+    PACMANID,
+    REJECT,
+    STATE,
+    WELCOME,
+    WELCOMEDATA,
+    captureState,
+    encodeState,
+    packMessage,
+    readMessage,
+    unpackInput,
+)
+
+STARTTIME = 2
+# A client that falls this far behind is dropped, the deltas it has not
+# read yet cannot be skipped
+MAXBUFFER = 256 * 1024
+
+
+class Player(object):
+    def __init__(self, writer, role, entityId):
+        self.writer = writer
+        self.role = role
+        self.entityId = entityId
+        self.input = STOP
+
+
+class Session(object):
+    """One versus game: a headless GameController stepped by the server.
+    Pac-Man and every ghost can be taken by a remote player, ghosts nobody
+    plays keep their personality."""
+
+    def __init__(self, sessionId, ghostconfig=None):
+        self.sessionId = sessionId
+        self.game = GameController(BLACK, ghostconfig)
+        self.game.startGame()
+        self.players = {}
+        self.ticks = 0
+        self.waiting = 0
+        self.state = captureState(self.game, 0)
+        self.bytesSent = 0
+
+    def freeEntity(self, role):
+        """Entity id a new player of role would control, None if taken"""
+        if role in (PACMAN, ANYROLE) and PACMANID not in self.players:
+            return PACMANID
+        if role in (GHOST, ANYROLE):
+            for i in range(len(self.game.ghosts.ghosts)):
+                if i + 1 not in self.players:
+                    return i + 1
+        return None
+
+    def join(self, writer, role):
+        entityId = self.freeEntity(role)
+        player = Player(writer, PACMAN if entityId == PACMANID else GHOST, entityId)
+        self.players[entityId] = player
+        welcome = WELCOMEDATA.pack(self.sessionId, player.role, entityId)
+        self.send(player, packMessage(WELCOME, welcome))
+        self.send(player, packMessage(STATE, encodeState(None, self.state)))
+        return player
+
+    def leave(self, player):
+        if self.players.get(player.entityId) is player:
+            del self.players[player.entityId]
+
+    def applyInputs(self):
+        game = self.game
+        pacman = self.players.get(PACMANID)
+        game.pacman.input = pacman.input if pacman is not None else STOP
+        for i, ghost in enumerate(game.ghosts):
+            player = self.players.get(i + 1)
+            ghost.input = player.input if player is not None else None
+
+    def startWhenReady(self):
+        """Players cannot press space, a game waiting for it starts again
+        after STARTTIME seconds"""
+        game = self.game
+        if game.pause.paused and game.pause.timer is None and game.pacman.alive:
+            self.waiting += 1
+            if self.waiting >= STARTTIME * FPS:
+                self.waiting = 0
+                game.togglePause()
+        else:
+            self.waiting = 0
+
+    def step(self):
+        """Advance the game one tick and send the change to every player"""
+        if self.players:
+            self.startWhenReady()
+        self.applyInputs()
+        self.game.step(SIMSTEP)
+        self.ticks += 1
+        state = captureState(self.game, self.ticks, self.state)
+        message = packMessage(STATE, encodeState(self.state, state))
+        self.state = state
+        for player in list(self.players.values()):
+            self.send(player, message)
+
+    def send(self, player, message):
+        writer = player.writer
+        if writer.is_closing():
+            return
+        if writer.transport.get_write_buffer_size() > MAXBUFFER:
+            writer.close()
+            self.leave(player)
+            return
+        writer.write(message)
+        self.bytesSent += len(message)
+
+
+class ServerMetrics(object):
+    """Tick time and traffic of the server, reset at every report"""
+
+    def __init__(self):
+        self.tickTimes = LogHistogram()
+        self.reset(time.perf_counter())
+
+    def reset(self, now):
+        self.tickTimes.reset()
+        self.bytesSent = 0
+        self.bytesReceived = 0
+        self.start = now
+
+    def formatReport(self, sessions, players, now):
+        elapsed = max(now - self.start, 1e-9)
+        stats = self.tickTimes.getStats()
+        sent = self.bytesSent / elapsed / 1024
+        perSession = sent / sessions if sessions else 0
+        return (
+            f"{sessions} sessions, {players} players, "
+            f"{stats['count'] / elapsed:.1f} ticks/s, "
+            f"tick p50 {stats['p50'] / 1000:.2f} ms p99 {stats['p99'] / 1000:.2f} ms "
+            f"max {stats['max'] / 1000:.2f} ms (budget {SIMSTEP * 1000:.1f} ms), "
+            f"out {sent:.1f} KB/s ({perSession:.2f} KB/s per session), "
+            f"in {self.bytesReceived / elapsed / 1024:.2f} KB/s"
+        )
+
+
+class GameServer(object):
+    """Authoritative server for up to maxSessions games in one process.
+    Clients send inputs, the server steps every session at FPS and
+    broadcasts what changed since the last tick."""
+
+    def __init__(self, maxSessions=64, ghostconfig=None, reportInterval=10):
+        self.maxSessions = maxSessions
+        self.ghostconfig = ghostconfig
+        self.reportInterval = reportInterval
+        self.sessions = {}
+        self.metrics = ServerMetrics()
+        self.server = None
+        self.ticker = None
+        self.port = None
+
+    async def start(self, host="127.0.0.1", port=0, tick=True):
+        """Listen for clients, and with tick run the sessions at FPS"""
+        self.server = await asyncio.start_server(self.handle, host, port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        if tick:
+            self.ticker = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.ticker is not None:
+            self.ticker.cancel()
+            self.ticker = None
+        for session in self.sessions.values():
+            for player in list(session.players.values()):
+                player.writer.close()
+        self.server.close()
+        await self.server.wait_closed()
+
+    @property
+    def players(self):
+        return sum(len(session.players) for session in self.sessions.values())
+
+    def findSession(self, role):
+        for session in self.sessions.values():
+            if session.freeEntity(role) is not None:
+                return session
+        if len(self.sessions) >= self.maxSessions:
+            return None
+        sessionId = 0
+        while sessionId in self.sessions:
+            sessionId += 1
+        session = Session(sessionId, self.ghostconfig)
+        self.sessions[sessionId] = session
+        return session
+
+    async def handle(self, reader, writer):
+        message = await readMessage(reader)
+        if message is None or message[0] != JOIN:
+            writer.close()
+            return
+        self.metrics.bytesReceived += len(message[1]) + FRAME.size
+        role = message[1][0] if message[1] else ANYROLE
+        if role not in (PACMAN, GHOST, ANYROLE):
+            writer.write(packMessage(REJECT))
+            writer.close()
+            return
+        session = None
+        player = None
+        try:
+            session = self.findSession(role)
+            if session is None:
+                writer.write(packMessage(REJECT))
+                return
+            player = session.join(writer, role)
+            while True:
+                message = await readMessage(reader)
+                if message is None:
+                    break
+                self.metrics.bytesReceived += len(message[1]) + FRAME.size
+                if message[0] == INPUT:
+                    direction = unpackInput(message[1])
+                    # A malformed input is dropped, the last one holds
+                    if direction is not None:
+                        player.input = direction
+        finally:
+            if session is not None:
+                if player is not None:
+                    session.leave(player)
+                if not session.players:
+                    self.sessions.pop(session.sessionId, None)
+            writer.close()
+
+    def tick(self):
+        start = time.perf_counter()
+        for session in list(self.sessions.values()):
+            sent = session.bytesSent
+            session.step()
+            self.metrics.bytesSent += session.bytesSent - sent
+        self.metrics.tickTimes.record((time.perf_counter() - start) * 1e6)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        due = loop.time()
+        reported = time.perf_counter()
+        while True:
+            self.tick()
+            now = time.perf_counter()
+            if self.reportInterval and now - reported >= self.reportInterval:
+                print(self.report(now))
+                reported = now
+            due += SIMSTEP
+            # Fall behind by more than a few ticks and the schedule restarts
+            # instead of running a burst of catch-up ticks
+            if loop.time() - due > MAXSTEPS * SIMSTEP:
+                due = loop.time()
+            await asyncio.sleep(max(0, due - loop.time()))
+
+    def report(self, now=None):
+        if now is None:
+            now = time.perf_counter()
+        line = self.metrics.formatReport(len(self.sessions), self.players, now)
+        self.metrics.reset(now)
+        return line
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pac-Man versus server")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=7777, help="Default is 7777.")
+    parser.add_argument(
+        "--sessions",
+        type=int,
+        default=64,
+        help="Most games run at once. Default is 64.",
+    )
+    parser.add_argument(
+        "--ghosts",
+        metavar="CONFIG",
+        default=None,
+        help="JSON file listing ghost personalities. Default is the classic four.",
+    )
+    parser.add_argument(
+        "--report-interval",
+        type=float,
+        default=10,
+        help="Seconds between tick time and bandwidth reports. Default is 10.",
+    )
+    return parser.parse_args()
+
+
+async def serve(args):
+    ghostconfig = None
+    if args.ghosts is not None:
+        ghostconfig = loadGhostConfig(args.ghosts)
+    server = GameServer(args.sessions, ghostconfig, args.report_interval)
+    await server.start(args.host, args.port)
+    print(f"listening on {args.host}:{server.port}")
+    await server.ticker
+
+
+if __name__ == "__main__":
+    asyncio.run(serve(parse_args()))
@@ -3,11 +3,12 @@ from pygame.locals import *
 from movement.vector import Vector2
 from constants import *
 from ghosts.entity import Entity
+from movement.collision import sweptCollideEntities
 from styles.sprite.sprites import PacmanSprites
 
 
 class Pacman(Entity):
-    def __init__(self, node):
+    def __init__(self, node, clock=None):
         Entity.__init__(self, node)
         self.name = PACMAN
         self.directions = {
@@ -28,7 +29,10 @@ class Pacman(Entity):
         self.target = node
         self.collideRadius = 5
         self.alive = True
-        self.sprites = PacmanSprites(self)
+        # Direction held this step when a replay drives Pac-Man, None reads
+        # the keyboard
+        self.input = None
+        self.sprites = PacmanSprites(self, clock)
         self.reset()  # add to all previous
 
     def setPosition(self):
@@ -48,12 +52,18 @@ class Pacman(Entity):
 
     def update(self, dt):
         self.sprites.update(dt)
-        self.position += self.directions[self.direction] * self.speed * dt
-        direction = self.getValidKey()
-        if self.overshotTarget():
+        self.savePosition(self.position)
+        self.move(self.speed * dt)
+        direction = self.getValidKey() if self.input is None else self.input
+        if not self.overshotTarget():
+            if self.oppositeDirection(direction):
+                self.reverseDirection()
+        while self.overshotTarget():
+            overshoot = self.overshootDistance()
             self.node = self.target
             if self.node.neighbors[PORTAL] is not None:
                 self.node = self.node.neighbors[PORTAL]
+                self.savePosition(self.node.position)
             self.target = self.getNewTarget(direction)
             if self.target is not self.node:
                 self.direction = direction
@@ -62,9 +72,10 @@ class Pacman(Entity):
             if self.target is self.node:
                 self.direction = STOP
             self.setPosition()
-        else:
-            if self.oppositeDirection(direction):
-                self.reverseDirection()
+            self.waypoints.append(self.node.position)
+            if self.target is self.node or overshoot <= 0:
+                break
+            self.move(overshoot)
 
     def validDirection(self, direction):
         if direction is not STOP:
@@ -89,15 +100,6 @@ class Pacman(Entity):
             return RIGHT
         return STOP
 
-    def overshotTarget(self):
-        if self.target is not None:
-            vec1 = self.target.position - self.node.position
-            vec2 = self.position - self.node.position
-            node2Target = vec1.magnitudeSquared()
-            node2Self = vec2.magnitudeSquared()
-            return node2Self >= node2Target
-        return False
-
     def reverseDirection(self):
         self.direction *= -1
         temp = self.node
@@ -120,6 +122,11 @@ class Pacman(Entity):
         return self.collideCheck(ghost)
 
     def collideCheck(self, other):
+        if self.lastPosition is not None:
+            # Check the whole step so fast moves cannot tunnel through
+            return sweptCollideEntities(
+                self, other, self.collideRadius + other.collideRadius
+            )
         d = self.position - other.position
         dSquared = d.magnitudeSquared()
         rSquared = (self.collideRadius + other.collideRadius) ** 2
@@ -1,25 +1,35 @@
+from scheduler import Scheduler
+
+
 class Pause(object):
-    def __init__(self, paused=False):
+    def __init__(self, paused=False, scheduler=None):
         self.paused = paused
-        self.timer = 0
-        self.pauseTime = None
+        self.scheduler = scheduler if scheduler is not None else Scheduler()
+        self.timer = None
         self.func = None
+        self.collector = None
 
     def update(self, dt):
-        if self.pauseTime is not None:
-            self.timer += dt
-            if self.timer >= self.pauseTime:
-                self.timer = 0
-                self.paused = False
-                self.pauseTime = None
-                return self.func
-        return None
+        if self.paused and self.collector is not None:
+            self.collector.collectPaused()
 
     def setPause(self, playerPaused=False, pauseTime=None, func=None):
-        self.timer = 0
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
         self.func = func
-        self.pauseTime = pauseTime
+        if pauseTime is not None:
+            # Counts down while paused, so it has to run on real time
+            self.timer = self.scheduler.after(pauseTime, self.resume, realtime=True)
         self.flip()
 
+    def resume(self):
+        self.timer = None
+        self.paused = False
+        func = self.func
+        self.func = None
+        if func is not None:
+            func()
+
     def flip(self):
         self.paused = not self.paused
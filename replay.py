@@ -0,0 +1,812 @@
+import bisect
+import hashlib
+import random
+import struct
+import zlib
+from constants import *
+from movement.vector import Vector2
+
+MAGIC = b"PMRP"
+FORMATVERSION = 3
+# Version of the game rules a replay was recorded with, a replay only plays
+# back the same way on the engine that recorded it
+ENGINEVERSION = "0.1.0"
+KEYFRAMEINTERVAL = 30 * FPS
+CHUNKKEYFRAMES = 4
+
+# Input byte of a tick: direction code in bits 0-2, bit 3 set on the tick
+# the pause key was pressed
+INPUTCODES = (STOP, UP, DOWN, LEFT, RIGHT)
+PAUSEBIT = 0x08
+
+CHUNKTAG = b"C"
+INDEXTAG = b"X"
+HEADER = struct.Struct("<4sBIHHH")
+CHUNKHEADER = struct.Struct("<III")
+INDEXENTRY = struct.Struct("<IIQ")
+TRAILER = struct.Struct("<Q4s")
+# tick, level, lives, score, paused, input, maze columns and rows, pellets
+# eaten, real and game time, pause callback, mode phase, main mode, status
+# text, flags and ghost count
+KEYFRAME = struct.Struct("<IHBIBBHHHddBBBBBH")
+# Due times of the pause, fruit, background flash, power pellet flash, mode
+# change and freight end timers, NOTIMER when one is not running
+TIMERS = struct.Struct("<6d")
+NOTIMER = -1.0
+# x, y, direction, speed, alive and visible, then the node Pac-Man left and
+# the one it heads for
+PACMANSTATE = struct.Struct("<ddbdBBffff")
+# x, y, direction, speed, mode, visible, points, node and target
+GHOSTSTATE = struct.Struct("<ddbdBBHffff")
+NODEACCESS = struct.Struct("<bB")
+
+# What a pause calls when it runs out, by code
+PAUSEFUNCS = (None, "showEntities", "resetLevel", "restartGame", "nextLevel")
+STATUSTEXTS = (READYTXT, PAUSETXT, GAMEOVERTXT)
+# Names a node direction can let through, a bit each
+ACCESSNAMES = (PACMAN, BLINKY, PINKY, INKY, CLYDE, FRUIT)
+FLASHING = 0x01
+FLASHED = 0x02
+POWERSHOWN = 0x04
+
+
+def pelletBytes(ncols, nrows):
+    """Size of the bitmap holding one bit per cell of a maze"""
+    return (nrows * ncols + 7) // 8
+
+
+def encodeInput(direction, pause=False):
+    return INPUTCODES.index(direction) | (PAUSEBIT if pause else 0)
+
+
+def decodeInput(code):
+    return INPUTCODES[code & 0x07], bool(code & PAUSEBIT)
+
+
+def writeVarint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def readVarint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def writeString(out, text):
+    data = text.encode("utf-8")
+    out.append(len(data))
+    out += data
+
+
+def readString(f):
+    return f.read(f.read(1)[0]).decode("utf-8")
+
+
+def keyframeSeed(seed, tick):
+    """The random generator is seeded again at every keyframe, so playback
+    can start from a keyframe without its state in the file"""
+    return (seed << 32) | tick
+
+
+def mazeDigests(mazedata):
+    """Name and file hash of every maze a replay may visit"""
+    mazes = []
+    for mazeclass in mazedata.mazedict.values():
+        maze = mazeclass()
+        with open(maze.getFile(), "rb") as f:
+            mazes.append((maze.name, hashlib.sha1(f.read()).digest()[:8]))
+    return mazes
+
+
+class ReplayHeader(object):
+    """What a replay was recorded with: seed, engine version, mazes and
+    ghost personalities"""
+
+    def __init__(
+        self,
+        seed,
+        mazes,
+        ghosts,
+        engine=ENGINEVERSION,
+        keyframeInterval=KEYFRAMEINTERVAL,
+        chunkKeyframes=CHUNKKEYFRAMES,
+        fps=FPS,
+    ):
+        self.seed = seed
+        self.mazes = list(mazes)
+        self.ghosts = list(ghosts)
+        self.engine = engine
+        self.keyframeInterval = keyframeInterval
+        self.chunkKeyframes = chunkKeyframes
+        self.fps = fps
+
+    def pack(self):
+        out = bytearray(
+            HEADER.pack(
+                MAGIC,
+                FORMATVERSION,
+                self.seed,
+                self.fps,
+                self.keyframeInterval,
+                self.chunkKeyframes,
+            )
+        )
+        writeString(out, self.engine)
+        out.append(len(self.mazes))
+        for name, digest in self.mazes:
+            writeString(out, name)
+            out += digest
+        out += struct.pack("<H", len(self.ghosts))
+        out += bytes(self.ghosts)
+        return bytes(out)
+
+    @classmethod
+    def read(cls, f):
+        magic, version, seed, fps, interval, chunkKeyframes = HEADER.unpack(
+            f.read(HEADER.size)
+        )
+        if magic != MAGIC:
+            raise ValueError("not a replay file")
+        if version != FORMATVERSION:
+            raise ValueError(f"unsupported replay format version {version}")
+        engine = readString(f)
+        mazes = []
+        for _ in range(f.read(1)[0]):
+            name = readString(f)
+            mazes.append((name, f.read(8)))
+        (count,) = struct.unpack("<H", f.read(2))
+        ghosts = list(f.read(count))
+        return cls(seed, mazes, ghosts, engine, interval, chunkKeyframes, fps)
+
+    def mismatches(self, mazes, engine=ENGINEVERSION):
+        """Reasons this replay may not play back on the running game"""
+        problems = []
+        if self.engine != engine:
+            problems.append(f"recorded with engine {self.engine}, running {engine}")
+        if self.mazes != list(mazes):
+            problems.append("maze files differ from the recording")
+        if self.fps != FPS:
+            problems.append(f"recorded at {self.fps} ticks/s, running {FPS}")
+        return problems
+
+
+def timerDue(timer):
+    if timer is None or not timer.active:
+        return NOTIMER
+    return timer.due
+
+
+def savedDue(due):
+    return None if due == NOTIMER else due
+
+
+def entityState(entity, *extra):
+    """Position, direction and speed of an entity, the extra fields, then
+    the node it left and the one it heads for"""
+    node = entity.node.position
+    target = entity.target.position
+    return (
+        (entity.position.x, entity.position.y, entity.direction, entity.speed)
+        + extra
+        + (node.x, node.y, target.x, target.y)
+    )
+
+
+def placeEntity(entity, nodes, state):
+    """Put an entity back where entityState found it, returns the extra
+    fields"""
+    x, y, direction, speed = state[:4]
+    entity.node = nodes.getNodeFromPixels(*state[-4:-2])
+    entity.target = nodes.getNodeFromPixels(*state[-2:])
+    if entity.node is None or entity.target is None:
+        raise ValueError("keyframe does not fit the maze of its level")
+    entity.position = Vector2(x, y)
+    entity.direction = direction
+    entity.speed = speed
+    entity.lastPosition = None
+    entity.waypoints.clear()
+    return state[4:-4]
+
+
+def nodeAccess(nodes):
+    """(node, direction, names) of every node direction that does not let
+    every name through, nodes by their place in the node table and names
+    as a bitmask of ACCESSNAMES"""
+    access = []
+    for index, node in enumerate(nodes.nodesLUT.values()):
+        for direction in (UP, DOWN, LEFT, RIGHT):
+            names = node.access[direction]
+            if len(names) == len(ACCESSNAMES):
+                continue
+            mask = 0
+            for bit, name in enumerate(ACCESSNAMES):
+                if name in names:
+                    mask |= 1 << bit
+            access.append((index, direction, mask))
+    return access
+
+
+def setNodeAccess(nodes, access):
+    nodelist = list(nodes.nodesLUT.values())
+    for node in nodelist:
+        for direction in (UP, DOWN, LEFT, RIGHT):
+            node.access[direction] = list(ACCESSNAMES)
+    for index, direction, mask in access:
+        nodelist[index].access[direction] = [
+            name for bit, name in enumerate(ACCESSNAMES) if mask & (1 << bit)
+        ]
+
+
+class Keyframe(object):
+    """Snapshot of the game state at a tick, enough to compare playback
+    with the recording and to carry on playing from it: level, score,
+    lives, the clocks and the due times of the game's timers, Pac-Man and
+    the ghosts, node access changed during play and which pellets are left,
+    as a bitmap of the cells of a ncols by nrows maze. Popups, captured
+    fruit and animation frames are only drawn and are not kept."""
+
+    def __init__(
+        self,
+        tick,
+        level,
+        lives,
+        score,
+        paused,
+        input,
+        pacman,
+        ghosts,
+        pellets,
+        ncols=NCOLS,
+        nrows=NROWS,
+        numEaten=0,
+        clock=(0.0, 0.0),
+        timers=(NOTIMER,) * 6,
+        pauseFunc=0,
+        phase=0,
+        mode=SCATTER,
+        text=0,
+        flags=0,
+        access=(),
+    ):
+        self.tick = tick
+        self.level = level
+        self.lives = lives
+        self.score = score
+        self.paused = paused
+        self.input = input
+        self.pacman = pacman
+        self.ghosts = ghosts
+        self.pellets = pellets
+        self.ncols = ncols
+        self.nrows = nrows
+        self.numEaten = numEaten
+        self.clock = clock
+        self.timers = timers
+        self.pauseFunc = pauseFunc
+        self.phase = phase
+        self.mode = mode
+        self.text = text
+        self.flags = flags
+        self.access = access
+
+    @classmethod
+    def capture(cls, game, tick, input):
+        pacman = game.pacman
+        ghosts = [
+            entityState(ghost, ghost.mode.current, ghost.visible, ghost.points)
+            for ghost in game.ghosts
+        ]
+        ncols, nrows = game.pellets.ncols, game.pellets.nrows
+        pellets = bytearray(pelletBytes(ncols, nrows))
+        for pellet in game.pellets.pelletList:
+            cell = int(pellet.position.y // TILEHEIGHT) * ncols + int(
+                pellet.position.x // TILEWIDTH
+            )
+            pellets[cell >> 3] |= 1 << (cell & 7)
+        pause = game.pause
+        timeline = game.ghosts.timeline
+        powerpellets = game.pellets.powerpellets
+        # The power pellets' timer has nothing left to flash once they are
+        # all eaten
+        timers = (
+            pause.timer,
+            game.fruitTimer,
+            game.flashTimer,
+            game.pelletTimer if powerpellets else None,
+            timeline.changeTimer,
+            timeline.freightTimer,
+        )
+        func = None if pause.func is None else pause.func.__name__
+        texts = game.textgroup.alltext
+        shown = [id for id in STATUSTEXTS if texts[id].visible]
+        flags = 0
+        if game.flashBG:
+            flags |= FLASHING
+        if game.background is game.background_flash:
+            flags |= FLASHED
+        if powerpellets and powerpellets[0].visible:
+            flags |= POWERSHOWN
+        return cls(
+            tick,
+            game.level,
+            game.lives,
+            game.score,
+            pause.paused,
+            input,
+            entityState(pacman, pacman.alive, pacman.visible),
+            ghosts,
+            bytes(pellets),
+            ncols,
+            nrows,
+            game.pellets.numEaten,
+            (game.scheduler.time, game.scheduler.gameTime),
+            tuple(timerDue(timer) for timer in timers),
+            PAUSEFUNCS.index(func),
+            timeline.phase,
+            timeline.mode,
+            shown[0] if shown else 0,
+            flags,
+            nodeAccess(game.nodes),
+        )
+
+    def restore(self, game):
+        """Start the keyframe's level over and put the game in the state
+        the keyframe holds, the tick taken next is the keyframe's"""
+        pauseDue, fruitDue, flashDue, pelletDue, changeDue, freightDue = map(
+            savedDue, self.timers
+        )
+        scheduler = game.scheduler
+        scheduler.clear()
+        scheduler.time, scheduler.gameTime = self.clock
+        game.level = self.level
+        game.lives = self.lives
+        game.score = self.score
+        game.startGame()
+        game.ticks = self.tick
+        nodes = game.nodes
+        setNodeAccess(nodes, self.access)
+
+        pellets = game.pellets
+        if (pellets.ncols, pellets.nrows) != (self.ncols, self.nrows):
+            raise ValueError("keyframe does not fit the maze of its level")
+        pellets.numEaten = self.numEaten
+        pellets.removePellets(
+            [
+                pellet
+                for pellet in pellets.pelletList
+                if not self.pellet(
+                    int(pellet.position.y // TILEHEIGHT),
+                    int(pellet.position.x // TILEWIDTH),
+                )
+            ]
+        )
+        for pellet in pellets.powerpellets:
+            pellet.visible = bool(self.flags & POWERSHOWN)
+        if game.pelletTimer is not None:
+            game.pelletTimer.cancel()
+            game.pelletTimer = None
+        if pelletDue is not None:
+            game.pelletTimer = pellets.startFlashing(scheduler, pelletDue)
+
+        pacman = game.pacman
+        alive, visible = placeEntity(pacman, nodes, self.pacman)
+        pacman.alive = bool(alive)
+        pacman.visible = bool(visible)
+        ghosts = list(game.ghosts)
+        if len(ghosts) != len(self.ghosts):
+            raise ValueError("keyframe has a different number of ghosts")
+        for ghost, state in zip(ghosts, self.ghosts):
+            mode, visible, points = placeEntity(ghost, nodes, state)
+            ghost.mode.mainmode = self.mode
+            ghost.mode.current = mode
+            ghost.visible = bool(visible)
+            ghost.points = points
+            if mode == FREIGHT:
+                ghost.directionMethod = ghost.randomDirection
+            elif mode == SPAWN:
+                ghost.spawn()
+            ghost.updateGrid()
+        game.ghosts.timeline.restore(self.phase, self.mode, changeDue, freightDue)
+        if fruitDue is not None:
+            game.addFruit(fruitDue)
+
+        pause = game.pause
+        pause.paused = self.paused
+        pause.func = None
+        pause.timer = None
+        if self.pauseFunc:
+            pause.func = getattr(game, PAUSEFUNCS[self.pauseFunc])
+        if pauseDue is not None:
+            pause.timer = scheduler.at(pauseDue, pause.resume, realtime=True)
+        if flashDue is not None:
+            game.startFlashing(flashDue)
+        if self.flags & FLASHED:
+            game.background = game.background_flash
+
+        textgroup = game.textgroup
+        textgroup.updateScore(self.score)
+        textgroup.updateLevel(self.level)
+        if self.text:
+            textgroup.showText(self.text)
+        else:
+            textgroup.hideText()
+        game.lifesprites.resetLives(self.lives)
+
+    def pellet(self, row, col):
+        cell = row * self.ncols + col
+        return bool(self.pellets[cell >> 3] & (1 << (cell & 7)))
+
+    def pack(self):
+        out = bytearray(
+            KEYFRAME.pack(
+                self.tick,
+                self.level,
+                self.lives,
+                self.score,
+                self.paused,
+                self.input,
+                self.ncols,
+                self.nrows,
+                self.numEaten,
+                *self.clock,
+                self.pauseFunc,
+                self.phase,
+                self.mode,
+                self.text,
+                self.flags,
+                len(self.ghosts),
+            )
+        )
+        out += TIMERS.pack(*self.timers)
+        out += PACMANSTATE.pack(*self.pacman)
+        for ghost in self.ghosts:
+            out += GHOSTSTATE.pack(*ghost)
+        writeVarint(out, len(self.access))
+        for index, direction, mask in self.access:
+            writeVarint(out, index)
+            out += NODEACCESS.pack(direction, mask)
+        out += self.pellets
+        return bytes(out)
+
+    @classmethod
+    def unpack(cls, data):
+        fields = KEYFRAME.unpack_from(data)
+        tick, level, lives, score, paused, input, ncols, nrows, numEaten = fields[:9]
+        clock = fields[9:11]
+        pauseFunc, phase, mode, text, flags, count = fields[11:]
+        offset = KEYFRAME.size
+        timers = TIMERS.unpack_from(data, offset)
+        offset += TIMERS.size
+        pacman = PACMANSTATE.unpack_from(data, offset)
+        offset += PACMANSTATE.size
+        ghosts = []
+        for _ in range(count):
+            ghosts.append(GHOSTSTATE.unpack_from(data, offset))
+            offset += GHOSTSTATE.size
+        access = []
+        size, offset = readVarint(data, offset)
+        for _ in range(size):
+            index, offset = readVarint(data, offset)
+            access.append((index,) + NODEACCESS.unpack_from(data, offset))
+            offset += NODEACCESS.size
+        return cls(
+            tick,
+            level,
+            lives,
+            score,
+            bool(paused),
+            input,
+            pacman,
+            ghosts,
+            bytes(data[offset : offset + pelletBytes(ncols, nrows)]),
+            ncols,
+            nrows,
+            numEaten,
+            clock,
+            timers,
+            pauseFunc,
+            phase,
+            mode,
+            text,
+            flags,
+            access,
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, Keyframe) and self.pack() == other.pack()
+
+
+class ReplayWriter(object):
+    """Streams a replay to disk. Every tick gets one input byte, only
+    changes are stored as (tick delta, input) pairs. Each chunk starts
+    with a keyframe, holds chunkKeyframes keyframe intervals and is zlib
+    compressed on its own, so a reader can decode any chunk without the
+    ones before it. An index of the chunks is written on close."""
+
+    def __init__(self, path, header):
+        self.header = header
+        self.file = open(path, "wb")
+        self.file.write(header.pack())
+        self.index = []
+        self.tick = 0
+        self.startChunk()
+
+    def startChunk(self):
+        self.chunkStart = self.tick
+        self.keyframes = []
+        self.records = bytearray()
+        self.lastInput = None
+        self.lastChange = self.tick
+
+    def isKeyframe(self, tick):
+        return tick % self.header.keyframeInterval == 0
+
+    def write(self, input, keyframe=None):
+        """Record the input of the next tick, keyframe ticks also need the
+        keyframe"""
+        if self.isKeyframe(self.tick):
+            if keyframe is None:
+                raise ValueError(f"tick {self.tick} needs a keyframe")
+            if len(self.keyframes) == self.header.chunkKeyframes:
+                self.flush()
+            self.keyframes.append(keyframe.pack())
+        if input != self.lastInput:
+            writeVarint(self.records, self.tick - self.lastChange)
+            self.records.append(input)
+            self.lastInput = input
+            self.lastChange = self.tick
+        self.tick += 1
+
+    def flush(self):
+        if self.tick == self.chunkStart:
+            return
+        payload = bytearray([len(self.keyframes)])
+        for keyframe in self.keyframes:
+            writeVarint(payload, len(keyframe))
+            payload += keyframe
+        payload += self.records
+        data = zlib.compress(bytes(payload), 9)
+        self.index.append(
+            (self.chunkStart, self.tick - self.chunkStart, self.file.tell())
+        )
+        self.file.write(CHUNKTAG)
+        self.file.write(
+            CHUNKHEADER.pack(self.chunkStart, self.tick - self.chunkStart, len(data))
+        )
+        self.file.write(data)
+        self.file.flush()
+        self.startChunk()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        indexOffset = self.file.tell()
+        self.file.write(INDEXTAG)
+        self.file.write(struct.pack("<I", len(self.index)))
+        for entry in self.index:
+            self.file.write(INDEXENTRY.pack(*entry))
+        self.file.write(TRAILER.pack(indexOffset, MAGIC))
+        self.file.close()
+
+
+class ReplayChunk(object):
+    """Decoded chunk: its keyframes and the (tick, input) changes"""
+
+    def __init__(self, firstTick, ticks, data):
+        self.firstTick = firstTick
+        self.ticks = ticks
+        self.keyframes = []
+        offset = 1
+        for _ in range(data[0]):
+            size, offset = readVarint(data, offset)
+            self.keyframes.append(Keyframe.unpack(data[offset : offset + size]))
+            offset += size
+        self.changes = []
+        tick = firstTick
+        while offset < len(data):
+            delta, offset = readVarint(data, offset)
+            tick += delta
+            self.changes.append((tick, data[offset]))
+            offset += 1
+
+    def inputs(self, start=None):
+        """(tick, input, keyframe or None) of every tick from start on"""
+        if start is None:
+            start = self.firstTick
+        keyframes = {keyframe.tick: keyframe for keyframe in self.keyframes}
+        i = bisect.bisect_right(self.changes, (start, 0xFF)) - 1
+        input = self.changes[i][1]
+        for tick in range(start, self.firstTick + self.ticks):
+            if i + 1 < len(self.changes) and self.changes[i + 1][0] == tick:
+                i += 1
+                input = self.changes[i][1]
+            yield tick, input, keyframes.get(tick)
+
+
+class ReplayReader(object):
+    """Reads a replay a chunk at a time. With the index at the end of the
+    file seek() decodes a single chunk; a replay cut short, for example by
+    a crash while recording, is read by walking the chunk headers."""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.header = ReplayHeader.read(self.file)
+        self.dataStart = self.file.tell()
+        self.index = self.readIndex()
+        self.firstTicks = [entry[0] for entry in self.index]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    @property
+    def ticks(self):
+        if not self.index:
+            return 0
+        firstTick, ticks, _ = self.index[-1]
+        return firstTick + ticks
+
+    def readIndex(self):
+        f = self.file
+        end = f.seek(0, 2)
+        if end - self.dataStart >= TRAILER.size:
+            f.seek(end - TRAILER.size)
+            indexOffset, magic = TRAILER.unpack(f.read(TRAILER.size))
+            if magic == MAGIC and self.dataStart <= indexOffset < end:
+                f.seek(indexOffset)
+                if f.read(1) == INDEXTAG:
+                    (count,) = struct.unpack("<I", f.read(4))
+                    return [
+                        INDEXENTRY.unpack(f.read(INDEXENTRY.size)) for _ in range(count)
+                    ]
+        return self.scanChunks(end)
+
+    def scanChunks(self, end):
+        index = []
+        offset = self.dataStart
+        f = self.file
+        while offset + 1 + CHUNKHEADER.size <= end:
+            f.seek(offset)
+            if f.read(1) != CHUNKTAG:
+                break
+            firstTick, ticks, size = CHUNKHEADER.unpack(f.read(CHUNKHEADER.size))
+            following = offset + 1 + CHUNKHEADER.size + size
+            if following > end:
+                break
+            index.append((firstTick, ticks, offset))
+            offset = following
+        return index
+
+    def readChunk(self, i):
+        firstTick, ticks, offset = self.index[i]
+        self.file.seek(offset + 1)
+        _, _, size = CHUNKHEADER.unpack(self.file.read(CHUNKHEADER.size))
+        return ReplayChunk(firstTick, ticks, zlib.decompress(self.file.read(size)))
+
+    def chunkAt(self, tick):
+        if not 0 <= tick < self.ticks:
+            raise IndexError(f"tick {tick} is not in the replay")
+        return bisect.bisect_right(self.firstTicks, tick) - 1
+
+    def seek(self, tick):
+        """The last keyframe at or before tick"""
+        chunk = self.readChunk(self.chunkAt(tick))
+        keyframes = [keyframe for keyframe in chunk.keyframes if keyframe.tick <= tick]
+        return keyframes[-1]
+
+    def read(self, start=0):
+        """(tick, input, keyframe or None) of every tick from start to the
+        end, decoding one chunk at a time"""
+        if start >= self.ticks:
+            return
+        for i in range(self.chunkAt(start), len(self.index)):
+            yield from self.readChunk(i).inputs(max(start, self.index[i][0]))
+
+
+def applyInput(game, input):
+    direction, pause = decodeInput(input)
+    game.pacman.input = direction
+    if pause:
+        game.togglePause()
+
+
+class ReplayRecorder(object):
+    """Records the input of every game step. The pause key takes effect at
+    the start of the next step so it lands on the same tick on playback."""
+
+    def __init__(self, path, header):
+        self.header = header
+        self.writer = ReplayWriter(path, header)
+        self.pausePressed = False
+
+    def pressPause(self):
+        self.pausePressed = True
+
+    def tick(self, game):
+        tick = game.ticks
+        input = encodeInput(game.pacman.getValidKey(), self.pausePressed)
+        self.pausePressed = False
+        keyframe = None
+        if self.writer.isKeyframe(tick):
+            random.seed(keyframeSeed(self.header.seed, tick))
+            keyframe = Keyframe.capture(game, tick, input)
+        self.writer.write(input, keyframe)
+        applyInput(game, input)
+
+    def close(self):
+        self.writer.close()
+
+
+class ReplayPlayer(object):
+    """Feeds a recorded replay to the game in place of the keyboard and
+    compares the game with every keyframe. Control goes back to the
+    keyboard when the replay ends."""
+
+    def __init__(self, path):
+        self.reader = ReplayReader(path)
+        self.header = self.reader.header
+        self.stream = self.reader.read()
+        self.desyncs = 0
+        self.finished = False
+
+    def pressPause(self):
+        pass
+
+    def tick(self, game):
+        entry = next(self.stream, None)
+        if entry is None:
+            self.finish(game)
+            return
+        self.play(game, entry)
+
+    def play(self, game, entry):
+        tick, input, keyframe = entry
+        if keyframe is not None:
+            random.seed(keyframeSeed(self.header.seed, tick))
+            if Keyframe.capture(game, tick, input) != keyframe:
+                if self.desyncs == 0:
+                    print(f"replay out of sync at tick {tick}")
+                self.desyncs += 1
+        applyInput(game, input)
+
+    def start(self, game, tick):
+        """Bring the game to tick without drawing, playback goes on from
+        there. The game is restored from the last keyframe before tick and
+        only the ticks after it are simulated, at most one keyframe
+        interval."""
+        keyframe = self.reader.seek(tick)
+        keyframe.restore(game)
+        replay, game.replay = game.replay, None
+        for entry in self.reader.read(keyframe.tick):
+            if entry[0] >= tick:
+                break
+            self.play(game, entry)
+            game.step(SIMSTEP)
+        game.replay = replay
+        self.stream = self.reader.read(tick)
+
+    def finish(self, game):
+        self.finished = True
+        game.pacman.input = None
+        game.replay = None
+        self.close()
+        print(f"replay finished after {self.reader.ticks} ticks")
+
+    def close(self):
+        self.reader.close()
@@ -0,0 +1,100 @@
+import heapq
+import itertools
+
+
+class Timer(object):
+    """Handle of a scheduled callback. A cancelled timer stays in its heap
+    and is dropped when it comes due."""
+
+    __slots__ = ("due", "interval", "callback", "args", "realtime", "active")
+
+    def __init__(self, due, interval, callback, args, realtime):
+        self.due = due
+        self.interval = interval
+        self.callback = callback
+        self.args = args
+        self.realtime = realtime
+        self.active = True
+
+    def cancel(self):
+        self.active = False
+
+
+class Scheduler(object):
+    """One-shot and repeating timers on the game clock, kept in heaps ordered
+    by due time. update() only pops timers that are due, so a frame costs
+    in proportion to the events fired, not to the timers waiting.
+
+    Timers run on game time by default, which stands still while the game
+    is paused. realtime timers also run during pauses, for things like the
+    pause countdown itself, flashing and popups."""
+
+    def __init__(self):
+        self.time = 0.0
+        self.gameTime = 0.0
+        self.realtimeQueue = []
+        self.gameQueue = []
+        self.counter = itertools.count()
+
+    def now(self, realtime=False):
+        return self.time if realtime else self.gameTime
+
+    def at(self, due, callback, *args, realtime=False, interval=None):
+        """Call callback(*args) once the clock reaches due"""
+        timer = Timer(due, interval, callback, args, realtime)
+        self.push(timer)
+        return timer
+
+    def after(self, delay, callback, *args, realtime=False):
+        """Call callback(*args) once, delay seconds from now"""
+        return self.at(self.now(realtime) + delay, callback, *args, realtime=realtime)
+
+    def every(self, interval, callback, *args, realtime=False):
+        """Call callback(*args) every interval seconds until cancelled"""
+        if interval <= 0:
+            raise ValueError(f"interval must be positive, got {interval}")
+        return self.at(
+            self.now(realtime) + interval,
+            callback,
+            *args,
+            realtime=realtime,
+            interval=interval,
+        )
+
+    def push(self, timer):
+        queue = self.realtimeQueue if timer.realtime else self.gameQueue
+        heapq.heappush(queue, (timer.due, next(self.counter), timer))
+
+    def update(self, dt, paused=False):
+        self.time += dt
+        self.run(self.realtimeQueue, self.time)
+        if not paused:
+            self.gameTime += dt
+            self.run(self.gameQueue, self.gameTime)
+
+    def run(self, queue, now):
+        # A long step fires every interval of a repeating timer it covers
+        while queue and queue[0][0] <= now:
+            timer = heapq.heappop(queue)[2]
+            if not timer.active:
+                continue
+            if timer.interval is not None:
+                timer.due += timer.interval
+                self.push(timer)
+            else:
+                timer.active = False
+            timer.callback(*timer.args)
+
+    def clear(self):
+        for queue in (self.realtimeQueue, self.gameQueue):
+            for entry in queue:
+                entry[2].active = False
+            queue.clear()
+
+    def __len__(self):
+        return sum(
+            1
+            for queue in (self.realtimeQueue, self.gameQueue)
+            for entry in queue
+            if entry[2].active
+        )
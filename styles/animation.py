@@ -1,33 +1,65 @@
+import weakref
 from constants import *
 
+# Absorbs float drift when a frame boundary is reached after a whole number
+# of fixed steps, e.g. 3 * (1 / 60) * 20 coming out as 0.9999999999999999
+EPSILON = 1e-9
+
+
+class AnimationClock(object):
+    """Time base shared by every Animator. An animator stores only the clock
+    time it started at, its frame is floor(elapsed * speed) % n, and tick()
+    refreshes all live animators in one pass."""
+
+    def __init__(self):
+        self.time = 0.0
+        self.animators = weakref.WeakSet()
+
+    def add(self, animator):
+        self.animators.add(animator)
+
+    def tick(self, dt):
+        self.time += dt
+        for animator in self.animators:
+            if animator.start is not None:
+                animator.current_frame = animator.frameAt(self.time)
+
 
 class Animator(object):
-    def __init__(self, frames=[], speed=20, loop=True):
-        self.frames = frames
-        self.current_frame = 0
+    """Frames played at speed frames per second. The clock starts an animator
+    at its first update after a reset, so a sequence that is only shown
+    now and then, like the death animation, still plays from frame 0."""
+
+    def __init__(self, frames=None, speed=20, loop=True, clock=None):
+        self.frames = list(frames) if frames is not None else []
         self.speed = speed
         self.loop = loop
-        self.dt = 0
-        self.finished = False
+        self.clock = clock if clock is not None else animationclock
+        self.clock.add(self)
+        self.reset()
 
     def reset(self):
+        self.start = None
         self.current_frame = 0
         self.finished = False
 
-    def update(self, dt):
-        if not self.finished:
-            self.nextFrame(dt)
-        if self.current_frame == len(self.frames):
-            if self.loop:
-                self.current_frame = 0
-            else:
-                self.finished = True
-                self.current_frame -= 1
+    def frameAt(self, time):
+        if not self.frames:
+            return 0
+        index = int((time - self.start) * self.speed + EPSILON)
+        if self.loop:
+            return index % len(self.frames)
+        if index >= len(self.frames):
+            self.finished = True
+            return len(self.frames) - 1
+        return index
 
+    def update(self, dt):
+        """Current frame. dt is accepted for the old per-animator API, time
+        is advanced by the clock"""
+        if self.start is None:
+            self.start = self.clock.time
         return self.frames[self.current_frame]
 
-    def nextFrame(self, dt):
-        self.dt += dt
-        if self.dt >= (1.0 / self.speed):
-            self.current_frame += 1
-            self.dt = 0
+
+animationclock = AnimationClock()
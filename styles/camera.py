@@ -0,0 +1,39 @@
+import pygame
+from movement.vector import Vector2
+from constants import *
+
+
+class Camera(object):
+    """Viewport onto a maze that can be larger than the window"""
+
+    def __init__(self, width=SCREENWIDTH, height=SCREENHEIGHT):
+        self.width = width
+        self.height = height
+        self.offset = Vector2()
+        self.setWorldSize(width, height)
+
+    def setWorldSize(self, width, height):
+        self.worldwidth = width
+        self.worldheight = height
+        self.offset = Vector2()
+
+    def follow(self, position):
+        maxx = max(self.worldwidth - self.width, 0)
+        maxy = max(self.worldheight - self.height, 0)
+        x = min(max(position.x - self.width / 2, 0), maxx)
+        y = min(max(position.y - self.height / 2, 0), maxy)
+        self.offset = Vector2(int(x), int(y))
+
+    def apply(self, position):
+        return position - self.offset
+
+    def getRect(self):
+        return pygame.Rect(self.offset.x, self.offset.y, self.width, self.height)
+
+    def isVisible(self, position, margin=TILEWIDTH * 2):
+        x = position.x - self.offset.x
+        y = position.y - self.offset.y
+        if -margin <= x <= self.width + margin:
+            if -margin <= y <= self.height + margin:
+                return True
+        return False
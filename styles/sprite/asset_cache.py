@@ -0,0 +1,179 @@
+import hashlib
+import json
+import mmap
+import os
+import pygame
+from constants import TILEWIDTH, TILEHEIGHT
+
+VERSION = 1
+DEFAULT_DIRECTORY = os.path.join(".cache", "assets")
+
+
+def hashFile(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class AssetCache(object):
+    """Decoded and scaled RGBA pixels on disk, so later runs skip decoding
+    and scaling. All buffers live in one append-only data file that is
+    memory-mapped copy-on-write, and surfaces are made straight from the
+    mapped bytes with pygame.image.frombuffer. A JSON index records each
+    buffer's offset, size, source mtime and content hash.
+
+    An entry is reused while its source mtime is unchanged, or the mtime
+    changed but the content hash did not. The whole cache is dropped when
+    the tile size or the format version changes, or when stale buffers
+    take up more of the data file than live ones.
+
+    Changes to the index are kept in memory and written by flush(), which
+    close() calls."""
+
+    def __init__(self):
+        self.enabled = False
+        self.directory = None
+        self.entries = {}
+        self.mapped = None
+        self.dirty = False
+        # Content hash of each source this run, by path and mtime
+        self.hashes = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def indexPath(self):
+        return os.path.join(self.directory, "index.json")
+
+    @property
+    def dataPath(self):
+        return os.path.join(self.directory, "pixels.bin")
+
+    def open(self, directory=DEFAULT_DIRECTORY):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.entries = {}
+        self.mapped = None
+        self.dirty = False
+        try:
+            with open(self.indexPath) as f:
+                index = json.load(f)
+            if index.get("version") == VERSION and index.get("tile") == [
+                TILEWIDTH,
+                TILEHEIGHT,
+            ]:
+                self.entries = index["entries"]
+        except (OSError, ValueError, KeyError):
+            pass
+        live = sum(entry["length"] for entry in self.entries.values())
+        if os.path.exists(self.dataPath) and os.path.getsize(self.dataPath) > 2 * live:
+            self.entries = {}
+        if not self.entries:
+            open(self.dataPath, "wb").close()
+        self.enabled = True
+
+    def close(self):
+        self.flush()
+        # Surfaces made by get() keep their own reference to the mapping
+        self.enabled = False
+        self.mapped = None
+
+    def getKey(self, source, variant):
+        return f"{source}|{variant}"
+
+    def map(self):
+        if self.mapped is None:
+            with open(self.dataPath, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        return self.mapped
+
+    def getHash(self, source, mtime):
+        key = (source, mtime)
+        if key not in self.hashes:
+            self.hashes[key] = hashFile(source)
+        return self.hashes[key]
+
+    def isFresh(self, entry, source):
+        try:
+            mtime = os.path.getmtime(source)
+        except OSError:
+            return False
+        if mtime == entry["mtime"]:
+            return True
+        if self.getHash(source, mtime) == entry["hash"]:
+            entry["mtime"] = mtime
+            self.dirty = True
+            return True
+        return False
+
+    def has(self, source, variant):
+        if not self.enabled:
+            return False
+        entry = self.entries.get(self.getKey(source, variant))
+        return entry is not None and self.isFresh(entry, source)
+
+    def get(self, source, variant):
+        """(surface, extra) for source, or None on a miss. The surface is
+        RGBA and shares memory with the mapped file"""
+        if not self.enabled:
+            return None
+        entry = self.entries.get(self.getKey(source, variant))
+        if entry is None or not self.isFresh(entry, source):
+            self.misses += 1
+            return None
+        mapped = self.map()
+        end = entry["offset"] + entry["length"]
+        if mapped is None or end > len(mapped):
+            self.misses += 1
+            return None
+        self.hits += 1
+        view = memoryview(mapped)[entry["offset"] : end]
+        surface = pygame.image.frombuffer(view, tuple(entry["size"]), "RGBA")
+        return surface, entry.get("extra", {})
+
+    def put(self, source, variant, surface, extra=None):
+        """Store the pixels of surface, which was made from source"""
+        if not self.enabled:
+            return
+        pixels = pygame.image.tobytes(surface, "RGBA")
+        with open(self.dataPath, "ab") as f:
+            offset = f.tell()
+            f.write(pixels)
+        mtime = os.path.getmtime(source)
+        self.entries[self.getKey(source, variant)] = {
+            "mtime": mtime,
+            "hash": self.getHash(source, mtime),
+            "size": list(surface.get_size()),
+            "offset": offset,
+            "length": len(pixels),
+            "extra": extra or {},
+        }
+        # The current mapping does not cover the appended bytes
+        self.mapped = None
+        self.dirty = True
+
+    def flush(self):
+        """Write the index if it changed. Buffers appended since the last
+        flush are orphaned if the process dies first, and the next open
+        drops the cache once they outweigh the live ones"""
+        if self.enabled and self.dirty:
+            self.saveIndex()
+            self.dirty = False
+
+    def saveIndex(self):
+        index = {
+            "version": VERSION,
+            "tile": [TILEWIDTH, TILEHEIGHT],
+            "entries": self.entries,
+        }
+        temp = self.indexPath + ".tmp"
+        with open(temp, "w") as f:
+            json.dump(index, f)
+        os.replace(temp, self.indexPath)
+
+
+assetcache = AssetCache()
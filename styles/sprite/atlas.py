@@ -0,0 +1,38 @@
+import json
+import os
+
+ATLAS = os.path.join("assets", "atlas", "atlas.json")
+MANIFESTS = {}
+
+
+class Manifest(object):
+    """Named frames and animations of a packed sprite atlas, as written by
+    atlas_builder. Frame rects are (x, y, width, height) in base tiles."""
+
+    def __init__(self, path):
+        with open(path) as f:
+            data = json.load(f)
+        self.path = path
+        self.image = os.path.join(os.path.dirname(path), data["image"])
+        self.tile = tuple(data["tile"])
+        self.colorkey = tuple(data["colorkey"])
+        self.frames = {name: tuple(rect) for name, rect in data["frames"].items()}
+        self.animations = data["animations"]
+
+    def getFrame(self, name):
+        try:
+            return self.frames[name]
+        except KeyError:
+            raise KeyError(f"no frame {name!r} in {self.path}") from None
+
+    def getAnimation(self, name):
+        try:
+            return self.animations[name]
+        except KeyError:
+            raise KeyError(f"no animation {name!r} in {self.path}") from None
+
+
+def getManifest(path=ATLAS):
+    if path not in MANIFESTS:
+        MANIFESTS[path] = Manifest(path)
+    return MANIFESTS[path]
@@ -0,0 +1,152 @@
+"""Offline sprite atlas builder.
+
+Packs every named frame of assets/sprites/frames.json, plus any loose GIFs,
+into one sheet and writes the manifest the game reads at startup:
+
+    python -m styles.sprite.atlas_builder [--gifs DIR] [--width TILES]
+
+Frames are packed on the base tile grid, so the atlas scales to any
+TILEWIDTH exactly like the original spritesheet did.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+SOURCE = os.path.join("assets", "sprites", "frames.json")
+OUTPUT = os.path.join("assets", "atlas")
+IMAGE = "atlas.png"
+MANIFEST = "atlas.json"
+VERSION = 1
+
+
+def packFrames(sizes, width):
+    """Shelf packing on the tile grid: tallest frames first, left to right,
+    a new shelf when a row is full. sizes maps key -> (w, h) in tiles.
+    Returns key -> (x, y) and the packed height in tiles"""
+    placements = {}
+    x = y = shelf = 0
+    order = sorted(sizes.items(), key=lambda item: (-item[1][1], -item[1][0], item[0]))
+    for key, (w, h) in order:
+        if w > width:
+            raise ValueError(f"{key} is {w} tiles wide, the atlas only {width}")
+        if x + w > width:
+            x = 0
+            y += shelf
+            shelf = 0
+        placements[key] = (x, y)
+        x += w
+        shelf = max(shelf, h)
+    return placements, y + shelf
+
+
+def gifFrame(path, tile, colorkey):
+    """First frame of a GIF on a colorkey background, padded to whole tiles"""
+    from PIL import Image
+
+    with Image.open(path) as img:
+        img = img.convert("RGBA")
+    w = -(-img.width // tile[0])
+    h = -(-img.height // tile[1])
+    frame = Image.new("RGB", (w * tile[0], h * tile[1]), colorkey)
+    frame.paste(img, (0, 0), img.getchannel("A").point(lambda a: 255 * (a >= 128)))
+    return frame, w, h
+
+
+def buildAtlas(source=SOURCE, output=OUTPUT, gifs=(), width=16):
+    """Pack the frames described by source and write the atlas image and
+    manifest into output. Returns the manifest"""
+    from PIL import Image
+
+    with open(source) as f:
+        spec = json.load(f)
+    tile = tuple(spec["tile"])
+    with Image.open(os.path.join(os.path.dirname(source), spec["image"])) as sheet:
+        sheet = sheet.convert("RGB")
+    colorkey = sheet.getpixel((0, 0))
+
+    # Names that point at the same region share one packed copy
+    regions = {}
+    names = {}
+    for name, rect in spec["frames"].items():
+        x, y, w, h = rect
+        key = ("sheet", x, y, w, h)
+        if key not in regions:
+            box = (x * tile[0], y * tile[1], (x + w) * tile[0], (y + h) * tile[1])
+            regions[key] = (sheet.crop(box), w, h)
+        names[name] = key
+    for directory in gifs:
+        for path in sorted(glob.glob(os.path.join(directory, "*.gif"))):
+            name = os.path.splitext(os.path.basename(path))[0]
+            if name in names:
+                raise ValueError(f"{path}: frame {name} is already defined")
+            regions[path] = gifFrame(path, tile, colorkey)
+            names[name] = path
+
+    animations = spec.get("animations", {})
+    for anim, data in animations.items():
+        for frame in data["frames"]:
+            if frame not in names:
+                raise ValueError(f"animation {anim} uses unknown frame {frame}")
+
+    sizes = {key: (w, h) for key, (_, w, h) in regions.items()}
+    placements, height = packFrames(sizes, width)
+    atlas = Image.new("RGB", (width * tile[0], height * tile[1]), colorkey)
+    for key, (image, _, _) in regions.items():
+        x, y = placements[key]
+        atlas.paste(image, (x * tile[0], y * tile[1]))
+
+    os.makedirs(output, exist_ok=True)
+    atlas.save(os.path.join(output, IMAGE), optimize=True)
+    manifest = {
+        "version": VERSION,
+        "image": IMAGE,
+        "tile": list(tile),
+        "colorkey": list(colorkey),
+        "frames": {
+            name: [*placements[key], *sizes[key]] for name, key in names.items()
+        },
+        "animations": animations,
+    }
+    writeManifest(manifest, os.path.join(output, MANIFEST))
+    return manifest
+
+
+def writeManifest(manifest, path):
+    """JSON with one frame or animation per line, so rebuilds diff cleanly"""
+    lines = ["{"]
+    for key in ("version", "image", "tile", "colorkey"):
+        lines.append(f"  {json.dumps(key)}: {json.dumps(manifest[key])},")
+    for key in ("frames", "animations"):
+        entries = [
+            f"    {json.dumps(name)}: {json.dumps(value)}"
+            for name, value in manifest[key].items()
+        ]
+        end = "," if key == "frames" else ""
+        lines += [f"  {json.dumps(key)}: {{", ",\n".join(entries), f"  }}{end}"]
+    lines.append("}")
+    with open(path, "w") as f:
+        f.write("\n".join(line for line in lines if line) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the sprite atlas")
+    parser.add_argument("--source", default=SOURCE, help="frame description")
+    parser.add_argument("--output", default=OUTPUT, help="atlas directory")
+    parser.add_argument(
+        "--gifs", action="append", default=[], help="also pack every GIF in DIR"
+    )
+    parser.add_argument("--width", type=int, default=16, help="atlas width in tiles")
+    args = parser.parse_args(argv)
+    manifest = buildAtlas(args.source, args.output, args.gifs, args.width)
+    print(
+        f"packed {len(manifest['frames'])} frames and "
+        f"{len(manifest['animations'])} animations into {args.output}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,133 +1,349 @@
 import pygame
 import os
-from PIL import Image
 import glob
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from constants import TILEWIDTH
+from telemetry.trace import traced
+from styles.sprite.asset_cache import assetcache
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Cached in place of an asset that failed to load, so it is not retried
+# and its error not printed again on every frame
+BROKEN = object()
+
+
+def decode_gif(path):
+    """RGBA bytes and size of a GIF's first frame. Safe on a worker thread:
+    PIL releases the GIL while decoding and no pygame objects are made.
+    PIL is imported here so the game does not pay for it unless GIF
+    sprites are actually used"""
+    from PIL import Image
+
+    with Image.open(path) as img:
+        img = img.convert("RGBA")
+        return img.tobytes(), img.size
+
+
+def load_gif(path):
+    """First frame of a GIF as an RGBA surface"""
+    data, size = decode_gif(path)
+    return pygame.image.fromstring(data, size, "RGBA")
+
+
+def surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+
+class AssetSpec:
+    """How to (re)load a named asset: its files and how to scale them.
+    single assets are one sprite, the rest are lists of animation frames.
+    With skip_errors a broken frame is dropped instead of failing the
+    whole animation."""
+
+    def __init__(
+        self, paths, scale=1, size=None, single=False, skip_errors=False, limit=None
+    ):
+        self.paths = paths
+        self.scale = scale
+        self.size = size
+        self.single = single
+        self.skip_errors = skip_errors
+        self.limit = limit
+
+    @property
+    def variant(self):
+        """Disk cache variant, the pixels differ per target size"""
+        if self.size is not None:
+            return f"size={self.size[0]}x{self.size[1]}"
+        return f"scale={self.scale}"
 
 
 class SpriteManager:
-    def __init__(self):
-        self.sprites: dict[str, any] = {}
-        self.animations: dict[str, any] = {}
+    """Named sprites and animations, loaded on first use and kept in an LRU
+    bounded by surface bytes. Evicted assets are reloaded from their spec
+    when asked for again; pinned assets are never evicted. Scaled pixels
+    are also kept in the disk cache, when it is open, so the next run does
+    not decode at all."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, disk_cache=None):
+        self.max_bytes = max_bytes
+        self.disk_cache = disk_cache if disk_cache is not None else assetcache
+        self.specs: dict[str, AssetSpec] = {}
+        self.aliases: dict[str, str] = {}
+        self.cache: OrderedDict[str, tuple] = OrderedDict()
+        self.pinned: set[str] = set()
+        self.used_bytes = 0
+        # Entries of the cache holding BROKEN
+        self.broken = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.batches = []
 
+    def register_sprite(self, name, path, scale=1):
+        """Declare a sprite without loading it"""
+        self._register(name, AssetSpec([path], scale, single=True))
+
+    def register_animation(self, name, path_pattern, frame_count, scale=1):
+        """Declare an animation without loading it. Frame files are numbered
+        from 1"""
+        paths = [path_pattern.format(i + 1) for i in range(frame_count)]
+        self._register(name, AssetSpec(paths, scale))
+
+    def _register(self, name, spec):
+        self.aliases.pop(name, None)
+        self._drop(name)
+        self.specs[name] = spec
+
+    def alias(self, name, target):
+        """Let name share target's asset without counting its bytes twice"""
+        self._drop(name)
+        self.specs.pop(name, None)
+        self.aliases[name] = target
+
+    @traced("SpriteManager.load_sprite", "load")
     def load_sprite(self, name, path, scale=1):
         """Load a single sprite"""
-        try:
-            if path.lower().endswith(".gif"):
-                # Load first frame of GIF
-                img = Image.open(path)
-                img = img.convert("RGBA")
-                sprite_str = img.tobytes()
-                sprite_size = img.size
-                sprite = pygame.image.fromstring(sprite_str, sprite_size, "RGBA")
-            else:
-                sprite = pygame.image.load(path).convert_alpha()
-
-            if scale != 1:
-                new_width = int(sprite.get_width() * scale)
-                new_height = int(sprite.get_height() * scale)
-                sprite = pygame.transform.scale(sprite, (new_width, new_height))
-            self.sprites[name] = sprite
-            return True
-        except Exception as e:
-            print(f"Error loading sprite: {path} - {str(e)}")
-            return False
+        self.register_sprite(name, path, scale)
+        return self._get(name) is not None
 
+    @traced("SpriteManager.load_animation", "load")
     def load_animation(self, name, path_pattern, frame_count, scale=1):
         """Load a sequence of sprites for animation"""
-        frames = []
-        for i in range(frame_count):
-            path = path_pattern.format(
-                i + 1
-            )  # Changed to 1-based indexing for your files
-            try:
-                if path.lower().endswith(".gif"):
-                    img = Image.open(path)
-                    img = img.convert("RGBA")
-                    sprite_str = img.tobytes()
-                    sprite_size = img.size
-                    sprite = pygame.image.fromstring(sprite_str, sprite_size, "RGBA")
-                else:
-                    sprite = pygame.image.load(path).convert_alpha()
-
-                if scale != 1:
-                    new_width = int(sprite.get_width() * scale)
-                    new_height = int(sprite.get_height() * scale)
-                    sprite = pygame.transform.scale(sprite, (new_width, new_height))
-                frames.append(sprite)
-            except Exception as e:
-                print(f"Error loading animation frame: {path} - {str(e)}")
-                return False
-        self.animations[name] = frames
-        return True
+        self.register_animation(name, path_pattern, frame_count, scale)
+        return self._load_now(name)
 
+    @traced("SpriteManager.load_direction_animations", "load")
     def load_direction_animations(self, base_path, direction):
         """Load all animation frames for a specific direction"""
-        pattern = os.path.join(base_path, f"pacman-{direction} *.gif")
-        files = sorted(glob.glob(pattern))
-        if files:
-            frames = []
-            for file in files:
-                try:
-                    img = Image.open(file)
-                    img = img.convert("RGBA")
-                    sprite_str = img.tobytes()
-                    sprite_size = img.size
-                    sprite = pygame.image.fromstring(sprite_str, sprite_size, "RGBA")
-                    # Scale the sprite to match tile size
-                    new_size = (TILEWIDTH, TILEWIDTH)
-                    sprite = pygame.transform.scale(sprite, new_size)
-                    frames.append(sprite)
-                except Exception as e:
-                    print(f"Error loading animation frame: {file} - {str(e)}")
-            if frames:
-                # Only take the first 4 frames if we have more
-                frames = frames[:4]
-                self.animations[f"pacman_{direction}"] = frames
-                return True
-        return False
+        name = self.register_direction_animations(base_path, direction)
+        if name is None:
+            return False
+        return self._load_now(name)
 
+    @traced("SpriteManager.load_ghost_animations", "load")
     def load_ghost_animations(self, base_path):
         """Load ghost animation frames"""
+        if not self.register_ghost_animations(base_path):
+            return False
+        return self._load_now("ghost")
+
+    def register_direction_animations(self, base_path, direction):
+        pattern = os.path.join(base_path, f"pacman-{direction} *.gif")
+        files = sorted(glob.glob(pattern))
+        if not files:
+            return None
+        name = f"pacman_{direction}"
+        # Only take the first 4 frames if we have more
+        self._register(
+            name,
+            AssetSpec(files, size=(TILEWIDTH, TILEWIDTH), skip_errors=True, limit=4),
+        )
+        return name
+
+    def register_ghost_animations(self, base_path):
         pattern = os.path.join(base_path, "ghost *.gif")
         files = sorted(glob.glob(pattern))
-        if files:
-            frames = []
-            for file in files:
-                try:
-                    img = Image.open(file)
-                    img = img.convert("RGBA")
-                    sprite_str = img.tobytes()
-                    sprite_size = img.size
-                    sprite = pygame.image.fromstring(sprite_str, sprite_size, "RGBA")
-                    # Scale the sprite to match tile size
-                    new_size = (TILEWIDTH, TILEWIDTH)
-                    sprite = pygame.transform.scale(sprite, new_size)
-                    frames.append(sprite)
-                except Exception as e:
-                    print(f"Error loading animation frame: {file} - {str(e)}")
-            if frames:
-                # Store the ghost animation frames
-                self.animations["ghost"] = frames
-                # Use the same frames for all ghost types and directions
-                for ghost_type in ["red", "pink", "blue", "orange"]:
-                    for direction in ["up", "down", "left", "right"]:
-                        self.animations[f"ghost_{ghost_type}_{direction}"] = frames
-                # Use for frightened state too
-                self.animations["ghost_frightened"] = frames
-                return True
-        return False
+        if not files:
+            return False
+        self._register(
+            "ghost", AssetSpec(files, size=(TILEWIDTH, TILEWIDTH), skip_errors=True)
+        )
+        # Use the same frames for all ghost types and directions
+        for ghost_type in ["red", "pink", "blue", "orange"]:
+            for direction in ["up", "down", "left", "right"]:
+                self.alias(f"ghost_{ghost_type}_{direction}", "ghost")
+        # Use for frightened state too
+        self.alias("ghost_frightened", "ghost")
+        return True
+
+    @traced("SpriteManager.load_batch", "load")
+    def load_batch(self, names, workers=None):
+        """Load several assets at once. Their GIF files are decoded on a
+        thread pool and the surfaces are created and scaled back on the
+        calling thread. Returns the batch report, also kept in batches"""
+        start = time.perf_counter()
+        todo = []
+        for name in names:
+            name = self.aliases.get(name, name)
+            if name in self.specs and name not in self.cache and name not in todo:
+                todo.append(name)
+        paths = sorted(
+            {
+                path
+                for name in todo
+                for path in self.specs[name].paths
+                if path.lower().endswith(".gif")
+                and not self.disk_cache.has(path, self.specs[name].variant)
+            }
+        )
+        decoded = {}
+        if paths:
+            with ThreadPoolExecutor(workers, "gif-decode") as pool:
+                futures = [(path, pool.submit(decode_gif, path)) for path in paths]
+                for path, future in futures:
+                    try:
+                        decoded[path] = future.result()
+                    except Exception as e:
+                        decoded[path] = e
+        loaded = 0
+        for name in todo:
+            spec = self.specs[name]
+            self.misses += 1
+            asset = self._load(spec, decoded)
+            if asset:
+                self._store(name, asset)
+                loaded += 1
+            else:
+                self._store_broken(name)
+        report = {
+            "assets": loaded,
+            "files": len(paths),
+            "seconds": time.perf_counter() - start,
+        }
+        self.batches.append(report)
+        return report
+
+    def _load_now(self, name):
+        if name in self.cache:
+            return self.cache[name][0] is not BROKEN
+        return self.load_batch([name])["assets"] > 0
+
+    def load_image(self, path, spec, decoded=None):
+        cached = self.disk_cache.get(path, spec.variant)
+        if cached is not None:
+            return cached[0]
+        if decoded is not None and path in decoded:
+            result = decoded[path]
+            if isinstance(result, Exception):
+                raise result
+            sprite = pygame.image.fromstring(result[0], result[1], "RGBA")
+        elif path.lower().endswith(".gif"):
+            sprite = load_gif(path)
+        else:
+            sprite = pygame.image.load(path).convert_alpha()
+        if spec.size is not None:
+            sprite = pygame.transform.scale(sprite, spec.size)
+        elif spec.scale != 1:
+            new_width = int(sprite.get_width() * spec.scale)
+            new_height = int(sprite.get_height() * spec.scale)
+            sprite = pygame.transform.scale(sprite, (new_width, new_height))
+        self.disk_cache.put(path, spec.variant, sprite)
+        return sprite
+
+    def _load(self, spec, decoded=None):
+        frames = []
+        for path in spec.paths:
+            try:
+                frames.append(self.load_image(path, spec, decoded))
+            except Exception as e:
+                if spec.single:
+                    print(f"Error loading sprite: {path} - {str(e)}")
+                    return None
+                print(f"Error loading animation frame: {path} - {str(e)}")
+                if not spec.skip_errors:
+                    return None
+        if spec.limit is not None:
+            frames = frames[: spec.limit]
+        if spec.single:
+            return frames[0]
+        return frames
+
+    def _get(self, name):
+        """Asset for name, loading it if needed. None if unknown or broken"""
+        name = self.aliases.get(name, name)
+        if name in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(name)
+            asset = self.cache[name][0]
+            return None if asset is BROKEN else asset
+        spec = self.specs.get(name)
+        if spec is None:
+            return None
+        self.misses += 1
+        asset = self._load(spec)
+        if not asset:
+            self._store_broken(name)
+            return None
+        self._store(name, asset)
+        return asset
+
+    def _store(self, name, asset):
+        frames = [asset] if isinstance(asset, pygame.Surface) else asset
+        size = sum(surface_bytes(frame) for frame in frames)
+        self.cache[name] = (asset, size)
+        self.used_bytes += size
+        self.loads += 1
+        self._evict()
+
+    def _store_broken(self, name):
+        self.cache[name] = (BROKEN, 0)
+        self.broken += 1
+
+    def _evict(self):
+        """Drop least recently used, unpinned assets until under budget"""
+        for name in list(self.cache):
+            if self.used_bytes <= self.max_bytes:
+                break
+            if name in self.pinned:
+                continue
+            self.evictions += 1
+            self.evicted_bytes += self.cache[name][1]
+            self._drop(name)
+
+    def _drop(self, name):
+        entry = self.cache.pop(name, None)
+        if entry is not None:
+            self.used_bytes -= entry[1]
+            if entry[0] is BROKEN:
+                self.broken -= 1
+
+    def pin(self, *names):
+        """Keep names loaded until unpinned, loading them now"""
+        for name in names:
+            name = self.aliases.get(name, name)
+            self.pinned.add(name)
+            self._get(name)
+
+    def unpin(self, *names):
+        for name in names:
+            self.pinned.discard(self.aliases.get(name, name))
+        self._evict()
+
+    def set_pinned(self, names):
+        """Pin exactly the assets a level needs, releasing the previous set"""
+        self.unpin(*self.pinned)
+        self.pin(*names)
+
+    def get_stats(self):
+        return {
+            "entries": len(self.cache) - self.broken,
+            "broken": self.broken,
+            "used_bytes": self.used_bytes,
+            "max_bytes": self.max_bytes,
+            "pinned": len(self.pinned),
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+            "batches": len(self.batches),
+            "batch_seconds": sum(batch["seconds"] for batch in self.batches),
+        }
 
     def get_sprite(self, name):
         """Get a single sprite by name"""
-        return self.sprites.get(name)
+        return self._get(name)
 
     def get_animation_frame(self, name: str, frame_index: int):
         """Get a specific frame from an animation"""
-        if name in self.animations:
-            frames = self.animations[name]
-            if not frames:  # If frames array is empty
-                print(f"Warning: No frames found for animation '{name}'")
+        if name in self.specs or name in self.aliases:
+            frames = self._get(name)
+            if not frames:  # The load error was printed when it failed
                 return None
             return frames[frame_index % len(frames)]
         print(f"Warning: Animation '{name}' not found")
@@ -1,85 +1,103 @@
+import os
 import pygame
 from constants import *
-import numpy as np
 from styles.animation import Animator
+from telemetry.trace import traced
+from maze.mazedata import readMazeFile
+from styles.sprite.asset_cache import assetcache
+from styles.sprite.atlas import getManifest
 
 BASETILEWIDTH = 16
 BASETILEHEIGHT = 16
 DEATH = 5
+SPRITESHEET = os.path.join("assets", "sprites", "spritesheet.png")
+SHEETS = {}
+DIRECTIONNAMES = {UP: "up", DOWN: "down", LEFT: "left", RIGHT: "right"}
+GHOSTNAMES = {BLINKY: "blinky", PINKY: "pinky", INKY: "inky", CLYDE: "clyde"}
+
+
+@traced("Spritesheet.load", "load")
+def loadSpritesheet(path=SPRITESHEET, colorkey=None):
+    cached = assetcache.get(path, "spritesheet")
+    if cached is not None:
+        sheet, extra = cached
+        sheet = sheet.convert()
+        sheet.set_colorkey(extra["colorkey"])
+        return sheet
+    sheet = pygame.image.load(path).convert()
+    transcolor = sheet.get_at((0, 0)) if colorkey is None else colorkey
+    sheet.set_colorkey(transcolor)
+    width = int(sheet.get_width() / BASETILEWIDTH * TILEWIDTH)
+    height = int(sheet.get_height() / BASETILEHEIGHT * TILEHEIGHT)
+    sheet = pygame.transform.scale(sheet, (width, height))
+    assetcache.put(path, "spritesheet", sheet, {"colorkey": list(transcolor)})
+    return sheet
+
+
+def getSpritesheet(path=None, colorkey=None):
+    """Every sprite class cuts its images from the same sheet, so it is
+    decoded and scaled once and shared. Without a path this is the atlas"""
+    if path is None:
+        manifest = getManifest()
+        path, colorkey = manifest.image, manifest.colorkey
+    if path not in SHEETS:
+        SHEETS[path] = loadSpritesheet(path, colorkey)
+    return SHEETS[path]
 
 
 class Spritesheet(object):
     def __init__(self):
-        self.sheet = pygame.image.load("assets\\sprites\\spritesheet.png").convert()
-        transcolor = self.sheet.get_at((0, 0))
-        self.sheet.set_colorkey(transcolor)
-        width = int(self.sheet.get_width() / BASETILEWIDTH * TILEWIDTH)
-        height = int(self.sheet.get_height() / BASETILEHEIGHT * TILEHEIGHT)
-        self.sheet = pygame.transform.scale(self.sheet, (width, height))
+        self.sheet = getSpritesheet()
 
     def getImage(self, x, y, width, height):
         x *= TILEWIDTH
         y *= TILEHEIGHT
-        self.sheet.set_clip(pygame.Rect(x, y, width, height))
-        return self.sheet.subsurface(self.sheet.get_clip())
+        # Clip without set_clip, the sheet is shared with the level preloader
+        rect = pygame.Rect(x, y, width, height).clip(self.sheet.get_rect())
+        return self.sheet.subsurface(rect)
+
+    def getFrame(self, name):
+        """Image of a named atlas frame"""
+        x, y, width, height = getManifest().getFrame(name)
+        return Spritesheet.getImage(self, x, y, width * TILEWIDTH, height * TILEHEIGHT)
+
+    def getAnimation(self, name, clock=None):
+        """Animator over the frame names of an atlas animation, timed by
+        clock or the shared one"""
+        animation = getManifest().getAnimation(name)
+        return Animator(
+            animation["frames"], animation["speed"], animation["loop"], clock
+        )
 
 
 class PacmanSprites(Spritesheet):
-    def __init__(self, entity):
+    def __init__(self, entity, clock=None):
         Spritesheet.__init__(self)
         self.entity = entity
         self.entity.image = self.getStartImage()
+        self.clock = clock
         self.animations = {}
         self.defineAnimations()
-        self.stopimage = (8, 0)
+        self.stopimage = "pacman.left.0"
 
     def getStartImage(self):
-        return self.getImage(8, 0)
-
-    def getImage(self, x, y):
-        return Spritesheet.getImage(self, x, y, 2 * TILEWIDTH, 2 * TILEHEIGHT)
+        return self.getFrame("pacman.left.0")
 
     def defineAnimations(self):
-        self.animations[LEFT] = Animator(((8, 0), (0, 0), (0, 2), (0, 0)))
-        self.animations[RIGHT] = Animator(((10, 0), (2, 0), (2, 2), (2, 0)))
-        self.animations[UP] = Animator(((10, 2), (6, 0), (6, 2), (6, 0)))
-        self.animations[DOWN] = Animator(((8, 2), (4, 0), (4, 2), (4, 0)))
-        self.animations[DEATH] = Animator(
-            (
-                (0, 12),
-                (2, 12),
-                (4, 12),
-                (6, 12),
-                (8, 12),
-                (10, 12),
-                (12, 12),
-                (14, 12),
-                (16, 12),
-                (18, 12),
-                (20, 12),
-            ),
-            speed=6,
-            loop=False,
-        )
+        for direction, name in DIRECTIONNAMES.items():
+            self.animations[direction] = self.getAnimation(f"pacman.{name}", self.clock)
+        self.animations[DEATH] = self.getAnimation("pacman.death", self.clock)
 
     def update(self, dt):
         if self.entity.alive == True:
-            if self.entity.direction == LEFT:
-                self.entity.image = self.getImage(*self.animations[LEFT].update(dt))
-                self.stopimage = (8, 0)
-            elif self.entity.direction == RIGHT:
-                self.entity.image = self.getImage(*self.animations[RIGHT].update(dt))
-                self.stopimage = (10, 0)
-            elif self.entity.direction == DOWN:
-                self.entity.image = self.getImage(*self.animations[DOWN].update(dt))
-                self.stopimage = (8, 2)
-            elif self.entity.direction == UP:
-                self.entity.image = self.getImage(*self.animations[UP].update(dt))
-                self.stopimage = (10, 2)
+            if self.entity.direction in DIRECTIONNAMES:
+                animation = self.animations[self.entity.direction]
+                self.entity.image = self.getFrame(animation.update(dt))
+                self.stopimage = animation.frames[0]
             elif self.entity.direction == STOP:
-                self.entity.image = self.getImage(*self.stopimage)
+                self.entity.image = self.getFrame(self.stopimage)
         else:
-            self.entity.image = self.getImage(*self.animations[DEATH].update(dt))
+            self.entity.image = self.getFrame(self.animations[DEATH].update(dt))
 
     def reset(self):
         for key in list(self.animations.keys()):
@@ -89,59 +107,36 @@ class PacmanSprites(Spritesheet):
 class GhostSprites(Spritesheet):
     def __init__(self, entity):
         Spritesheet.__init__(self)
-        self.x = {BLINKY: 0, PINKY: 2, INKY: 4, CLYDE: 6}
+        name = GHOSTNAMES[entity.name]
+        self.frames = {d: f"ghost.{name}.{n}" for d, n in DIRECTIONNAMES.items()}
+        self.eyes = {d: f"ghost.eyes.{n}" for d, n in DIRECTIONNAMES.items()}
         self.entity = entity
         self.entity.image = self.getStartImage()
 
     def getStartImage(self):
-        return self.getImage(self.x[self.entity.name], 4)
-
-    def getImage(self, x, y):
-        return Spritesheet.getImage(self, x, y, 2 * TILEWIDTH, 2 * TILEHEIGHT)
+        return self.getFrame(self.frames[UP])
 
     def update(self, dt):
-        x = self.x[self.entity.name]
+        direction = self.entity.direction
         if self.entity.mode.current in [SCATTER, CHASE]:
-            if self.entity.direction == LEFT:
-                self.entity.image = self.getImage(x, 8)
-            elif self.entity.direction == RIGHT:
-                self.entity.image = self.getImage(x, 10)
-            elif self.entity.direction == DOWN:
-                self.entity.image = self.getImage(x, 6)
-            elif self.entity.direction == UP:
-                self.entity.image = self.getImage(x, 4)
+            if direction in self.frames:
+                self.entity.image = self.getFrame(self.frames[direction])
         elif self.entity.mode.current == FREIGHT:
-            self.entity.image = self.getImage(10, 4)
+            self.entity.image = self.getFrame("ghost.freight")
         elif self.entity.mode.current == SPAWN:
-            if self.entity.direction == LEFT:
-                self.entity.image = self.getImage(8, 8)
-            elif self.entity.direction == RIGHT:
-                self.entity.image = self.getImage(8, 10)
-            elif self.entity.direction == DOWN:
-                self.entity.image = self.getImage(8, 6)
-            elif self.entity.direction == UP:
-                self.entity.image = self.getImage(8, 4)
+            if direction in self.eyes:
+                self.entity.image = self.getFrame(self.eyes[direction])
 
 
 class FruitSprites(Spritesheet):
     def __init__(self, entity, level):
         Spritesheet.__init__(self)
         self.entity = entity
-        self.fruits = {
-            0: (16, 8),
-            1: (18, 8),
-            2: (20, 8),
-            3: (16, 10),
-            4: (18, 10),
-            5: (20, 10),
-        }
+        self.fruits = getManifest().getAnimation("fruit")["frames"]
         self.entity.image = self.getStartImage(level % len(self.fruits))
 
     def getStartImage(self, key):
-        return self.getImage(*self.fruits[key])
-
-    def getImage(self, x, y):
-        return Spritesheet.getImage(self, x, y, 2 * TILEWIDTH, 2 * TILEHEIGHT)
+        return self.getFrame(self.fruits[key])
 
 
 class LifeSprites(Spritesheet):
@@ -156,10 +151,7 @@ class LifeSprites(Spritesheet):
     def resetLives(self, numlives):
         self.images = []
         for i in range(numlives):
-            self.images.append(self.getImage(0, 0))
-
-    def getImage(self, x, y):
-        return Spritesheet.getImage(self, x, y, 2 * TILEWIDTH, 2 * TILEHEIGHT)
+            self.images.append(self.getFrame("pacman.life"))
 
 
 class MazeSprites(Spritesheet):
@@ -167,24 +159,25 @@ class MazeSprites(Spritesheet):
         Spritesheet.__init__(self)
         self.data = self.readMazeFile(mazefile)
         self.rotdata = self.readMazeFile(rotfile)
-
-    def getImage(self, x, y):
-        return Spritesheet.getImage(self, x, y, TILEWIDTH, TILEHEIGHT)
+        self.nrows, self.ncols = self.data.shape
 
     def readMazeFile(self, mazefile):
-        return np.loadtxt(mazefile, dtype="<U1")
+        return readMazeFile(mazefile)
+
+    def getSize(self):
+        return self.ncols * TILEWIDTH, self.nrows * TILEHEIGHT
 
+    @traced("MazeSprites.constructBackground", "load")
     def constructBackground(self, background, y):
         for row in list(range(self.data.shape[0])):
             for col in list(range(self.data.shape[1])):
                 if self.data[row][col].isdigit():
-                    x = int(self.data[row][col]) + 12
-                    sprite = self.getImage(x, y)
+                    sprite = self.getFrame(f"maze.{self.data[row][col]}.{y}")
                     rotval = int(self.rotdata[row][col])
                     sprite = self.rotate(sprite, rotval)
                     background.blit(sprite, (col * TILEWIDTH, row * TILEHEIGHT))
                 elif self.data[row][col] == "=":
-                    sprite = self.getImage(10, 8)
+                    sprite = self.getFrame("maze.door")
                     background.blit(sprite, (col * TILEWIDTH, row * TILEHEIGHT))
 
         return background
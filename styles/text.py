@@ -1,6 +1,41 @@
 import pygame
 from movement.vector import Vector2
 from constants import *
+from scheduler import Scheduler
+
+FONTPATH = "PressStart2P-Regular.ttf"
+FONTS = {}
+LABELS = {}
+MAXLABELS = 256
+# Ghost and fruit values, rendered up front so eating something never
+# has to render text
+POPUPPOINTS = (100, 120, 140, 160, 180, 200, 300, 400, 500, 700, 800, 1000)
+POPUPPOINTS += (1600, 2000, 3000, 5000)
+POPUPSIZE = 8
+POOLSIZE = 4
+
+
+def getFont(size, fontpath=FONTPATH):
+    """Fonts are shared, opening one is far slower than rendering with it"""
+    key = (fontpath, size)
+    if key not in FONTS:
+        if not FONTS:
+            # A font does not outlive pygame.quit(), which also forgets the
+            # functions registered before it
+            pygame.register_quit(FONTS.clear)
+        FONTS[key] = pygame.font.Font(fontpath, size)
+    return FONTS[key]
+
+
+def getLabel(text, color, size):
+    """Rendered popup text, shared by every popup showing the same string"""
+    key = (text, tuple(color), size)
+    label = LABELS.get(key)
+    if label is None:
+        if len(LABELS) >= MAXLABELS:
+            LABELS.clear()
+        label = LABELS[key] = getFont(size).render(text, 1, color)
+    return label
 
 
 class Text(object):
@@ -11,15 +46,13 @@ class Text(object):
         self.size = size
         self.visible = visible
         self.position = Vector2(x, y)
-        self.timer = 0
         self.lifespan = time
         self.label = None
-        self.destroy = False
-        self.setupFont("PressStart2P-Regular.ttf")
+        self.setupFont(FONTPATH)
         self.createLabel()
 
     def setupFont(self, fontpath):
-        self.font = pygame.font.Font(fontpath, self.size)
+        self.font = getFont(self.size, fontpath)
 
     def createLabel(self):
         self.label = self.font.render(self.text, 1, self.color)
@@ -28,34 +61,67 @@ class Text(object):
         self.text = str(newtext)
         self.createLabel()
 
-    def update(self, dt):
-        if self.lifespan is not None:
-            self.timer += dt
-            if self.timer >= self.lifespan:
-                self.timer = 0
-                self.lifespan = None
-                self.destroy = True
-
     def render(self, screen):
         if self.visible:
             x, y = self.position.asTuple()
             screen.blit(self.label, (x, y))
 
 
+class Popup(object):
+    """A reusable slot for a short-lived text, like the points shown where
+    a ghost or fruit was eaten. The position is in maze coordinates."""
+
+    __slots__ = ("position", "label")
+
+    def __init__(self):
+        self.position = Vector2()
+        self.label = None
+
+    def render(self, screen, camera=None):
+        p = self.position
+        if camera is not None:
+            p = camera.apply(p)
+        screen.blit(self.label, (p.x, p.y))
+
+
 class TextGroup(object):
     def __init__(self):
         self.nextid = 10
         self.alltext = {}
+        # Texts with a lifespan are removed by timers, which keep running
+        # while the game is paused
+        self.scheduler = Scheduler()
+        self.popups = []
+        self.freePopups = [Popup() for i in range(POOLSIZE)]
+        for points in POPUPPOINTS:
+            getLabel(str(points), WHITE, POPUPSIZE)
         self.setupText()
         self.showText(READYTXT)
 
     def addText(self, text, color, x, y, size, time=None, id=None):
         self.nextid += 1
         self.alltext[self.nextid] = Text(text, color, x, y, size, time=time, id=id)
+        if time is not None:
+            self.scheduler.after(time, self.removeText, self.nextid)
         return self.nextid
 
     def removeText(self, id):
-        self.alltext.pop(id)
+        self.alltext.pop(id, None)
+
+    def addPopup(self, text, x, y, time=1, color=WHITE, size=POPUPSIZE):
+        """Show text at (x, y) for time seconds in a pooled slot"""
+        popup = self.freePopups.pop() if self.freePopups else Popup()
+        popup.label = getLabel(str(text), color, size)
+        popup.position.x = x
+        popup.position.y = y
+        self.popups.append(popup)
+        self.scheduler.after(time, self.removePopup, popup)
+        return popup
+
+    def removePopup(self, popup):
+        self.popups.remove(popup)
+        popup.label = None
+        self.freePopups.append(popup)
 
     def setupText(self):
         size = TILEHEIGHT
@@ -76,10 +142,7 @@ class TextGroup(object):
         self.addText("LEVEL", WHITE, 23 * TILEWIDTH, 0, size)
 
     def update(self, dt):
-        for tkey in list(self.alltext.keys()):
-            self.alltext[tkey].update(dt)
-            if self.alltext[tkey].destroy:
-                self.removeText(tkey)
+        self.scheduler.update(dt)
 
     def showText(self, id):
         self.hideText()
@@ -100,6 +163,9 @@ class TextGroup(object):
         if id in self.alltext.keys():
             self.alltext[id].setText(value)
 
-    def render(self, screen):
-        for tkey in list(self.alltext.keys()):
-            self.alltext[tkey].render(screen)
+    def render(self, screen, camera=None):
+        """Draw the fixed texts, then the popups through the camera"""
+        for text in self.alltext.values():
+            text.render(screen)
+        for popup in self.popups:
+            popup.render(screen, camera)
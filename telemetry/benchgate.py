@@ -0,0 +1,244 @@
+"""Compare a benchmark run against a stored baseline.
+
+Timings are divided by calibration loops measured on the same machine, so
+a slower CI runner does not show up as a regression. Each benchmark keeps
+the time of every round, and the medians of the two runs are compared
+with a confidence interval around each: a benchmark only fails when even
+the fastest median its rounds allow is past the threshold. Usage:
+
+    python -m telemetry.benchgate reports/benchmarks.json tests/benchmarks/baseline.json
+    python -m telemetry.benchgate --update reports/benchmarks.json tests/benchmarks/baseline.json
+
+A benchmark in the baseline that did not run fails the gate, pass
+--allow-missing when only part of the suite was run on purpose.
+"""
+
+import argparse
+import json
+import math
+import statistics
+import sys
+import time
+import numpy as np
+import pygame
+
+# Slowdown allowed before a benchmark fails, the baseline can set its own
+# per benchmark
+DEFAULTTHRESHOLD = 0.25
+# Chance that the true median lies within the interval taken around the
+# median of the rounds
+CONFIDENCE = 0.95
+
+
+def pythonLoop(loops=200000):
+    total = 0
+    for i in range(loops):
+        total += i * i % 7
+    return total
+
+
+def numpyLoop(size=100000, loops=80):
+    values = np.arange(size, dtype=float)
+    for _ in range(loops):
+        values = np.sqrt(values * values + 1.0)
+    return values
+
+
+def blitLoop(loops=40):
+    screen = pygame.Surface((448, 576))
+    tile = pygame.Surface((16, 16))
+    tile.fill((255, 255, 0))
+    for _ in range(loops):
+        for y in range(0, 576, 16):
+            for x in range(0, 448, 16):
+                screen.blit(tile, (x, y))
+    return screen
+
+
+CALIBRATIONS = {"python": pythonLoop, "numpy": numpyLoop, "blit": blitLoop}
+
+
+def calibrate(rounds=7):
+    """Median time of a pure Python loop, NumPy array work and surface
+    blits, the kinds of work the benchmarks are made of"""
+    parts = {}
+    for name, loop in CALIBRATIONS.items():
+        times = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            loop()
+            times.append(time.perf_counter() - start)
+        parts[name] = statistics.median(times)
+    return parts
+
+
+def calibrationUnit(parts):
+    """Geometric mean of the calibration parts, the unit every benchmark
+    is expressed in"""
+    return math.exp(statistics.mean(math.log(value) for value in parts.values()))
+
+
+def medianInterval(times):
+    """Distribution-free confidence interval of the median, the order
+    statistics around it that hold it with CONFIDENCE. Too few rounds give
+    the whole range"""
+    times = sorted(times)
+    n = len(times)
+    lower = 0
+    below = 1 / 2**n
+    while lower + 1 < n // 2:
+        nextBelow = below + math.comb(n, lower + 1) / 2**n
+        if 2 * nextBelow > 1 - CONFIDENCE:
+            break
+        lower += 1
+        below = nextBelow
+    return times[lower], times[n - 1 - lower]
+
+
+def loadResults(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def normalize(results):
+    """(median, low, high) of each benchmark in calibration units, low and
+    high bounding the median with CONFIDENCE"""
+    calibration = results["environment"]["calibration_s"]
+    normalized = {}
+    for name, values in results["benchmarks"].items():
+        times = [value / calibration for value in values["times_s"]]
+        normalized[name] = (statistics.median(times),) + medianInterval(times)
+    return normalized
+
+
+def compare(current, baseline):
+    """Rows of (name, baseline_s, current_s, change, least, threshold,
+    status). current_s is scaled onto the baseline machine's speed, change
+    is the change of the medians and least the smallest change the two
+    confidence intervals allow, which is what fails the gate"""
+    currentNorm = normalize(current)
+    baselineNorm = normalize(baseline)
+    baselineCal = baseline["environment"]["calibration_s"]
+    thresholds = baseline.get("thresholds", {})
+    default = thresholds.get("default", DEFAULTTHRESHOLD)
+    rows = []
+    for name in sorted(set(currentNorm) | set(baselineNorm)):
+        threshold = thresholds.get(name, default)
+        if name not in baselineNorm:
+            median = currentNorm[name][0]
+            rows.append(
+                (name, None, median * baselineCal, None, None, threshold, "new")
+            )
+            continue
+        if name not in currentNorm:
+            median = baselineNorm[name][0]
+            rows.append(
+                (name, median * baselineCal, None, None, None, threshold, "missing")
+            )
+            continue
+        currentMedian, currentLow, _ = currentNorm[name]
+        baselineMedian, _, baselineHigh = baselineNorm[name]
+        change = currentMedian / baselineMedian - 1
+        least = currentLow / baselineHigh - 1
+        status = "REGRESSED" if least > threshold else "ok"
+        rows.append(
+            (
+                name,
+                baselineMedian * baselineCal,
+                currentMedian * baselineCal,
+                change,
+                least,
+                threshold,
+                status,
+            )
+        )
+    return rows
+
+
+def regressions(rows, allowMissing=False):
+    """Rows that fail the gate: surely slower than their threshold, or in
+    the baseline but not in the run unless allowMissing"""
+    failing = ("REGRESSED",) if allowMissing else ("REGRESSED", "missing")
+    return [row for row in rows if row[-1] in failing]
+
+
+def formatTime(seconds):
+    if seconds is None:
+        return "-"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f} ms"
+    return f"{seconds * 1e6:.2f} us"
+
+
+def formatChange(change):
+    return "-" if change is None else f"{change:+.1%}"
+
+
+def formatTable(rows):
+    width = max([len("benchmark")] + [len(row[0]) for row in rows])
+    lines = [
+        f"{'benchmark':<{width}}  {'baseline':>12}  {'current':>12}  "
+        f"{'change':>8}  {'least':>8}  {'limit':>6}  status"
+    ]
+    for name, base, cur, change, least, threshold, status in rows:
+        lines.append(
+            f"{name:<{width}}  {formatTime(base):>12}  {formatTime(cur):>12}  "
+            f"{formatChange(change):>8}  {formatChange(least):>8}  "
+            f"{threshold:>6.0%}  {status}"
+        )
+    return "\n".join(lines)
+
+
+def updateBaseline(current, baselinePath):
+    """Write the current run as the new baseline, keeping the thresholds"""
+    thresholds = {"default": DEFAULTTHRESHOLD}
+    try:
+        thresholds = loadResults(baselinePath).get("thresholds", thresholds)
+    except FileNotFoundError:
+        pass
+    baseline = {
+        "environment": current["environment"],
+        "thresholds": thresholds,
+        "benchmarks": {
+            name: {"median_s": values["median_s"], "times_s": values["times_s"]}
+            for name, values in current["benchmarks"].items()
+        },
+    }
+    with open(baselinePath, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark regression gate")
+    parser.add_argument("current", help="Benchmark JSON from this run")
+    parser.add_argument("baseline", help="Committed baseline JSON")
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="Replace the baseline with the current results",
+    )
+    parser.add_argument(
+        "--allow-missing",
+        action="store_true",
+        help="Do not fail on baseline benchmarks that did not run",
+    )
+    args = parser.parse_args(argv)
+
+    current = loadResults(args.current)
+    if args.update:
+        updateBaseline(current, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    rows = compare(current, loadResults(args.baseline))
+    print(formatTable(rows))
+    failed = regressions(rows, args.allow_missing)
+    if failed:
+        print(f"\n{len(failed)} benchmark(s) regressed or did not run")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+import socket
+import sys
+import time
+
+SUBBITS = 7
+SUBBUCKETS = 1 << SUBBITS
+HALF = SUBBUCKETS >> 1
+QUANTILES = ((0.5, "p50"), (0.9, "p90"), (0.99, "p99"), (0.999, "p999"))
+
+
+def bucketIndex(value):
+    """Log-linear bucket for a non-negative integer. Values below
+    SUBBUCKETS get their own bucket; above that every power of two is split
+    into HALF buckets, so a bucket is never wider than 1/HALF of its value"""
+    if value < SUBBUCKETS:
+        return value
+    shift = value.bit_length() - SUBBITS
+    return shift * HALF + (value >> shift)
+
+
+def bucketRange(index):
+    """Lowest and highest value that land in a bucket"""
+    if index < SUBBUCKETS:
+        return index, index
+    shift = index // HALF - 1
+    mantissa = index - shift * HALF
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+class LogHistogram(object):
+    """HDR-style histogram of integer values (microseconds here) with a
+    fixed relative precision and a fixed number of buckets"""
+
+    def __init__(self, highest=60000000):
+        self.highest = highest
+        self.counts = [0] * (bucketIndex(highest) + 1)
+        self.reset()
+
+    def reset(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, value):
+        value = min(max(int(value), 0), self.highest)
+        self.counts[bucketIndex(value)] += 1
+        self.total += 1
+        if value > self.max:
+            self.max = value
+        if self.min is None or value < self.min:
+            self.min = value
+
+    def valueAt(self, quantile):
+        """Highest value of the bucket holding the given quantile, capped at
+        the largest value seen"""
+        if self.total == 0:
+            return 0
+        rank = max(1, int(quantile * self.total + 0.999999))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bucketRange(index)[1], self.max)
+        return self.max
+
+    def getStats(self):
+        stats = {name: self.valueAt(q) for q, name in QUANTILES}
+        stats["max"] = self.max
+        stats["min"] = self.min or 0
+        stats["count"] = self.total
+        return stats
+
+
+class FrameTimeReporter(object):
+    """Records the wall time between frames and writes the percentiles as
+    InfluxDB line protocol every interval seconds, one line per window plus
+    a cumulative line on close. Values are in milliseconds."""
+
+    def __init__(self, path="-", interval=10.0, build="dev"):
+        self.path = path
+        self.interval = interval
+        self.tags = f"host={socket.gethostname()},build={build}"
+        self.window = LogHistogram()
+        self.total = LogHistogram()
+        self.out = None
+        self.last = None
+        self.windowStart = None
+
+    def open(self):
+        if self.path == "-":
+            self.out = sys.stdout
+        else:
+            self.out = open(self.path, "a")
+
+    def frame(self, now=None):
+        if now is None:
+            now = time.perf_counter()
+        if self.last is not None:
+            elapsed = int((now - self.last) * 1e6)
+            self.window.record(elapsed)
+            self.total.record(elapsed)
+        else:
+            self.windowStart = now
+        self.last = now
+        if now - self.windowStart >= self.interval:
+            self.export("frame_time", self.window)
+            self.window.reset()
+            self.windowStart = now
+
+    def formatLine(self, measurement, histogram, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time_ns()
+        stats = histogram.getStats()
+        fields = [f"count={stats['count']}i"]
+        for key in ("p50", "p90", "p99", "p999", "max"):
+            fields.append(f"{key}={stats[key] / 1000:.3f}")
+        return f"{measurement},{self.tags} {','.join(fields)} {timestamp}"
+
+    def export(self, measurement, histogram):
+        if self.out is None:
+            self.open()
+        if histogram.total > 0:
+            self.out.write(self.formatLine(measurement, histogram) + "\n")
+            self.out.flush()
+
+    def close(self):
+        self.export("frame_time_total", self.total)
+        if self.out is not None and self.out is not sys.stdout:
+            self.out.close()
+        self.out = None
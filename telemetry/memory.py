@@ -0,0 +1,177 @@
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+IGNORED = (
+    tracemalloc.Filter(False, os.path.join(os.path.dirname(__file__), "*")),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class StageMemory(object):
+    def __init__(self):
+        self.calls = 0
+        self.netBytes = 0
+        self.netBlocks = 0
+        self.peakBytes = 0
+        self.gcCount = 0
+        self.gcTime = 0
+
+    def asDict(self):
+        calls = max(self.calls, 1)
+        return {
+            "calls": self.calls,
+            "net_bytes_mean": self.netBytes / calls,
+            "net_blocks_mean": self.netBlocks / calls,
+            "peak_bytes_max": self.peakBytes,
+            "gc_count": self.gcCount,
+            "gc_ms_total": self.gcTime * 1e3,
+        }
+
+
+class MemoryTelemetry(object):
+    """Opt-in memory instrumentation for the game loop.
+
+    The profiler calls mark() when a stage begins and endStage() when it
+    ends, so traced bytes, pymalloc blocks and garbage collections are
+    charged to the stage they happened in. Every sampleInterval frames a
+    tracemalloc snapshot is compared with the previous one to find the
+    lines that allocated the most."""
+
+    def __init__(self, sampleInterval=60, traceFrames=1, topSites=15):
+        self.enabled = False
+        self.sampleInterval = sampleInterval
+        self.traceFrames = traceFrames
+        self.topSites = topSites
+        self.stages = {}
+        self.frames = 0
+        self.frameBlocks = 0
+        self.maxFrameBlocks = 0
+        self.sites = {}
+        self.sampledFrames = 0
+        self.gcStats = {0: [0, 0, 0], 1: [0, 0, 0], 2: [0, 0, 0]}
+        self.gcStart = None
+        self.pendingGC = [0, 0]
+        self.snapshot = None
+        self.frameStartBlocks = 0
+        self.markBytes = 0
+        self.markBlocks = 0
+
+    def start(self):
+        if self.enabled:
+            return
+        tracemalloc.start(self.traceFrames)
+        gc.callbacks.append(self.onGC)
+        self.enabled = True
+        self.snapshot = self.takeSnapshot()
+        self.frameStartBlocks = sys.getallocatedblocks()
+        self.mark()
+
+    def stop(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        gc.callbacks.remove(self.onGC)
+        tracemalloc.stop()
+
+    def onGC(self, phase, info):
+        if phase == "start":
+            self.gcStart = time.perf_counter()
+        elif self.gcStart is not None:
+            pause = time.perf_counter() - self.gcStart
+            self.gcStart = None
+            stats = self.gcStats[info["generation"]]
+            stats[0] += 1
+            stats[1] += pause
+            stats[2] = max(stats[2], pause)
+            self.pendingGC[0] += 1
+            self.pendingGC[1] += pause
+
+    def mark(self):
+        if self.enabled:
+            tracemalloc.reset_peak()
+            self.markBytes = tracemalloc.get_traced_memory()[0]
+            self.markBlocks = sys.getallocatedblocks()
+            self.pendingGC = [0, 0]
+
+    def endStage(self, name):
+        if not self.enabled:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        blocks = sys.getallocatedblocks()
+        if name not in self.stages:
+            self.stages[name] = StageMemory()
+        stage = self.stages[name]
+        stage.calls += 1
+        stage.netBytes += current - self.markBytes
+        stage.netBlocks += blocks - self.markBlocks
+        stage.peakBytes = max(stage.peakBytes, peak - self.markBytes)
+        stage.gcCount += self.pendingGC[0]
+        stage.gcTime += self.pendingGC[1]
+        self.mark()
+
+    def endFrame(self):
+        if not self.enabled:
+            return
+        self.frames += 1
+        blocks = sys.getallocatedblocks()
+        self.frameBlocks += blocks - self.frameStartBlocks
+        self.maxFrameBlocks = max(self.maxFrameBlocks, blocks - self.frameStartBlocks)
+        self.frameStartBlocks = blocks
+        if self.frames % self.sampleInterval == 0:
+            self.sample()
+
+    def takeSnapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(IGNORED)
+
+    def sample(self):
+        snapshot = self.takeSnapshot()
+        for stat in snapshot.compare_to(self.snapshot, "lineno"):
+            if stat.count_diff <= 0 and stat.size_diff <= 0:
+                continue
+            frame = stat.traceback[0]
+            key = f"{frame.filename}:{frame.lineno}"
+            site = self.sites.setdefault(key, [0, 0])
+            site[0] += max(stat.count_diff, 0)
+            site[1] += max(stat.size_diff, 0)
+        self.sampledFrames += self.sampleInterval
+        self.snapshot = snapshot
+        self.mark()
+
+    def getSummary(self):
+        frames = max(self.frames, 1)
+        sampled = max(self.sampledFrames, 1)
+        sites = sorted(self.sites.items(), key=lambda item: item[1][1], reverse=True)
+        return {
+            "frames": self.frames,
+            "sample_interval": self.sampleInterval,
+            "net_blocks_per_frame": self.frameBlocks / frames,
+            "net_blocks_max": self.maxFrameBlocks,
+            "gc": {
+                str(generation): {
+                    "collections": stats[0],
+                    "total_ms": stats[1] * 1e3,
+                    "max_ms": stats[2] * 1e3,
+                }
+                for generation, stats in self.gcStats.items()
+            },
+            "stages": {name: stage.asDict() for name, stage in self.stages.items()},
+            "top_sites": [
+                {
+                    "site": key,
+                    "blocks_per_frame": count / sampled,
+                    "bytes_per_frame": size / sampled,
+                }
+                for key, (count, size) in sites[: self.topSites]
+            ],
+        }
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.getSummary(), f, indent=2)
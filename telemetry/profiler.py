@@ -0,0 +1,110 @@
+import json
+import math
+import time
+import pygame
+from collections import deque
+from constants import *
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    if len(ordered) == 0:
+        return 0
+    index = min(len(ordered), max(1, math.ceil(len(ordered) * fraction))) - 1
+    return ordered[index]
+
+
+class FrameProfiler(object):
+    """Times named stages of the game loop with perf_counter_ns and keeps a
+    rolling window of samples per stage. When disabled, begin() and end()
+    return straight away so the calls can stay in the loop. An attached
+    MemoryTelemetry is told about the same stage boundaries."""
+
+    def __init__(self, enabled=False, window=300):
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}
+        self.overlay = False
+        self.labels = []
+        self.font = None
+        self.refreshTime = 0.5
+        self.refreshTimer = 0
+        self.memory = None
+
+    def begin(self):
+        if self.enabled:
+            if self.memory is not None:
+                self.memory.mark()
+            return time.perf_counter_ns()
+        return 0
+
+    def end(self, name, start):
+        if self.enabled:
+            elapsed = time.perf_counter_ns() - start
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=self.window)
+            self.samples[name].append(elapsed)
+            if self.memory is not None:
+                self.memory.endStage(name)
+
+    def endFrame(self, start):
+        self.end("frame", start)
+        if self.enabled and self.memory is not None:
+            self.memory.endFrame()
+
+    def toggleOverlay(self):
+        self.overlay = not self.overlay
+        if self.overlay:
+            self.enabled = True
+            self.refreshTimer = self.refreshTime
+
+    def reset(self):
+        self.samples = {}
+
+    def getStats(self):
+        stats = {}
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            count = len(ordered)
+            stats[name] = {
+                "count": count,
+                "mean_ms": sum(ordered) / count / 1e6,
+                "p95_ms": percentile(ordered, 0.95) / 1e6,
+                "p99_ms": percentile(ordered, 0.99) / 1e6,
+                "max_ms": ordered[-1] / 1e6,
+            }
+        return stats
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump({"window": self.window, "stages": self.getStats()}, f, indent=2)
+
+    def update(self, dt):
+        if self.overlay:
+            self.refreshTimer += dt
+            if self.refreshTimer >= self.refreshTime:
+                self.refreshTimer = 0
+                self.createLabels()
+
+    def formatLines(self):
+        lines = [f"{'stage (ms)':<20}{'mean':>6}{'p95':>6}{'p99':>6}"]
+        for name, stat in self.getStats().items():
+            lines.append(
+                f"{name[:20]:<20}{stat['mean_ms']:6.2f}"
+                f"{stat['p95_ms']:6.2f}{stat['p99_ms']:6.2f}"
+            )
+        return lines
+
+    def createLabels(self):
+        if self.font is None:
+            self.font = pygame.font.Font("PressStart2P-Regular.ttf", 8)
+        self.labels = [
+            self.font.render(line, 1, GREEN, BLACK) for line in self.formatLines()
+        ]
+
+    def render(self, screen):
+        if self.overlay:
+            y = TILEHEIGHT * 2
+            for label in self.labels:
+                screen.blit(label, (0, y))
+                y += label.get_height() + 1
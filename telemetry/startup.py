@@ -0,0 +1,60 @@
+import time
+from telemetry.trace import NULLSPAN
+
+
+class Phase(object):
+    __slots__ = ("report", "name", "start")
+
+    def __init__(self, report, name):
+        self.report = report
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.report.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class StartupReport(object):
+    """Splits time-to-first-frame into phases. Time not covered by a phase
+    is reported as "other" so the rows always add up to the total."""
+
+    def __init__(self):
+        self.enabled = False
+        self.origin = 0
+        self.phases = {}
+
+    def start(self, origin):
+        self.enabled = True
+        self.origin = origin
+        self.phases = {}
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0) + seconds
+
+    def phase(self, name):
+        if self.enabled:
+            return Phase(self, name)
+        return NULLSPAN
+
+    def finish(self, now=None):
+        """Stop recording and return the report lines"""
+        if not self.enabled:
+            return []
+        if now is None:
+            now = time.perf_counter()
+        self.enabled = False
+        total = now - self.origin
+        rows = list(self.phases.items())
+        rows.append(("other", total - sum(self.phases.values())))
+        lines = ["time to first frame"]
+        for name, seconds in rows:
+            lines.append(f"  {name:<12}{seconds * 1e3:8.1f} ms")
+        lines.append(f"  {'total':<12}{total * 1e3:8.1f} ms")
+        return lines
+
+
+startup = StartupReport()
@@ -0,0 +1,142 @@
+import functools
+import json
+import os
+import threading
+import time
+
+
+class NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULLSPAN = NullSpan()
+
+
+class Span(object):
+    __slots__ = ("recorder", "name", "category", "args", "start")
+
+    def __init__(self, recorder, name, category, args):
+        self.recorder = recorder
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.recorder.addSpan(self.name, self.category, self.start, end, self.args)
+        return False
+
+
+class TraceRecorder(object):
+    """Collects spans as Chrome trace events (chrome://tracing, Perfetto).
+    Events are buffered in memory and a background thread appends them to
+    the file, so the game loop never waits on disk."""
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.lock = threading.Lock()
+        self.file = None
+        self.thread = None
+        self.stopping = threading.Event()
+        self.flushInterval = 1.0
+        self.origin = time.perf_counter_ns()
+        self.first = True
+
+    def start(self, path, flushInterval=1.0):
+        self.file = open(path, "w")
+        self.file.write("[\n")
+        self.first = True
+        self.flushInterval = flushInterval
+        self.origin = time.perf_counter_ns()
+        self.stopping.clear()
+        self.addMetadata()
+        self.enabled = True
+        self.thread = threading.Thread(
+            target=self.writerLoop, name="trace-writer", daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        self.stopping.set()
+        self.thread.join()
+        self.file.write("\n]\n")
+        self.file.close()
+        self.file = None
+        self.thread = None
+
+    def span(self, name, category="game", **args):
+        if self.enabled:
+            return Span(self, name, category, args)
+        return NULLSPAN
+
+    def addSpan(self, name, category, start, end, args=None):
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - self.origin) / 1000,
+            "dur": (end - start) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.events.append(event)
+
+    def addMetadata(self):
+        with self.lock:
+            self.events.append(
+                {
+                    "name": "process_name",
+                    "ph": "M",
+                    "pid": os.getpid(),
+                    "args": {"name": "pacman"},
+                }
+            )
+
+    def writerLoop(self):
+        while not self.stopping.wait(self.flushInterval):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        with self.lock:
+            events, self.events = self.events, []
+        if len(events) == 0 or self.file is None:
+            return
+        lines = [json.dumps(event) for event in events]
+        if not self.first:
+            self.file.write(",\n")
+        self.file.write(",\n".join(lines))
+        self.file.flush()
+        self.first = False
+
+
+tracer = TraceRecorder()
+
+
+def traced(name, category="game"):
+    """Decorator form of tracer.span for whole functions"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name, category):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
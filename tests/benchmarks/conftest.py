@@ -0,0 +1,125 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import json
+import platform
+import statistics
+import sys
+import time
+import pytest
+import pygame
+import numpy as np
+from constants import *
+from telemetry.benchgate import calibrate, calibrationUnit
+
+RESULTS = {}
+# How to run each benchmark again, for the gate to retry a failing one
+RERUNS = {}
+CALIBRATION = {}
+
+
+class Benchmark(object):
+    """Times a callable over several rounds and stores the result under a
+    name for the JSON report written at the end of the session. Enough
+    rounds are kept for the gate to put a confidence interval around the
+    median."""
+
+    def __init__(self, rounds=25, iterations=20):
+        self.rounds = rounds
+        self.iterations = iterations
+
+    def __call__(self, name, func, rounds=None, iterations=None, setup=None):
+        rounds = rounds or self.rounds
+        iterations = iterations or self.iterations
+        RERUNS[name] = lambda: self(name, func, rounds, iterations, setup)
+        times = []
+        for _ in range(rounds):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            for _ in range(iterations):
+                func()
+            times.append((time.perf_counter() - start) / iterations)
+        RESULTS[name] = {
+            "mean_s": statistics.mean(times),
+            "median_s": statistics.median(times),
+            "min_s": min(times),
+            "stdev_s": statistics.stdev(times) if rounds > 1 else 0,
+            "ops_per_s": 1 / statistics.median(times),
+            "rounds": rounds,
+            "iterations": iterations,
+            "times_s": times,
+        }
+        return RESULTS[name]
+
+
+def getCalibration():
+    if "parts" not in CALIBRATION:
+        CALIBRATION["parts"] = calibrate()
+    return CALIBRATION["parts"]
+
+
+def getEnvironment():
+    return {
+        "calibration_s": calibrationUnit(getCalibration()),
+        "calibration": getCalibration(),
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "pygame": pygame.version.ver,
+        "numpy": np.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+@pytest.fixture
+def bench():
+    return Benchmark()
+
+
+@pytest.fixture
+def reruns():
+    return RERUNS
+
+
+@pytest.fixture
+def results():
+    """Everything benchmarked so far in this session, in report form"""
+    return {"environment": getEnvironment(), "benchmarks": RESULTS}
+
+
+@pytest.fixture(scope="session")
+def display():
+    pygame.init()
+    return pygame.display.set_mode(SCREENSIZE, 0, 32)
+
+
+@pytest.fixture
+def game(display):
+    from main import GameController
+
+    controller = GameController((0, 0, 0))
+    controller.startGame()
+    controller.pause.paused = False
+    return controller
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if len(RESULTS) == 0:
+        return
+    path = session.config.getoption("benchmark_json")
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(
+            {"environment": getEnvironment(), "benchmarks": RESULTS},
+            f,
+            indent=2,
+            sort_keys=True,
+        )
@@ -0,0 +1,47 @@
+import pytest
+import pygame
+from constants import *
+from maze.mazedata import MazeData
+from movement.nodes import NodeGroup
+from styles.sprite.atlas import getManifest
+from styles.sprite.sprites import MazeSprites, loadSpritesheet
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.mark.parametrize("level", [0, 1])
+def test_nodegroup_construction(display, bench, level):
+    mazedata = MazeData()
+    mazedata.loadMaze(level)
+    maze = mazedata.obj
+
+    def build():
+        nodes = NodeGroup(maze.getFile())
+        maze.setPortalPairs(nodes)
+        maze.connectHomeNodes(nodes)
+
+    bench(f"NodeGroup.build.{maze.name}", build)
+
+
+@pytest.mark.parametrize("level", [0, 1])
+def test_construct_background(display, bench, level):
+    mazedata = MazeData()
+    mazedata.loadMaze(level)
+    maze = mazedata.obj
+    mazesprites = MazeSprites(maze.getFile(), maze.getFile("_rotation"))
+    background = pygame.surface.Surface(mazesprites.getSize()).convert()
+
+    bench(
+        f"MazeSprites.constructBackground.{maze.name}",
+        lambda: mazesprites.constructBackground(background, level % 5),
+        iterations=5,
+    )
+
+
+def test_spritesheet_load(display, bench):
+    manifest = getManifest()
+    bench(
+        "Spritesheet.load",
+        lambda: loadSpritesheet(manifest.image, manifest.colorkey),
+        iterations=10,
+    )
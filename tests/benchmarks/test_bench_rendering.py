@@ -0,0 +1,11 @@
+import pytest
+import pygame
+from constants import *
+
+pytestmark = pytest.mark.benchmark
+
+
+def test_full_render_offscreen(game, bench):
+    """One complete frame drawn to an offscreen surface"""
+    game.screen = pygame.Surface(SCREENSIZE)
+    bench("GameController.render", game.render, iterations=50)
@@ -0,0 +1,95 @@
+import random
+import pytest
+from constants import *
+from movement.vector import Vector2
+
+pytestmark = pytest.mark.benchmark
+
+
+def randomKeys(seed):
+    """A stand-in for the keyboard that holds a direction for a while"""
+    rng = random.Random(seed)
+    state = {"direction": LEFT, "held": 0}
+
+    def getValidKey():
+        if state["held"] <= 0:
+            state["direction"] = rng.choice([UP, DOWN, LEFT, RIGHT])
+            state["held"] = rng.randint(5, 40)
+        state["held"] -= 1
+        return state["direction"]
+
+    return getValidKey
+
+
+def test_headless_ticks_per_second(display, bench):
+    """Fixed simulation steps over a full level without rendering. Every
+    round plays the same game from the start"""
+    from main import GameController
+
+    games = []
+
+    def newGame():
+        # Frightened ghosts pick their turns with the random module
+        random.seed(1)
+        game = GameController((0, 0, 0))
+        game.startGame()
+        game.pause.paused = False
+        game.pacman.getValidKey = randomKeys(1)
+        games[:] = [game]
+
+    def step():
+        game = games[0]
+        game.step(SIMSTEP)
+        # Press start again after deaths and level changes
+        if game.pause.paused and game.pause.timer is None:
+            game.pause.paused = False
+
+    result = bench(
+        "simulation.ticks_per_s", step, rounds=9, iterations=3000, setup=newGame
+    )
+    assert result["ops_per_s"] > 0
+
+
+def test_eat_pellets_full_board(game, bench):
+    """Exact pellet test against every pellet on a full board"""
+    pacman = game.pacman
+    pacman.lastPosition = None
+    pacman.position = Vector2(-10 * TILEWIDTH, -10 * TILEHEIGHT)
+    pellets = game.pellets.pelletList
+
+    bench("pacman.eatPellets.full_board", lambda: pacman.eatPellets(pellets))
+    assert pacman.eatPellets(pellets) is None
+
+
+def test_eat_pellets_broad_phase(game, bench):
+    """Pellet test through the collision grid, as the game loop does it"""
+    pacman = game.pacman
+    pacman.lastPosition = None
+    nearby = game.pellets.getNearby
+
+    bench(
+        "pacman.eatPellets.broad_phase",
+        lambda: pacman.eatPellets(nearby(pacman.position)),
+        iterations=1000,
+    )
+
+
+def test_pacman_sprites_update(game, bench):
+    sprites = game.pacman.sprites
+    bench("PacmanSprites.update", lambda: sprites.update(SIMSTEP), iterations=1000)
+
+
+def test_ghost_sprites_update(game, bench):
+    game.ghosts.blinky.direction = LEFT
+    sprites = game.ghosts.blinky.sprites
+    bench("GhostSprites.update", lambda: sprites.update(SIMSTEP), iterations=1000)
+
+
+def test_textgroup_update_score(game, bench):
+    textgroup = game.textgroup
+    score = iter(range(10**9))
+    bench(
+        "TextGroup.updateScore",
+        lambda: textgroup.updateScore(next(score)),
+        iterations=200,
+    )
@@ -0,0 +1,32 @@
+import os
+import pytest
+from telemetry.benchgate import compare, formatTable, loadResults, regressions
+
+pytestmark = pytest.mark.benchmark
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+# Times a failing benchmark is run again before the gate fails, a busy
+# runner can slow down every round of one benchmark
+RETRIES = 2
+
+
+def test_no_regressions_against_baseline(results, reruns, request):
+    """Runs after the other benchmark files and checks them against the
+    committed baseline. This is the regression gate of the suite"""
+    if len(results["benchmarks"]) == 0:
+        pytest.skip("no benchmarks ran in this session")
+    baseline = loadResults(BASELINE)
+    # A filtered run has to say so to skip the benchmarks it left out
+    allowMissing = request.config.getoption("--benchmark-allow-missing")
+    rows = compare(results, baseline)
+    for _ in range(RETRIES):
+        failing = [row[0] for row in regressions(rows, allowMissing)]
+        failing = [name for name in failing if name in reruns]
+        if not failing:
+            break
+        print("\nrunning again: " + ", ".join(failing))
+        for name in failing:
+            reruns[name]()
+        rows = compare(results, baseline)
+    print("\n" + formatTable(rows))
+    assert regressions(rows, allowMissing) == [], "\n" + formatTable(rows)
@@ -16,6 +16,39 @@ from food.pellets import Pellet, PowerPellet, PelletGroup
 from constants import *
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark-json",
+        default=os.path.join("reports", "benchmarks.json"),
+        help="Where the benchmark suite writes its results",
+    )
+    parser.addoption(
+        "--benchmark-allow-missing",
+        action="store_true",
+        help="Do not fail the regression gate on benchmarks that did not run",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    # Benchmarks are slow, only run them when selected with -m benchmark
+    if "benchmark" in (config.getoption("markexpr") or ""):
+        return
+    skip = pytest.mark.skip(reason="benchmark, run with -m benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def display():
+    """A small dummy display, for code that converts surfaces"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode((16, 16))
+    yield
+    pygame.quit()
+
+
 @pytest.fixture
 def vector():
     return Vector2(5, 10)
@@ -0,0 +1,68 @@
+import gc
+from styles.animation import AnimationClock, Animator
+
+
+class TestAnimator:
+    def test_frame_follows_shared_clock(self):
+        """Test the frame is floor(elapsed * speed) % n of the clock time"""
+        clock = AnimationClock()
+        animator = Animator("abc", speed=10, clock=clock)
+
+        assert animator.update(0) == "a"
+        for expected in "abbcca":
+            clock.tick(0.05)
+            assert animator.update(0.05) == expected
+
+    def test_whole_steps_land_on_frame_boundaries(self):
+        """Test float drift does not delay a frame by one step"""
+        clock = AnimationClock()
+        animator = Animator((0, 1), speed=20, clock=clock)
+        animator.update(0)
+
+        for _ in range(3):
+            clock.tick(1.0 / 60)
+
+        assert animator.update(0) == 1
+
+    def test_non_looping_stops_on_last_frame(self):
+        """Test a one-shot animation finishes and holds its last frame"""
+        clock = AnimationClock()
+        animator = Animator((0, 1, 2), speed=10, loop=False, clock=clock)
+        animator.update(0)
+
+        clock.tick(0.25)
+        assert animator.update(0) == 2
+        assert not animator.finished
+        clock.tick(1.0)
+        assert animator.update(0) == 2
+        assert animator.finished
+
+    def test_starts_at_first_update_after_reset(self):
+        """Test an animator not yet shown starts from frame 0 when it is"""
+        clock = AnimationClock()
+        animator = Animator((0, 1, 2), speed=10, loop=False, clock=clock)
+        clock.tick(5.0)
+
+        assert animator.update(0) == 0
+        clock.tick(0.1)
+        assert animator.update(0) == 1
+
+        animator.reset()
+        clock.tick(0.1)
+        assert animator.update(0) == 0
+
+    def test_default_frames_are_not_shared(self):
+        """Test animators without frames get their own list"""
+        clock = AnimationClock()
+        first = Animator(clock=clock)
+        first.frames.append("x")
+
+        assert Animator(clock=clock).frames == []
+
+    def test_clock_drops_discarded_animators(self):
+        """Test the clock does not keep animators of old sprites alive"""
+        clock = AnimationClock()
+        Animator((0, 1), clock=clock)
+        gc.collect()
+
+        assert len(clock.animators) == 0
@@ -0,0 +1,125 @@
+import os
+import pygame
+import pytest
+from PIL import Image
+from styles.sprite import asset_cache, sprite_manager, sprites
+from styles.sprite.asset_cache import AssetCache
+from styles.sprite.sprite_manager import SpriteManager
+from unittest.mock import patch
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = AssetCache()
+    cache.open(str(tmp_path / "cache"))
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "frame.gif"
+    Image.new("RGBA", (8, 4), (255, 0, 0, 255)).save(path)
+    return str(path)
+
+
+def make_surface(color):
+    surface = pygame.Surface((8, 4), pygame.SRCALPHA)
+    surface.fill(color)
+    return surface
+
+
+class TestAssetCache:
+    def test_round_trip_from_mapped_file(self, cache, source):
+        """Test stored pixels come back as an RGBA surface"""
+        cache.put(source, "size=8x4", make_surface((1, 2, 3, 255)), {"a": 1})
+        cache.flush()
+
+        reopened = AssetCache()
+        reopened.open(cache.directory)
+        surface, extra = reopened.get(source, "size=8x4")
+
+        assert surface.get_size() == (8, 4)
+        assert surface.get_at((7, 3)) == (1, 2, 3, 255)
+        assert extra == {"a": 1}
+        assert reopened.get(source, "size=16x16") is None
+
+    def test_touched_source_with_same_content_is_kept(self, cache, source):
+        """Test a new mtime alone does not invalidate the entry"""
+        cache.put(source, "v", make_surface((0, 0, 0, 255)))
+        stat = os.stat(source)
+        os.utime(source, (stat.st_atime, stat.st_mtime + 10))
+
+        assert cache.get(source, "v") is not None
+
+    def test_changed_source_is_a_miss(self, cache, source):
+        """Test new content invalidates the cached pixels"""
+        cache.put(source, "v", make_surface((0, 0, 0, 255)))
+        Image.new("RGBA", (8, 4), (0, 255, 0, 255)).save(source)
+        stat = os.stat(source)
+        os.utime(source, (stat.st_atime, stat.st_mtime + 10))
+
+        assert cache.get(source, "v") is None
+
+    def test_tile_size_change_drops_cache(self, cache, source):
+        """Test entries built for another TILEWIDTH are discarded"""
+        cache.put(source, "v", make_surface((0, 0, 0, 255)))
+        cache.flush()
+
+        with patch.object(asset_cache, "TILEWIDTH", 32):
+            reopened = AssetCache()
+            reopened.open(cache.directory)
+            assert reopened.get(source, "v") is None
+            assert os.path.getsize(reopened.dataPath) == 0
+
+    def test_index_written_on_flush(self, cache, source):
+        """Test puts only change the index in memory until it is flushed,
+        and each source is hashed once"""
+        with patch.object(asset_cache, "hashFile", return_value="h") as hashFile:
+            for variant in ("a", "b", "c"):
+                cache.put(source, variant, make_surface((0, 0, 0, 255)))
+
+        assert hashFile.call_count == 1
+        assert not os.path.exists(cache.indexPath)
+
+        cache.close()
+        reopened = AssetCache()
+        reopened.open(cache.directory)
+        assert sorted(reopened.entries) == [f"{source}|{v}" for v in "abc"]
+
+    def test_disabled_cache_is_inert(self, source):
+        """Test an unopened cache never stores or returns anything"""
+        cache = AssetCache()
+        cache.put(source, "v", make_surface((0, 0, 0, 255)))
+        assert cache.get(source, "v") is None
+
+
+class TestCachedLoaders:
+    def test_sprite_manager_skips_decode_on_warm_cache(self, cache, source):
+        """Test a second run builds the sprite from the cache alone"""
+        first = SpriteManager(disk_cache=cache)
+        first.register_sprite("s", source, scale=2)
+        expected = pygame.image.tobytes(first.get_sprite("s"), "RGBA")
+
+        second = SpriteManager(disk_cache=cache)
+        second.register_sprite("s", source, scale=2)
+        with patch.object(
+            sprite_manager, "decode_gif", side_effect=AssertionError("decoded")
+        ):
+            report = second.load_batch(["s"])
+
+        assert report["files"] == 0
+        assert pygame.image.tobytes(second.get_sprite("s"), "RGBA") == expected
+
+    def test_spritesheet_matches_fresh_load(self, cache):
+        """Test the cached spritesheet has the same pixels and colorkey"""
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        pygame.init()
+        pygame.display.set_mode((16, 16))
+        with patch.object(sprites, "assetcache", cache):
+            fresh = sprites.loadSpritesheet()
+            cached = sprites.loadSpritesheet()
+
+        assert cache.hits == 1
+        assert cached.get_colorkey() == fresh.get_colorkey()
+        assert pygame.image.tobytes(cached, "RGB") == pygame.image.tobytes(fresh, "RGB")
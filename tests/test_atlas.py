@@ -0,0 +1,160 @@
+import json
+import pygame
+import pytest
+from PIL import Image
+from unittest.mock import MagicMock
+from constants import *
+from styles.animation import animationclock
+from styles.sprite.atlas import ATLAS, Manifest, getManifest
+from styles.sprite.atlas_builder import SOURCE, buildAtlas, packFrames
+from styles.sprite.sprites import (
+    SPRITESHEET,
+    GhostSprites,
+    PacmanSprites,
+    Spritesheet,
+    loadSpritesheet,
+)
+
+
+@pytest.fixture
+def source(tmp_path):
+    """A 4x2 tile sheet where every tile has its own colour"""
+    sheet = Image.new("RGB", (64, 32), (255, 0, 255))
+    for x in range(1, 4):
+        for y in range(2):
+            sheet.paste(
+                (x * 60, y * 100, 7), (x * 16, y * 16, x * 16 + 16, y * 16 + 16)
+            )
+    sheet.save(tmp_path / "sheet.png")
+    spec = {
+        "image": "sheet.png",
+        "tile": [16, 16],
+        "frames": {
+            "big": [1, 0, 2, 2],
+            "small": [3, 1, 1, 1],
+            "same": [3, 1, 1, 1],
+        },
+        "animations": {"loop": {"frames": ["big", "small"], "speed": 10, "loop": True}},
+    }
+    path = tmp_path / "frames.json"
+    path.write_text(json.dumps(spec))
+    return path
+
+
+def crop(image, rect, tile=16):
+    x, y, w, h = rect
+    return image.crop((x * tile, y * tile, (x + w) * tile, (y + h) * tile)).tobytes()
+
+
+class TestPackFrames:
+    def test_frames_do_not_overlap(self):
+        """Test packed frames stay inside the width and never overlap"""
+        sizes = {f"f{i}": (1 + i % 3, 1 + i % 2) for i in range(30)}
+        placements, height = packFrames(sizes, 8)
+
+        cells = set()
+        for key, (x, y) in placements.items():
+            w, h = sizes[key]
+            assert x + w <= 8 and y + h <= height
+            for cell in [(x + i, y + j) for i in range(w) for j in range(h)]:
+                assert cell not in cells
+                cells.add(cell)
+
+    def test_too_wide_frame_raises(self):
+        """Test a frame wider than the atlas is rejected"""
+        with pytest.raises(ValueError):
+            packFrames({"wide": (9, 1)}, 8)
+
+
+class TestBuildAtlas:
+    def test_frames_keep_their_pixels(self, source, tmp_path):
+        """Test every named frame has the same pixels as its source region"""
+        manifest = buildAtlas(str(source), str(tmp_path / "out"), width=4)
+
+        sheet = Image.open(tmp_path / "sheet.png").convert("RGB")
+        atlas = Image.open(tmp_path / "out" / "atlas.png").convert("RGB")
+        spec = json.loads(source.read_text())
+        for name, rect in spec["frames"].items():
+            assert crop(atlas, manifest["frames"][name]) == crop(sheet, rect)
+        assert manifest["frames"]["same"] == manifest["frames"]["small"]
+        assert manifest["colorkey"] == [255, 0, 255]
+
+    def test_loose_gifs_are_packed(self, source, tmp_path):
+        """Test GIFs are added by file name, padded to whole tiles"""
+        gifs = tmp_path / "gifs"
+        gifs.mkdir()
+        Image.new("RGB", (20, 10), (0, 200, 0)).save(gifs / "blob.gif")
+
+        buildAtlas(str(source), str(tmp_path / "out"), gifs=[str(gifs)], width=4)
+        manifest = Manifest(str(tmp_path / "out" / "atlas.json"))
+
+        assert manifest.getFrame("blob")[2:] == (2, 1)
+        assert manifest.getAnimation("loop")["frames"] == ["big", "small"]
+
+    def test_unknown_animation_frame_raises(self, source, tmp_path):
+        """Test animations may only use defined frames"""
+        spec = json.loads(source.read_text())
+        spec["animations"]["loop"]["frames"].append("missing")
+        source.write_text(json.dumps(spec))
+
+        with pytest.raises(ValueError):
+            buildAtlas(str(source), str(tmp_path / "out"))
+
+    def test_shipped_atlas_is_up_to_date(self, tmp_path):
+        """Test the committed atlas is what the builder makes from frames.json"""
+        rebuilt = buildAtlas(SOURCE, str(tmp_path))
+
+        with open(ATLAS) as f:
+            assert json.load(f) == json.loads(json.dumps(rebuilt))
+        shipped = Image.open(getManifest().image).convert("RGB")
+        assert shipped.tobytes() == Image.open(tmp_path / "atlas.png").tobytes()
+
+
+class TestNamedFrames:
+    def test_unknown_frame_raises(self):
+        """Test a missing frame name is reported with the manifest path"""
+        with pytest.raises(KeyError, match="nope"):
+            getManifest().getFrame("nope")
+
+    def test_frames_match_original_spritesheet(self, display):
+        """Test named frames show the same pixels as the old coordinates"""
+        sheet = loadSpritesheet(SPRITESHEET)
+        sprites = Spritesheet()
+
+        def old(x, y, size=2):
+            rect = (x * TILEWIDTH, y * TILEHEIGHT, size * TILEWIDTH, size * TILEHEIGHT)
+            return pygame.image.tobytes(sheet.subsurface(rect), "RGB")
+
+        for name, coords in [
+            ("pacman.left.0", (8, 0)),
+            ("pacman.death.10", (20, 12)),
+            ("ghost.clyde.right", (6, 10)),
+            ("ghost.eyes.down", (8, 6)),
+            ("fruit.3", (16, 10)),
+        ]:
+            assert pygame.image.tobytes(sprites.getFrame(name), "RGB") == old(*coords)
+        door = pygame.image.tobytes(sprites.getFrame("maze.door"), "RGB")
+        assert door == old(10, 8, size=1)
+
+    def test_sprite_classes_use_named_frames(self, display):
+        """Test Pac-Man and ghost images come from their manifest frames"""
+        pacman = MagicMock(alive=True, direction=RIGHT)
+        sprites = PacmanSprites(pacman)
+        sprites.update(0)
+        animationclock.tick(1.0 / 20)
+        sprites.update(0)
+        frame = sprites.getFrame(
+            getManifest().getAnimation("pacman.right")["frames"][1]
+        )
+        assert pygame.image.tobytes(pacman.image, "RGB") == pygame.image.tobytes(
+            frame, "RGB"
+        )
+
+        ghost = MagicMock(name="ghost", direction=LEFT)
+        ghost.name = PINKY
+        ghost.mode.current = SCATTER
+        ghosts = GhostSprites(ghost)
+        ghosts.update(0)
+        assert pygame.image.tobytes(ghost.image, "RGB") == pygame.image.tobytes(
+            ghosts.getFrame("ghost.pinky.left"), "RGB"
+        )
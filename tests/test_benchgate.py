@@ -0,0 +1,110 @@
+import json
+import pytest
+from telemetry.benchgate import (
+    calibrationUnit,
+    compare,
+    formatTable,
+    main,
+    medianInterval,
+    regressions,
+)
+
+
+def make_results(calibration, **timings):
+    """Results with the given rounds per benchmark, a single time stands
+    for five equal rounds"""
+    benchmarks = {}
+    for name, times in timings.items():
+        if not isinstance(times, list):
+            times = [times] * 5
+        benchmarks[name] = {
+            "median_s": sorted(times)[len(times) // 2],
+            "times_s": times,
+        }
+    return {"environment": {"calibration_s": calibration}, "benchmarks": benchmarks}
+
+
+class TestBenchGate:
+    def test_slower_machine_is_not_a_regression(self):
+        """Test timings are compared in calibration units"""
+        baseline = make_results(0.01, render=0.001)
+        current = make_results(0.02, render=0.002)
+
+        rows = compare(current, baseline)
+
+        assert rows[0][3] == pytest.approx(0)
+        assert regressions(rows) == []
+
+    def test_per_benchmark_threshold(self):
+        """Test each benchmark is judged against its own limit"""
+        baseline = make_results(0.01, render=0.001, load=0.001)
+        baseline["thresholds"] = {"default": 0.1, "load": 0.5}
+        current = make_results(0.01, render=0.0012, load=0.0012)
+
+        failed = regressions(compare(current, baseline))
+
+        assert [row[0] for row in failed] == ["render"]
+
+    def test_new_and_missing_benchmarks(self):
+        """Test a benchmark that did not run fails unless allowed, a new one
+        never does"""
+        rows = compare(make_results(0.01, added=1), make_results(0.01, removed=1))
+
+        assert [(row[0], row[-1]) for row in rows] == [
+            ("added", "new"),
+            ("removed", "missing"),
+        ]
+        assert "removed" in formatTable(rows)
+        assert [row[0] for row in regressions(rows)] == ["removed"]
+        assert regressions(rows, allowMissing=True) == []
+
+    def test_default_threshold(self):
+        """Test a quarter slower fails without a threshold in the baseline"""
+        baseline = make_results(0.01, render=0.001)
+
+        assert regressions(compare(make_results(0.01, render=0.0012), baseline)) == []
+        assert regressions(compare(make_results(0.01, render=0.0013), baseline))
+
+    def test_median_interval(self):
+        """Test the interval around the median narrows with more rounds and
+        is the whole range for a few"""
+        assert medianInterval([3.0, 1.0, 2.0]) == (1.0, 3.0)
+        assert medianInterval(list(range(15, 0, -1))) == (4, 12)
+        assert medianInterval(list(range(25))) == (7, 17)
+
+    def test_noise_is_not_a_regression(self):
+        """Test a slower median fails only when the rounds leave no doubt"""
+        rounds = [1.0 + i / 100 for i in range(15)]
+        baseline = make_results(0.01, render=rounds)
+        noisy = rounds[:3] + [1.5] * 8 + rounds[11:]
+        slower = [1.5 + i / 100 for i in range(15)]
+
+        rows = compare(make_results(0.01, render=noisy), baseline)
+        assert rows[0][3] > 0.25
+        assert regressions(rows) == []
+        rows = compare(make_results(0.01, render=slower), baseline)
+        assert rows[0][4] > 0.25
+        assert [row[0] for row in regressions(rows)] == ["render"]
+
+    def test_calibration_unit(self):
+        """Test the calibration parts weigh in equally"""
+        assert calibrationUnit({"python": 0.02, "numpy": 0.005, "blit": 0.01}) == (
+            pytest.approx(0.01)
+        )
+
+    def test_main_exit_code(self, tmp_path, capsys):
+        """Test the command line tool fails on a regression and can update"""
+        current = tmp_path / "current.json"
+        baseline = tmp_path / "baseline.json"
+        current.write_text(json.dumps(make_results(0.01, render=0.01)))
+        baseline.write_text(json.dumps(make_results(0.01, render=0.001)))
+
+        assert main([str(current), str(baseline)]) == 1
+        assert "REGRESSED" in capsys.readouterr().out
+
+        assert main(["--update", str(current), str(baseline)]) == 0
+        assert main([str(current), str(baseline)]) == 0
+
+        current.write_text(json.dumps(make_results(0.01)))
+        assert main([str(current), str(baseline)]) == 1
+        assert main(["--allow-missing", str(current), str(baseline)]) == 0
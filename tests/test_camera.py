@@ -0,0 +1,44 @@
+import pytest
+import pygame
+from styles.camera import Camera
+from movement.vector import Vector2
+from constants import *
+
+
+class TestCamera:
+    def test_small_world_stays_at_origin(self):
+        """Test a maze that fits the window never scrolls"""
+        camera = Camera()
+        camera.setWorldSize(SCREENWIDTH, SCREENHEIGHT)
+
+        camera.follow(Vector2(SCREENWIDTH, SCREENHEIGHT))
+
+        assert camera.offset == Vector2(0, 0)
+        assert camera.getRect() == pygame.Rect(0, 0, SCREENWIDTH, SCREENHEIGHT)
+
+    def test_follow_centers_and_clamps(self):
+        """Test the viewport centers on the target inside a large maze"""
+        camera = Camera(100, 100)
+        camera.setWorldSize(200 * TILEWIDTH, 200 * TILEHEIGHT)
+
+        camera.follow(Vector2(1000, 800))
+        assert camera.offset == Vector2(950, 750)
+        assert camera.apply(Vector2(1000, 800)) == Vector2(50, 50)
+
+        # Clamped at the far edges of the maze
+        camera.follow(Vector2(200 * TILEWIDTH, 200 * TILEHEIGHT))
+        assert camera.offset == Vector2(200 * TILEWIDTH - 100, 200 * TILEHEIGHT - 100)
+
+        camera.follow(Vector2(0, 0))
+        assert camera.offset == Vector2(0, 0)
+
+    def test_is_visible(self):
+        """Test culling of positions outside the viewport"""
+        camera = Camera(100, 100)
+        camera.setWorldSize(1000, 1000)
+        camera.follow(Vector2(500, 500))
+
+        assert camera.isVisible(Vector2(500, 500))
+        assert not camera.isVisible(Vector2(0, 0))
+        assert camera.isVisible(Vector2(440, 440), margin=20)
+        assert not camera.isVisible(Vector2(420, 420), margin=20)
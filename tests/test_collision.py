@@ -0,0 +1,112 @@
+import pytest
+from movement.collision import CollisionGrid, sweptCollide, sweptCollidePath
+from movement.vector import Vector2
+from food.pellets import Pellet
+from constants import *
+from unittest.mock import MagicMock
+
+
+def make_entity(x, y, radius=5):
+    entity = MagicMock()
+    entity.position = Vector2(x, y)
+    entity.collideRadius = radius
+    return entity
+
+
+class TestCollisionGrid:
+    def test_nearby_only_returns_adjacent_tiles(self):
+        """Test queries only look at the 3x3 block of tiles"""
+        grid = CollisionGrid()
+        pellets = [Pellet(row, col) for row in range(10) for col in range(10)]
+        for pellet in pellets:
+            grid.add(pellet)
+
+        nearby = grid.nearby(Vector2(5 * TILEWIDTH, 5 * TILEHEIGHT))
+
+        assert len(grid) == 100
+        assert len(nearby) == 9
+        for pellet in nearby:
+            assert abs(pellet.position.x - 5 * TILEWIDTH) <= TILEWIDTH
+            assert abs(pellet.position.y - 5 * TILEHEIGHT) <= TILEHEIGHT
+
+    def test_update_moves_entity_between_tiles(self):
+        """Test a moving entity is rebucketed when it changes tile"""
+        grid = CollisionGrid()
+        ghost = make_entity(0, 0)
+        grid.add(ghost)
+
+        ghost.position = Vector2(10 * TILEWIDTH, 0)
+        grid.update(ghost)
+
+        assert grid.nearby(Vector2(0, 0)) == []
+        assert grid.nearby(Vector2(10 * TILEWIDTH, 0)) == [ghost]
+
+        grid.remove(ghost)
+        assert len(grid) == 0
+        assert grid.cells == {}
+
+    def test_colliding_runs_exact_check(self):
+        """Test neighbours that do not overlap are filtered out"""
+        grid = CollisionGrid()
+        close = make_entity(TILEWIDTH + 4, 0)
+        far = make_entity(TILEWIDTH + 12, 0)
+        grid.add(close)
+        grid.add(far)
+
+        pacman = make_entity(TILEWIDTH, 0)
+
+        assert grid.colliding(pacman) == [close]
+        assert grid.isNearby(pacman.position, far.position)
+        assert not grid.isNearby(pacman.position, Vector2(4 * TILEWIDTH, 0))
+
+    def test_swept_collision_catches_pass_through(self):
+        """Test two entities that swap places within one step still collide"""
+        pacman = make_entity(10 * TILEWIDTH, 0)
+        pacman.lastPosition = Vector2(0, 0)
+        ghost = make_entity(0, 0)
+        ghost.lastPosition = Vector2(10 * TILEWIDTH, 0)
+
+        grid = CollisionGrid()
+        grid.add(ghost)
+        reach = grid.getTravel(pacman) + grid.getTravel(ghost)
+
+        assert grid.colliding(pacman) == []
+        assert grid.colliding(pacman, reach, swept=True) == [ghost]
+
+    def test_swept_collide_parallel_paths(self):
+        """Test entities moving side by side never meet"""
+        assert not sweptCollide(
+            Vector2(0, 0), Vector2(100, 0), Vector2(0, 20), Vector2(100, 20), 10
+        )
+        assert sweptCollide(
+            Vector2(0, 0), Vector2(100, 0), Vector2(100, 5), Vector2(0, 5), 10
+        )
+
+    def test_swept_collision_follows_turns(self):
+        """Test a step that turns at a node is swept along both legs"""
+        pacman = make_entity(TILEWIDTH, TILEHEIGHT)
+        pacman.lastPosition = Vector2(0, 0)
+        pellet = Pellet(0, 1)
+        pellet.collideRadius = 2
+
+        grid = CollisionGrid()
+        grid.add(pellet)
+
+        # The straight line from corner to corner misses the pellet
+        pacman.waypoints = []
+        reach = grid.getTravel(pacman)
+        assert grid.colliding(pacman, reach, swept=True) == []
+        pacman.waypoints = [Vector2(TILEWIDTH, 0)]
+        assert grid.colliding(pacman, reach, swept=True) == [pellet]
+
+    def test_swept_collide_path_times_both_movers(self):
+        """Test paths are compared at the same moment, not just by shape"""
+        corner = [Vector2(0, 0), Vector2(100, 0), Vector2(100, 100)]
+        # Runs down the second leg ahead of the first mover
+        ahead = [Vector2(100, -20), Vector2(100, 180)]
+        # Comes up the second leg towards it
+        oncoming = [Vector2(100, 100), Vector2(100, 0)]
+
+        assert not sweptCollidePath(corner, ahead, 10)
+        assert sweptCollidePath(corner, oncoming, 10)
+        assert not sweptCollide(corner[0], corner[-1], *oncoming, 10)
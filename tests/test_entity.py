@@ -115,3 +115,49 @@ class TestEntity:
         """Test entity direction vectors"""
         entity = Entity(node)
         assert entity.directions[direction] == expected
+
+    def test_entity_step_records_turns(self):
+        """Test a step around a corner keeps the node it turned at"""
+        corner = Node(TILEWIDTH, 0)
+        start = Node(0, 0)
+        end = Node(TILEWIDTH, TILEHEIGHT)
+        start.neighbors[RIGHT] = corner
+        corner.neighbors[LEFT] = start
+        corner.neighbors[DOWN] = end
+        end.neighbors[UP] = corner
+
+        entity = Entity(start)
+        entity.name = PACMAN
+        entity.goal = Vector2(TILEWIDTH, 1000)
+        entity.direction = RIGHT
+        entity.target = corner
+        entity.update(1.5 * TILEWIDTH / entity.speed)
+
+        assert entity.direction == DOWN
+        assert entity.lastPosition == Vector2(0, 0)
+        assert entity.waypoints == [Vector2(TILEWIDTH, 0)]
+        assert entity.position == Vector2(TILEWIDTH, TILEHEIGHT / 2)
+
+        entity.update(0)
+        assert entity.waypoints == []
+
+    def test_entity_large_step_crosses_several_nodes(self):
+        """Test one long update walks along a chain of nodes"""
+        nodes = [Node(x * TILEWIDTH, 0) for x in range(6)]
+        for left, right in zip(nodes, nodes[1:]):
+            left.neighbors[RIGHT] = right
+            right.neighbors[LEFT] = left
+
+        entity = Entity(nodes[0])
+        entity.name = PACMAN
+        entity.goal = Vector2(1000, 0)
+        entity.direction = RIGHT
+        entity.target = nodes[1]
+
+        # 3.5 tiles of travel in a single step
+        entity.update(3.5 * TILEWIDTH / entity.speed)
+
+        assert entity.node is nodes[3]
+        assert entity.target is nodes[4]
+        assert entity.position == Vector2(3.5 * TILEWIDTH, 0)
+        assert entity.lastPosition == Vector2(0, 0)
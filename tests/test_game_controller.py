@@ -240,3 +240,106 @@ class TestGameController:
 
         # Text group should be updated
         controller.textgroup.updateScore.assert_called_once_with(100)
+
+    @patch("pygame.init")
+    @patch("pygame.display.set_mode")
+    def test_time_scale_runs_multiple_steps(
+        self, mock_set_mode, mock_init, mock_text_group, mock_life_sprites
+    ):
+        """Test fast-forward runs several fixed steps per rendered frame"""
+        controller = GameController((0, 0, 0), timescale=4)
+        controller.clock = MagicMock()
+        controller.clock.tick.return_value = SIMSTEP * 1000
+        controller.camera = MagicMock()
+        controller.pacman = MagicMock()
+
+        with (
+            patch.object(controller, "step") as mock_step,
+            patch.object(controller, "render") as mock_render,
+            patch.object(controller, "checkEvents"),
+        ):
+            controller.update()
+
+            assert mock_step.call_count == 4
+            mock_step.assert_called_with(SIMSTEP)
+            mock_render.assert_called_once()
+
+    @patch("pygame.init")
+    @patch("pygame.display.set_mode")
+    def test_rounded_frame_times_run_one_step(
+        self, mock_set_mode, mock_init, mock_text_group, mock_life_sprites
+    ):
+        """Test frames of a whole number of milliseconds near SIMSTEP run
+        exactly one step each"""
+        controller = GameController((0, 0, 0))
+        controller.clock = MagicMock()
+        controller.clock.tick.side_effect = [33, 34, 33, 33, 34, 33]
+        controller.camera = MagicMock()
+        controller.pacman = MagicMock()
+
+        with (
+            patch.object(controller, "step") as mock_step,
+            patch.object(controller, "render"),
+            patch.object(controller, "checkEvents"),
+        ):
+            for frame in range(6):
+                controller.update()
+                assert mock_step.call_count == frame + 1
+
+    @patch("pygame.init")
+    @patch("pygame.display.set_mode")
+    def test_step_moves_everyone_before_collisions(
+        self, mock_set_mode, mock_init, mock_text_group, mock_life_sprites
+    ):
+        """Test Pac-Man and the ghosts both move before the collision
+        checks, so the swept tests cover the same step on both sides"""
+        controller = GameController((0, 0, 0))
+        controller.pause.paused = False
+        controller.textgroup = MagicMock()
+        order = MagicMock()
+        controller.ghosts = order.ghosts
+        controller.pacman = order.pacman
+        order.pacman.alive = True
+
+        with (
+            patch.object(controller, "checkPelletEvents", order.checkPelletEvents),
+            patch.object(controller, "checkGhostEvents", order.checkGhostEvents),
+            patch.object(controller, "checkFruitEvents", order.checkFruitEvents),
+        ):
+            controller.step(SIMSTEP)
+
+        calls = [call[0] for call in order.mock_calls]
+        moved = max(calls.index("ghosts.update"), calls.index("pacman.update"))
+        for check in ("checkPelletEvents", "checkGhostEvents", "checkFruitEvents"):
+            assert calls.index(check) > moved
+
+    @patch("pygame.init")
+    @patch("pygame.display.set_mode")
+    def test_set_time_scale_is_clamped(
+        self, mock_set_mode, mock_init, mock_text_group, mock_life_sprites
+    ):
+        """Test the time scale stays within the supported range"""
+        controller = GameController((0, 0, 0))
+        assert controller.timescale == 1
+
+        controller.setTimeScale(100)
+        assert controller.timescale == MAXTIMESCALE
+
+        controller.setTimeScale(0)
+        assert controller.timescale == MINTIMESCALE
+
+    def test_games_tick_their_own_animation_clock(self, display):
+        """Test stepping one game leaves another game's animations alone"""
+        first = GameController((0, 0, 0))
+        first.startGame()
+        second = GameController((0, 0, 0))
+        second.startGame()
+
+        first.step(SIMSTEP)
+
+        assert first.animationclock.time == SIMSTEP
+        assert second.animationclock.time == 0
+        for animation in first.pacman.sprites.animations.values():
+            assert animation.clock is first.animationclock
+            assert animation in first.animationclock.animators
+            assert animation not in second.animationclock.animators
@@ -0,0 +1,78 @@
+import gc
+import pytest
+from gcbudget import GCBudget
+from pauser import Pause
+from unittest.mock import patch
+
+
+class TestGCBudget:
+    def setup_method(self):
+        self.budget = GCBudget(enabled=True, budget=1.0)
+
+    def teardown_method(self):
+        gc.enable()
+
+    def test_start_disables_automatic_collection(self):
+        """Test start/stop switch the automatic collector off and back on"""
+        self.budget.start()
+        assert not gc.isenabled()
+        self.budget.stop()
+        assert gc.isenabled()
+
+    def test_disabled_budget_never_collects(self):
+        """Test idle and pause hooks do nothing without the option"""
+        budget = GCBudget()
+        with patch("gc.collect") as collect:
+            budget.beginFrame()
+            budget.idle()
+            budget.collectPaused()
+            budget.collectFull()
+        collect.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "counts, generation", [((10, 0, 0), None), ((700, 0, 0), 0), ((700, 10, 0), 1)]
+    )
+    def test_young_generation(self, counts, generation):
+        """Test the generation picked follows the collector thresholds"""
+        with (
+            patch("gc.get_count", return_value=counts),
+            patch("gc.get_threshold", return_value=(700, 10, 10)),
+        ):
+            assert self.budget.youngGeneration() == generation
+
+    def test_idle_collects_with_time_left(self):
+        """Test a young collection runs in the spare frame time"""
+        with (
+            patch("gc.get_count", return_value=(800, 0, 0)),
+            patch("gc.get_threshold", return_value=(700, 10, 10)),
+            patch("gc.collect") as collect,
+        ):
+            self.budget.beginFrame()
+            self.budget.idle()
+        collect.assert_called_once_with(0)
+        assert self.budget.getStats()["collections"] == [1, 0, 0]
+
+    def test_idle_waits_when_frame_is_over_budget(self):
+        """Test nothing is collected without idle time unless garbage piles up"""
+        self.budget.budget = 0
+        with (
+            patch("gc.get_threshold", return_value=(700, 10, 10)),
+            patch("gc.collect") as collect,
+        ):
+            with patch("gc.get_count", return_value=(800, 0, 0)):
+                self.budget.idle()
+            collect.assert_not_called()
+            with patch("gc.get_count", return_value=(700 * 20, 0, 0)):
+                self.budget.idle()
+            collect.assert_called_once_with(0)
+        assert self.budget.forced == 1
+
+    def test_pause_runs_one_full_collection(self):
+        """Test a pause triggers a single gen 2 collection after gameplay"""
+        pause = Pause(True)
+        pause.collector = self.budget
+        self.budget.fullPending = True
+        with patch("gc.collect") as collect:
+            pause.update(0.1)
+            pause.update(0.1)
+        collect.assert_called_once_with(2)
@@ -1,5 +1,6 @@
 import pytest
 from ghosts.ghost import Ghost, GhostGroup, Blinky, Pinky, Inky, Clyde
+from ghosts.ghost import loadGhostConfig
 from ghosts.entity import Entity
 from movement.vector import Vector2
 from movement.nodes import Node
@@ -98,8 +99,8 @@ class TestGhost:
             # Call ghost update
             ghost.update(0.1)
 
-            # Verify methods were called
-            mock_mode.update.assert_called_once_with(0.1)
+            # Verify methods were called, mode timing is left to the group
+            mock_mode.update.assert_not_called()
             ghost.scatter.assert_called_once()
             assert entity_update_called is True
 
@@ -161,6 +162,23 @@ class TestGhost:
             # Verify speed was set back to normal
             assert ghost.speed == 100
 
+    def test_scatter_targets_follow_maze_size(self, node, mock_ghost_sprites):
+        """Test corner scatter targets use the loaded maze dimensions"""
+        pinky = Pinky(node, MagicMock())
+        inky = Inky(node, MagicMock(), MagicMock())
+        clyde = Clyde(node, MagicMock())
+
+        for ghost in (pinky, inky, clyde):
+            ghost.setMazeSize(200, 150)
+
+        pinky.scatter()
+        inky.scatter()
+        clyde.scatter()
+
+        assert pinky.goal == Vector2(200 * TILEWIDTH, 0)
+        assert inky.goal == Vector2(200 * TILEWIDTH, 150 * TILEHEIGHT)
+        assert clyde.goal == Vector2(0, 150 * TILEHEIGHT)
+
 
 class TestGhostGroup:
     @patch("ghosts.ghost.Blinky")
@@ -284,3 +302,84 @@ class TestGhostGroup:
         mock_pinky.reset.assert_called_once()
         mock_inky.reset.assert_called_once()
         mock_clyde.reset.assert_called_once()
+
+    def test_ghost_group_from_personalities(self, node, mock_ghost_sprites):
+        """Test building a group with a configurable number of ghosts"""
+        personalities = [BLINKY, INKY, INKY, CLYDE, CLYDE, CLYDE]
+        ghost_group = GhostGroup(node, MagicMock(), personalities)
+
+        assert [ghost.name for ghost in ghost_group] == personalities
+        assert ghost_group.pinky is None
+        assert len(ghost_group.getGhosts(CLYDE)) == 3
+        for inky in ghost_group.getGhosts(INKY):
+            assert inky.blinky is ghost_group.blinky
+
+    def test_load_ghost_config(self, tmp_path):
+        """Test reading ghost personalities from a JSON config"""
+        config = tmp_path / "ghosts.json"
+        config.write_text('["blinky", {"personality": "Pinky", "count": 3}]')
+
+        assert loadGhostConfig(config) == [BLINKY, PINKY, PINKY, PINKY]
+
+        config.write_text('["sue"]')
+        with pytest.raises(ValueError):
+            loadGhostConfig(config)
+
+    def test_colliding_ghosts(self, node, mock_ghost_sprites):
+        """Test the group-wide overlap test only returns touching ghosts"""
+        ghost_group = GhostGroup(node, MagicMock(), [BLINKY] * 100)
+        for i, ghost in enumerate(ghost_group):
+            ghost.position = Vector2(i * TILEWIDTH, 0)
+            ghost.updateGrid()
+
+        pacman = MagicMock()
+        pacman.position = Vector2(5 * TILEWIDTH + 3, 0)
+        pacman.lastPosition = None
+        pacman.collideRadius = 5
+
+        assert ghost_group.collidingGhosts(pacman) == [ghost_group.ghosts[5]]
+
+        pacman.position = Vector2(0, 5 * TILEHEIGHT)
+        assert ghost_group.collidingGhosts(pacman) == []
+
+    def test_ghosts_keep_their_grid_bucket(self, node, mock_ghost_sprites):
+        """Test a moving ghost re-buckets itself once it reaches a new tile"""
+        ghost_group = GhostGroup(node, MagicMock(), [BLINKY])
+        ghost = ghost_group.blinky
+        start = ghost_group.grid.getKey(ghost.position)
+        steps = iter([Vector2(1, 0), Vector2(2 * TILEWIDTH, 0)])
+
+        def move(self, dt):
+            self.position += next(steps)
+
+        with patch.object(Entity, "update", move):
+            ghost.update(0.1)
+            assert ghost_group.grid.keys[id(ghost)] == start
+            assert ghost_group.grid.cells[start] == [ghost]
+
+            ghost.update(0.1)
+        key = ghost_group.grid.getKey(ghost.position)
+        assert key != start
+        assert ghost_group.grid.cells[key] == [ghost]
+        assert start not in ghost_group.grid.cells
+
+    def test_group_goals_match_each_personality(self, node, mock_ghost_sprites):
+        """Test the array goals of a group equal the ones each ghost computes
+        on its own, in both main modes"""
+        pacman = MagicMock()
+        pacman.position = Vector2(10 * TILEWIDTH, 12 * TILEHEIGHT)
+        pacman.direction = LEFT
+        pacman.directions = {LEFT: Vector2(-1, 0)}
+        personalities = [BLINKY, PINKY, INKY, CLYDE, CLYDE, INKY]
+        ghost_group = GhostGroup(node, pacman, personalities)
+        ghost_group.setMazeSize(60, 40)
+        positions = [(3, 4), (20, 2), (7, 30), (12, 14), (40, 33), (1, 1)]
+        for ghost, (col, row) in zip(ghost_group, positions):
+            ghost.position = Vector2(col * TILEWIDTH, row * TILEHEIGHT)
+
+        ghost_group.updateGoals()
+        for mode, method in ((SCATTER, "scatter"), (CHASE, "chase")):
+            for ghost in ghost_group:
+                ghost.mode.current = mode
+                getattr(ghost, method)()
+                assert ghost_group.getGoal(ghost) == ghost.goal
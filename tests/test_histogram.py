@@ -0,0 +1,68 @@
+import pytest
+from telemetry.histogram import (
+    FrameTimeReporter,
+    LogHistogram,
+    bucketIndex,
+    bucketRange,
+)
+
+
+class TestLogHistogram:
+    @pytest.mark.parametrize("value", [0, 1, 127, 128, 129, 1000, 33333, 999999])
+    def test_bucket_contains_value(self, value):
+        """Test every value lands in a bucket whose range holds it"""
+        low, high = bucketRange(bucketIndex(value))
+        assert low <= value <= high
+
+    def test_relative_precision(self):
+        """Test buckets stay within 1/64 of their value"""
+        for value in range(128, 200000, 97):
+            low, high = bucketRange(bucketIndex(value))
+            assert (high - low + 1) / low <= 1 / 64
+
+    def test_percentiles(self):
+        """Test quantiles of a uniform distribution within bucket precision"""
+        histogram = LogHistogram()
+        for value in range(1, 10001):
+            histogram.record(value)
+
+        stats = histogram.getStats()
+        assert stats["count"] == 10000
+        assert stats["p50"] == pytest.approx(5000, rel=0.02)
+        assert stats["p90"] == pytest.approx(9000, rel=0.02)
+        assert stats["p99"] == pytest.approx(9900, rel=0.02)
+        assert stats["p999"] == pytest.approx(9990, rel=0.02)
+        assert stats["max"] == 10000
+
+    def test_values_clamped_to_highest(self):
+        """Test huge values are clamped instead of growing the buckets"""
+        histogram = LogHistogram(highest=1000)
+        histogram.record(10**9)
+        assert histogram.max == 1000
+        assert histogram.valueAt(1.0) == 1000
+
+    def test_empty_histogram(self):
+        """Test an empty histogram reports zeros"""
+        stats = LogHistogram().getStats()
+        assert stats["p99"] == 0
+        assert stats["count"] == 0
+
+
+class TestFrameTimeReporter:
+    def test_exports_window_lines(self, tmp_path):
+        """Test one line per interval plus a cumulative line on close"""
+        path = tmp_path / "frames.txt"
+        reporter = FrameTimeReporter(str(path), interval=1.0, build="abc123")
+
+        for i in range(61):
+            reporter.frame(i / 30)
+        reporter.close()
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 3
+        assert lines[0].startswith("frame_time,host=")
+        assert "build=abc123" in lines[0]
+        assert lines[-1].startswith("frame_time_total,")
+        fields = dict(field.split("=") for field in lines[-1].split(" ")[1].split(","))
+        assert fields["count"] == "60i"
+        assert float(fields["p50"]) == pytest.approx(33.333, rel=0.02)
@@ -0,0 +1,76 @@
+import gc
+import json
+import tracemalloc
+from telemetry.memory import MemoryTelemetry
+from telemetry.profiler import FrameProfiler
+
+
+class TestMemoryTelemetry:
+    def setup_method(self):
+        self.memory = MemoryTelemetry(sampleInterval=2)
+        self.profiler = FrameProfiler(enabled=True)
+        self.profiler.memory = self.memory
+
+    def teardown_method(self):
+        self.memory.stop()
+
+    def test_stopped_telemetry_records_nothing(self):
+        """Test stage boundaries are ignored until start()"""
+        self.profiler.end("pellets.update", self.profiler.begin())
+        self.profiler.endFrame(self.profiler.begin())
+
+        assert self.memory.stages == {}
+        assert self.memory.frames == 0
+        assert not tracemalloc.is_tracing()
+
+    def test_allocations_charged_to_stage(self):
+        """Test retained allocations show up on the stage that made them"""
+        self.memory.start()
+        kept = []
+
+        t = self.profiler.begin()
+        kept.append([object() for _ in range(1000)])
+        self.profiler.end("allocating", t)
+        t = self.profiler.begin()
+        self.profiler.end("idle", t)
+
+        stages = self.memory.getSummary()["stages"]
+        assert stages["allocating"]["net_blocks_mean"] >= 1000
+        assert stages["allocating"]["net_bytes_mean"] > stages["idle"]["net_bytes_mean"]
+
+    def test_gc_pauses_charged_to_stage(self):
+        """Test collections are counted per generation and per stage"""
+        self.memory.start()
+
+        t = self.profiler.begin()
+        gc.collect(1)
+        self.profiler.end("collecting", t)
+
+        summary = self.memory.getSummary()
+        assert summary["gc"]["1"]["collections"] >= 1
+        assert summary["stages"]["collecting"]["gc_count"] >= 1
+        assert summary["stages"]["collecting"]["gc_ms_total"] > 0
+
+    def test_sampled_frames_report_top_sites(self, tmp_path):
+        """Test snapshot diffs name the lines that allocated"""
+        self.memory.start()
+        kept = []
+
+        for _ in range(4):
+            t = self.profiler.begin()
+            kept.append([object() for _ in range(500)])
+            self.profiler.endFrame(t)
+        path = tmp_path / "memory.json"
+        self.memory.dump(path)
+
+        data = json.loads(path.read_text())
+        assert data["frames"] == 4
+        assert any("test_memory.py" in site["site"] for site in data["top_sites"])
+
+    def test_stop_removes_gc_callback(self):
+        """Test stop() stops tracing and unhooks the gc callback"""
+        self.memory.start()
+        self.memory.stop()
+
+        assert self.memory.onGC not in gc.callbacks
+        assert not tracemalloc.is_tracing()
@@ -0,0 +1,157 @@
+import pytest
+from unittest.mock import MagicMock
+from constants import *
+from ghosts.ghost import GhostGroup
+from modes.modes import FREIGHTTIME, ModeController, ModeTimeline, getSchedule
+from scheduler import Scheduler
+
+
+@pytest.fixture
+def mock_ghost_sprites(monkeypatch):
+    """Mock the GhostSprites class to avoid loading images"""
+    from styles.sprite.sprites import GhostSprites
+
+    def mock_init(self, entity):
+        self.entity = entity
+
+    monkeypatch.setattr(GhostSprites, "__init__", mock_init)
+    monkeypatch.setattr(GhostSprites, "update", lambda self, dt: None)
+
+
+def run(scheduler, seconds, dt=SIMSTEP):
+    for _ in range(int(round(seconds / dt))):
+        scheduler.update(dt)
+
+
+class TestModeTimeline:
+    def test_schedule_depends_on_level(self):
+        """Test levels pick the arcade table they belong to"""
+        assert getSchedule(0)[-2] == 20
+        assert getSchedule(1)[-2] == 1033
+        assert getSchedule(3) == getSchedule(1)
+        assert getSchedule(4)[0] == 5
+        assert getSchedule(50) == getSchedule(4)
+
+    def test_fires_only_when_a_boundary_is_crossed(self):
+        """Test mode changes are reported once per phase, on time"""
+        changes = []
+        scheduler = Scheduler()
+        timeline = ModeTimeline(
+            scheduler, 0, lambda mode: changes.append((scheduler.gameTime, mode))
+        )
+
+        run(scheduler, 6.9)
+        assert changes == []
+        run(scheduler, 0.2)
+        assert [mode for _, mode in changes] == [CHASE]
+        assert changes[0][0] == pytest.approx(7, abs=SIMSTEP)
+
+        run(scheduler, 200)
+        modes = [mode for _, mode in changes]
+        assert modes == [CHASE, SCATTER, CHASE, SCATTER, CHASE, SCATTER, CHASE]
+        assert timeline.changeTimer is None
+        assert len(scheduler) == 0
+
+    def test_long_step_crosses_several_boundaries(self):
+        """Test a single large dt fires every phase it passes"""
+        changes = []
+        scheduler = Scheduler()
+        timeline = ModeTimeline(scheduler, 4, changes.append)
+
+        scheduler.update(5 + 20 + 5 + 0.5)
+
+        assert changes == [CHASE, SCATTER, CHASE]
+        assert timeline.mode is CHASE
+
+    def test_freight_end_restarts_on_new_pellet(self):
+        """Test frightened mode ends once, FREIGHTTIME after the last pellet"""
+        ended = MagicMock()
+        scheduler = Scheduler()
+        timeline = ModeTimeline(scheduler, onFreightEnd=ended)
+
+        timeline.startFreight()
+        run(scheduler, FREIGHTTIME - 1)
+        timeline.startFreight()
+        run(scheduler, FREIGHTTIME - 0.5)
+        ended.assert_not_called()
+
+        run(scheduler, 1)
+        ended.assert_called_once_with()
+
+    def test_restore_carries_on_from_a_phase(self):
+        """Test a restored timeline fires at the saved due times and goes on
+        with the phases after"""
+        changes = []
+        ended = MagicMock()
+        scheduler = Scheduler()
+        scheduler.gameTime = 30.0
+        timeline = ModeTimeline(scheduler, 0, changes.append, ended)
+
+        timeline.restore(2, SCATTER, changeDue=31.0, freightDue=30.5)
+        scheduler.update(0.75)
+        ended.assert_called_once_with()
+        assert changes == []
+
+        scheduler.update(0.25 + 20)
+        assert changes == [CHASE, SCATTER]
+        assert timeline.phase == 4
+
+    def test_pause_holds_the_schedule(self):
+        """Test mode phases run on game time, which stops while paused"""
+        changes = []
+        scheduler = Scheduler()
+        ModeTimeline(scheduler, 0, changes.append)
+
+        scheduler.update(10, paused=True)
+        assert changes == []
+        scheduler.update(7)
+        assert changes == [CHASE]
+
+
+class TestModeController:
+    def test_freight_and_spawn_return_to_main_mode(self):
+        """Test leaving freight and spawn goes back to the timeline's mode"""
+        entity = MagicMock()
+        mode = ModeController(entity)
+        mode.setFreightMode()
+        mode.setMainMode(CHASE)
+        assert mode.current is FREIGHT
+
+        mode.setSpawnMode()
+        mode.endFreight()
+        assert mode.current is SPAWN
+
+        mode.endSpawn()
+        assert mode.current is CHASE
+        assert entity.normalMode.call_count == 1
+
+
+class TestGhostGroupTimeline:
+    def test_ghosts_follow_shared_timeline(self, node, mock_ghost_sprites):
+        """Test every ghost switches mode together and freight ends for all"""
+        group = GhostGroup(node, MagicMock(), [BLINKY, PINKY, CLYDE])
+        group.setSpawnNode(node)
+
+        group.startFreight()
+        group.ghosts[0].startSpawn()
+        group.scheduler.update(FREIGHTTIME - 0.5)
+        assert [g.mode.current for g in group] == [SPAWN, FREIGHT, FREIGHT]
+
+        group.scheduler.update(0.5)
+        assert [g.mode.current for g in group] == [SPAWN, CHASE, CHASE]
+
+        group.ghosts[0].reachedNode(node)
+        assert group.ghosts[0].mode.current is CHASE
+
+    def test_reset_restarts_schedule(self, node, mock_ghost_sprites):
+        """Test losing a life starts the level's schedule over"""
+        group = GhostGroup(node, MagicMock(), [BLINKY], level=2)
+        group.scheduler.update(30)
+        group.startFreight()
+
+        group.reset()
+
+        assert group.timeline.mode is SCATTER
+        assert group.timeline.freightTimer is None
+        assert group.timeline.changeTimer.due == pytest.approx(30 + 7)
+        assert group.ghosts[0].mode.current is SCATTER
@@ -0,0 +1,213 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from constants import *
+from food.pellets import Pellet
+from netplay.protocol import (
+    ALIVE,
+    FRUITID,
+    INPUT,
+    JOIN,
+    PACMANID,
+    REJECT,
+    VISIBLE,
+    WorldState,
+    applyState,
+    encodeState,
+    FRAME,
+    packInput,
+    packMessage,
+    pelletCells,
+    readMessage,
+    unpackInput,
+)
+from netplay.client import NetClient
+from netplay.server import STARTTIME, GameServer
+
+
+def makeState(tick, pacmanX=100.0, pellets=(30, 31, 32, 400), fruit=False):
+    state = WorldState()
+    state.tick = tick
+    state.score = 10 * (4 - len(pellets))
+    state.lives = 3
+    state.level = 1
+    state.entities[PACMANID] = (
+        PACMAN,
+        int(pacmanX * 8),
+        3328,
+        LEFT,
+        0,
+        VISIBLE | ALIVE,
+    )
+    state.entities[1] = (BLINKY, 1600, 1800, UP, CHASE, VISIBLE | ALIVE)
+    if fruit:
+        state.entities[FRUITID] = (FRUIT, 1440, 2560, STOP, 0, VISIBLE | ALIVE)
+    state.pellets = frozenset(pellets)
+    return state
+
+
+def sameState(a, b):
+    return (a.tick, a.score, a.lives, a.level, a.paused, a.entities, a.pellets) == (
+        b.tick,
+        b.score,
+        b.lives,
+        b.level,
+        b.paused,
+        b.entities,
+        b.pellets,
+    )
+
+
+class TestProtocol:
+    def test_full_then_deltas_rebuild_state(self):
+        """Test a client applying a full state and deltas ends on the server's"""
+        states = [
+            makeState(0),
+            makeState(1, 103.3, fruit=True),
+            makeState(2, 106.7, (30, 32, 400), fruit=True),
+            makeState(3, 106.7, (30, 32, 400)),
+            makeState(4, 90.0, (30,)),
+        ]
+        client = WorldState()
+        applyState(client, encodeState(None, states[0]))
+        assert sameState(client, states[0])
+
+        for previous, state in zip(states, states[1:]):
+            applyState(client, encodeState(previous, state))
+            assert sameState(client, state)
+
+    def test_deltas_only_carry_changes(self):
+        """Test an unchanged tick costs a few bytes and a move a few more"""
+        full = encodeState(None, makeState(0))
+        same = encodeState(makeState(0), makeState(1))
+        moved = encodeState(makeState(0), makeState(1, 103.3))
+
+        assert len(same) <= 8
+        assert len(moved) <= len(same) + 4
+        assert len(full) > len(moved)
+
+    def test_reset_replaces_old_state(self):
+        """Test a full state drops entities the client had from before"""
+        client = WorldState()
+        applyState(client, encodeState(None, makeState(0, fruit=True)))
+        applyState(client, encodeState(None, makeState(9)))
+
+        assert FRUITID not in client.entities
+        assert client.tick == 9
+
+    def test_pellet_cells_follow_the_maze_width(self):
+        """Test pellets of a maze wider than 28 columns get distinct cells
+        that map back to them"""
+        pellets = MagicMock()
+        pellets.ncols = 40
+        pellets.pelletList = [Pellet(0, 39), Pellet(1, 11), Pellet(2, 0)]
+
+        cells = pelletCells(pellets)
+
+        assert sorted(cells) == [39, 40 + 11, 80]
+        assert cells[39] is pellets.pelletList[0]
+
+    def test_malformed_input_is_none(self):
+        """Test only a single known input byte decodes to a direction"""
+        assert unpackInput(packInput(LEFT)[FRAME.size :]) == LEFT
+        for payload in (b"", b"\x05", b"\x07", b"\x08", b"\x01\x02"):
+            assert unpackInput(payload) is None
+
+
+async def versus():
+    server = GameServer(maxSessions=1, reportInterval=0)
+    await server.start(tick=False)
+    pacman = NetClient()
+    await pacman.connect("127.0.0.1", server.port, PACMAN)
+    ghost = NetClient()
+    await ghost.connect("127.0.0.1", server.port, GHOST)
+    extra = NetClient()
+    with pytest.raises(ConnectionError):
+        await extra.connect("127.0.0.1", server.port, PACMAN)
+
+    # Joining sends the whole state, then every tick one delta
+    await pacman.receive()
+    await ghost.receive()
+    session = server.sessions[0]
+    start = session.game.pacman.position.copy()
+    pacman.sendInput(RIGHT)
+    ghost.sendInput(UP)
+    await asyncio.sleep(0.01)
+    for _ in range(STARTTIME * FPS + 30):
+        server.tick()
+        await pacman.receive()
+        await ghost.receive()
+    game = session.game
+
+    result = {
+        "ids": (pacman.entityId, ghost.entityId),
+        "inputs": (game.pacman.input, game.ghosts.ghosts[0].input),
+        "ai": game.ghosts.ghosts[1].input,
+        "moved": game.pacman.position.x > start.x,
+        "synced": sameState(pacman.state, session.state)
+        and sameState(ghost.state, session.state),
+        "report": server.report(),
+    }
+    await ghost.close()
+    await asyncio.sleep(0.01)
+    result["players"] = server.players
+    await pacman.close()
+    await asyncio.sleep(0.01)
+    result["sessions"] = len(server.sessions)
+    await server.stop()
+    return result
+
+
+async def malformed():
+    server = GameServer(maxSessions=1, reportInterval=0)
+    await server.start(tick=False)
+    replies = []
+    # More bad joins than the server has sessions
+    for role in (7, 200, 7):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(packMessage(JOIN, bytes([role])))
+        replies.append(await readMessage(reader))
+        writer.close()
+    sessions = len(server.sessions)
+
+    pacman = NetClient()
+    await pacman.connect("127.0.0.1", server.port, PACMAN)
+    player = server.sessions[0].players[PACMANID]
+    pacman.sendInput(UP)
+    for payload in (b"\x06", b"", b"\x01\x02"):
+        pacman.writer.write(packMessage(INPUT, payload))
+    await asyncio.sleep(0.01)
+    result = {
+        "replies": replies,
+        "sessions": sessions,
+        "input": player.input,
+        "connected": server.players == 1,
+    }
+    await pacman.close()
+    await server.stop()
+    return result
+
+
+class TestGameServer:
+    def test_versus_session_over_localhost(self):
+        """Test players drive Pac-Man and a ghost and see the server's state"""
+        result = asyncio.run(versus())
+
+        assert result["ids"] == (PACMANID, 1)
+        assert result["inputs"] == (RIGHT, UP)
+        assert result["ai"] is None
+        assert result["moved"]
+        assert result["synced"]
+        assert result["report"].startswith("1 sessions, 2 players")
+        assert result["players"] == 1
+        assert result["sessions"] == 0
+
+    def test_malformed_messages_are_refused(self):
+        """Test unknown roles are rejected without taking a session and bad
+        inputs are dropped without dropping the player"""
+        result = asyncio.run(malformed())
+
+        assert result["replies"] == [(REJECT, b"")] * 3
+        assert result["sessions"] == 0
+        assert result["input"] == UP
+        assert result["connected"]
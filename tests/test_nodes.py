@@ -184,3 +184,48 @@ class TestNodeGroup:
 
             # Test node not found
             assert node_group.getNodeFromTiles(10, 10) is None
+
+    def test_run_connections_stop_at_walls(self):
+        """Test nodes only link across path symbols and not through walls"""
+        with patch("movement.nodes.NodeGroup.readMazeFile") as mock_read:
+            mock_data = np.array(
+                [
+                    ["+", ".", "+", "X", "+"],
+                    ["|", " ", "|", " ", " "],
+                    ["+", "-", "+", ".", "n"],
+                ]
+            )
+            mock_read.return_value = mock_data
+
+            node_group = NodeGroup("fake_maze.txt")
+
+            top_left = node_group.getNodeFromTiles(0, 0)
+            top_mid = node_group.getNodeFromTiles(2, 0)
+            top_right = node_group.getNodeFromTiles(4, 0)
+            bottom_left = node_group.getNodeFromTiles(0, 2)
+            bottom_mid = node_group.getNodeFromTiles(2, 2)
+            bottom_right = node_group.getNodeFromTiles(4, 2)
+
+            assert len(node_group.nodesLUT) == 6
+            assert top_left.neighbors[RIGHT] is top_mid
+            assert top_mid.neighbors[LEFT] is top_left
+            assert top_mid.neighbors[RIGHT] is None
+            assert top_right.neighbors[LEFT] is None
+            assert top_left.neighbors[DOWN] is bottom_left
+            assert bottom_mid.neighbors[UP] is top_mid
+            assert bottom_mid.neighbors[RIGHT] is bottom_right
+            assert top_right.neighbors[DOWN] is None
+
+
+class TestReadMazeFile:
+    @pytest.mark.parametrize("name", ["maze1", "maze2", "maze1_rotation"])
+    def test_matches_loadtxt(self, name):
+        """Test the maze reader gives the same array as np.loadtxt"""
+        from maze.mazedata import readMazeFile
+
+        path = f"maze/{name}.txt"
+        expected = np.loadtxt(path, dtype="<U1")
+        data = readMazeFile(path)
+
+        assert data.dtype == expected.dtype
+        assert np.array_equal(data, expected)
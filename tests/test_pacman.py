@@ -95,7 +95,7 @@ def mock_pacman_sprites(monkeypatch):
     """Mock the PacmanSprites class to avoid loading images"""
     from styles.sprite.sprites import PacmanSprites
 
-    def mock_init(self, entity):
+    def mock_init(self, entity, clock=None):
         self.entity = entity
         self.sprites = {}
 
@@ -2,6 +2,7 @@ import pytest
 import pygame
 import numpy as np
 from food.pellets import Pellet, PowerPellet, PelletGroup
+from scheduler import Scheduler
 from movement.vector import Vector2
 from constants import *
 from unittest.mock import patch, MagicMock, mock_open
@@ -52,27 +53,18 @@ class TestPowerPellet:
         assert power_pellet.radius == int(8 * TILEWIDTH / 16)
         assert power_pellet.points == 50
         assert power_pellet.flashTime == 0.2
-        assert power_pellet.timer == 0
 
-    def test_power_pellet_update(self):
+    def test_power_pellet_flash(self):
         """Test power pellet flashing behavior"""
         power_pellet = PowerPellet(5, 10)
 
         # Initially visible
         assert power_pellet.visible is True
 
-        # Update with less than flash time
-        power_pellet.update(0.1)
-        assert power_pellet.timer == 0.1
-        assert power_pellet.visible is True  # Still visible
-
-        # Update again to exceed flash time
-        power_pellet.update(0.1)
-        assert power_pellet.timer == 0.0  # Timer reset
+        power_pellet.flash()
         assert power_pellet.visible is False  # Toggled to invisible
 
-        # Update once more to toggle back
-        power_pellet.update(0.2)
+        power_pellet.flash()
         assert power_pellet.visible is True  # Toggled back to visible
 
 
@@ -114,8 +106,8 @@ class TestPelletGroup:
             # Should not be empty anymore
             assert pellet_group.isEmpty() is False
 
-    def test_pellet_group_update(self):
-        """Test updating all power pellets in group"""
+    def test_pellet_group_flashing(self):
+        """Test the power pellets flash together on the scheduler"""
         with patch("food.pellets.PelletGroup.readPelletfile") as mock_read:
             # Create data with 2 power pellets
             mock_read.return_value = np.array([["P", "P"]])
@@ -130,10 +122,21 @@ class TestPelletGroup:
             for pp in pellet_group.powerpellets:
                 assert pp.visible is True
 
-            # Update with enough time to toggle visibility
-            pellet_group.update(0.3)
+            scheduler = Scheduler()
+            timer = pellet_group.startFlashing(scheduler)
 
-            # All should have toggled to invisible
+            # Less than the flash time leaves them as they are
+            scheduler.update(0.1, paused=True)
+            for pp in pellet_group.powerpellets:
+                assert pp.visible is True
+
+            # Flashing goes on while the game is paused
+            scheduler.update(0.2, paused=True)
+            for pp in pellet_group.powerpellets:
+                assert pp.visible is False
+
+            timer.cancel()
+            scheduler.update(1.0)
             for pp in pellet_group.powerpellets:
                 assert pp.visible is False
 
@@ -153,3 +156,35 @@ class TestPelletGroup:
 
                 # Each pellet's render should be called
                 assert mock_render.call_count == 2
+
+    def test_pellet_group_remove_pellet(self, mock_pellet_data):
+        """Test eaten pellets leave the list and the collision grid"""
+        with patch("food.pellets.PelletGroup.readPelletfile") as mock_read:
+            mock_read.return_value = mock_pellet_data
+            pellet_group = PelletGroup("fake_file.txt")
+
+            power_pellet = pellet_group.powerpellets[0]
+            assert power_pellet in pellet_group.getNearby(power_pellet.position)
+
+            pellet_group.removePellet(power_pellet)
+
+            assert power_pellet not in pellet_group.pelletList
+            assert power_pellet not in pellet_group.powerpellets
+            assert power_pellet not in pellet_group.getNearby(power_pellet.position)
+
+    def test_pellet_group_remove_pellets(self, mock_pellet_data):
+        """Test removing many pellets at once keeps the rest in order"""
+        with patch("food.pellets.PelletGroup.readPelletfile") as mock_read:
+            mock_read.return_value = mock_pellet_data
+            pellet_group = PelletGroup("fake_file.txt")
+
+            pellets = list(pellet_group.pelletList)
+            eaten = pellets[::2]
+            pellet_group.removePellets(eaten)
+
+            assert pellet_group.pelletList == pellets[1::2]
+            assert pellet_group.powerpellets == [
+                pellet for pellet in pellets[1::2] if pellet.name == POWERPELLET
+            ]
+            for pellet in eaten:
+                assert pellet not in pellet_group.getNearby(pellet.position)
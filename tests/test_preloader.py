@@ -0,0 +1,52 @@
+import pygame
+import pytest
+from maze.preloader import LevelAssets, LevelPreloader
+from unittest.mock import patch
+
+
+class TestLevelPreloader:
+    def test_preloaded_level_matches_direct_build(self, display):
+        """Test the worker builds the same level the main thread would"""
+        preloader = LevelPreloader((0, 0, 0))
+        preloader.preload(1)
+
+        assets = preloader.take(1)
+        direct = LevelAssets(1, (0, 0, 0))
+
+        assert assets.mazedata.obj.name == "maze2"
+        assert len(assets.pellets.pelletList) == len(direct.pellets.pelletList)
+        assert len(assets.nodes.nodesLUT) == len(direct.nodes.nodesLUT)
+        assert pygame.image.tobytes(
+            assets.background_norm, "RGB"
+        ) == pygame.image.tobytes(direct.background_norm, "RGB")
+
+    @patch("maze.preloader.LevelAssets")
+    def test_take_other_level_returns_none(self, mock_assets):
+        """Test assets for a different level are not handed over"""
+        preloader = LevelPreloader((0, 0, 0))
+        preloader.preload(2)
+
+        assert preloader.take(0) is None
+        assert preloader.take(2) is mock_assets.return_value
+        assert preloader.take(2) is None
+
+    @patch("maze.preloader.LevelAssets", side_effect=ValueError("bad maze"))
+    def test_failed_build_falls_back(self, mock_assets, capsys):
+        """Test a worker error is reported and leaves the level to be built
+        synchronously"""
+        preloader = LevelPreloader((0, 0, 0))
+        preloader.preload(1)
+
+        assert preloader.take(1) is None
+        assert isinstance(preloader.error, ValueError)
+        assert "bad maze" in capsys.readouterr().out
+
+    @patch("maze.preloader.LevelAssets")
+    def test_preload_same_level_once(self, mock_assets):
+        """Test asking for the queued level again does not rebuild it"""
+        preloader = LevelPreloader((0, 0, 0))
+        preloader.preload(3)
+        preloader.preload(3)
+        preloader.wait()
+
+        mock_assets.assert_called_once_with(3, (0, 0, 0))
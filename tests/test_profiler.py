@@ -0,0 +1,63 @@
+import json
+import pytest
+from telemetry.profiler import FrameProfiler, percentile
+from unittest.mock import patch
+
+
+class TestFrameProfiler:
+    def test_disabled_profiler_records_nothing(self):
+        """Test begin/end are no-ops while disabled"""
+        profiler = FrameProfiler()
+
+        t = profiler.begin()
+        profiler.end("ghosts.update", t)
+
+        assert t == 0
+        assert profiler.samples == {}
+        assert profiler.getStats() == {}
+
+    def test_rolling_stats(self):
+        """Test mean and percentiles over the rolling window"""
+        profiler = FrameProfiler(enabled=True, window=100)
+        ticks = iter(range(0, 10**9, 10**6))
+
+        with patch("time.perf_counter_ns", side_effect=lambda: next(ticks)):
+            for i in range(150):
+                t = profiler.begin()
+                profiler.end("pacman.update", t)
+
+        stats = profiler.getStats()["pacman.update"]
+        assert stats["count"] == 100
+        assert stats["mean_ms"] == pytest.approx(1.0)
+        assert stats["p95_ms"] == pytest.approx(1.0)
+        assert stats["p99_ms"] == pytest.approx(1.0)
+
+    def test_percentile(self):
+        """Test percentile picks from a sorted sample list"""
+        ordered = list(range(1, 101))
+        assert percentile(ordered, 0.95) == 95
+        assert percentile(ordered, 0.99) == 99
+        assert percentile(ordered, 0.5) == 50
+        assert percentile(ordered, 1) == 100
+        assert percentile(ordered, 0) == 1
+        assert percentile([7], 0.99) == 7
+        assert percentile([], 0.5) == 0
+
+    def test_dump(self, tmp_path):
+        """Test the JSON dump contains every stage"""
+        profiler = FrameProfiler(enabled=True)
+        profiler.end("render.pellets", profiler.begin())
+        path = tmp_path / "profile.json"
+
+        profiler.dump(path)
+
+        data = json.loads(path.read_text())
+        assert "render.pellets" in data["stages"]
+        assert data["stages"]["render.pellets"]["count"] == 1
+
+    def test_toggle_overlay_enables_recording(self):
+        """Test switching the overlay on also starts recording"""
+        profiler = FrameProfiler()
+        profiler.toggleOverlay()
+        assert profiler.overlay is True
+        assert profiler.enabled is True
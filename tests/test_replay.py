@@ -0,0 +1,359 @@
+import itertools
+import random
+import pytest
+from unittest.mock import MagicMock, patch
+from constants import *
+from food.pellets import Pellet
+from ghosts.ghost import DEFAULTGHOSTS
+from main import GameController
+from maze.mazedata import MazeData
+from movement.vector import Vector2
+from pacman.pacman import Pacman
+from replay import (
+    NOTIMER,
+    Keyframe,
+    ReplayHeader,
+    ReplayPlayer,
+    ReplayReader,
+    ReplayRecorder,
+    ReplayWriter,
+    decodeInput,
+    encodeInput,
+    mazeDigests,
+    readVarint,
+    writeVarint,
+)
+
+
+def makeKeyframe(tick, input=0, score=0):
+    time = tick / FPS
+    return Keyframe(
+        tick,
+        1,
+        3,
+        score,
+        False,
+        input,
+        (216.0, 416.0, LEFT, 100.0, True, True, 224.0, 416.0, 208.0, 416.0),
+        [
+            (200.0, 224.0, UP, 100.0, SCATTER, True, 200, 200.0, 240.0, 200.0, 208.0),
+            (216.0, 272.0, DOWN, 50.0, FREIGHT, True, 400, 216.0, 256.0, 216.0, 288.0),
+        ],
+        bytes(range(126)),
+        numEaten=42,
+        clock=(time, time),
+        timers=(NOTIMER, NOTIMER, NOTIMER, time + 0.2, time + 7, NOTIMER),
+        phase=1,
+        mode=CHASE,
+        access=[(3, DOWN, 0b111110), (40, LEFT, 0b100001)],
+    )
+
+
+def makeHeader(interval=10, chunkKeyframes=2):
+    return ReplayHeader(
+        42, [("maze1", b"\x01" * 8)], [BLINKY, CLYDE], "test", interval, chunkKeyframes
+    )
+
+
+def writeReplay(path, inputs, header=None):
+    writer = ReplayWriter(path, header or makeHeader())
+    for tick, input in enumerate(inputs):
+        keyframe = makeKeyframe(tick, input) if writer.isKeyframe(tick) else None
+        writer.write(input, keyframe)
+    writer.close()
+    return writer
+
+
+def makeGame():
+    game = MagicMock()
+    game.level = 0
+    game.lives = 5
+    game.score = 0
+    game.pause.paused = True
+    game.pause.timer = None
+    game.pause.func = None
+    game.pacman.position = Vector2(216, 416)
+    game.pacman.node.position = Vector2(224, 416)
+    game.pacman.target.position = Vector2(208, 416)
+    game.pacman.direction = LEFT
+    game.pacman.speed = 100.0
+    game.pacman.alive = True
+    game.pacman.visible = True
+    game.ghosts.__iter__.side_effect = lambda: iter([])
+    game.ghosts.timeline.phase = 0
+    game.ghosts.timeline.mode = SCATTER
+    game.ghosts.timeline.changeTimer = None
+    game.ghosts.timeline.freightTimer = None
+    game.pellets.pelletList = [Pellet(4, 1), Pellet(4, 2)]
+    game.pellets.powerpellets = []
+    game.pellets.numEaten = 0
+    game.pellets.ncols = NCOLS
+    game.pellets.nrows = NROWS
+    game.nodes.nodesLUT = {}
+    game.scheduler.time = 0.0
+    game.scheduler.gameTime = 0.0
+    game.fruitTimer = None
+    game.flashTimer = None
+    game.pelletTimer = None
+    game.flashBG = False
+    game.ticks = 0
+    return game
+
+
+class TestReplayFormat:
+    def test_varint_and_input_round_trip(self):
+        """Test varints and input bytes decode to what was encoded"""
+        out = bytearray()
+        for value in (0, 1, 127, 128, 300, 2**32):
+            writeVarint(out, value)
+        offset = 0
+        values = []
+        while offset < len(out):
+            value, offset = readVarint(out, offset)
+            values.append(value)
+
+        assert values == [0, 1, 127, 128, 300, 2**32]
+        assert len(out) == 1 + 1 + 1 + 2 + 2 + 5
+        assert decodeInput(encodeInput(RIGHT, True)) == (RIGHT, True)
+        assert decodeInput(encodeInput(STOP)) == (STOP, False)
+
+    def test_reader_returns_every_tick(self, tmp_path):
+        """Test inputs and keyframes read back tick by tick across chunks"""
+        path = tmp_path / "game.pmr"
+        inputs = [encodeInput(d) for d in [UP] * 7 + [LEFT] * 30 + [DOWN] * 8]
+        inputs[12] = encodeInput(LEFT, True)
+        writer = writeReplay(path, inputs)
+
+        with ReplayReader(path) as reader:
+            entries = list(reader.read())
+            assert reader.header.ghosts == [BLINKY, CLYDE]
+            assert reader.header.mazes == [("maze1", b"\x01" * 8)]
+            assert reader.ticks == 45
+
+        assert len(writer.index) == 3
+        assert [input for _, input, _ in entries] == inputs
+        assert [tick for tick, _, _ in entries] == list(range(45))
+        keyframes = [keyframe for _, _, keyframe in entries if keyframe is not None]
+        assert [keyframe.tick for keyframe in keyframes] == [0, 10, 20, 30, 40]
+        assert keyframes[1] == makeKeyframe(10, inputs[10])
+
+    def test_seek_jumps_to_nearest_keyframe(self, tmp_path):
+        """Test seek gives the last keyframe before a tick and read starts there"""
+        path = tmp_path / "game.pmr"
+        inputs = [encodeInput((UP, DOWN, LEFT)[tick // 4 % 3]) for tick in range(95)]
+        writeReplay(path, inputs)
+
+        with ReplayReader(path) as reader:
+            assert reader.seek(37).tick == 30
+            assert reader.seek(40).tick == 40
+            assert reader.seek(94).tick == 90
+            entries = list(reader.read(57))
+            with pytest.raises(IndexError):
+                reader.seek(95)
+
+        assert [input for _, input, _ in entries] == inputs[57:]
+        assert entries[3][2].tick == 60
+
+    def test_truncated_file_is_scanned(self, tmp_path):
+        """Test a replay without its index still reads its whole chunks"""
+        path = tmp_path / "game.pmr"
+        inputs = [encodeInput(UP)] * 20 + [encodeInput(LEFT)] * 20
+        writer = writeReplay(path, inputs)
+        data = path.read_bytes()
+        firstTick, ticks, offset = writer.index[-1]
+        path.write_bytes(data[: offset + 10])
+
+        with ReplayReader(path) as reader:
+            assert reader.ticks == 20
+            assert [input for _, input, _ in reader.read()] == inputs[:20]
+
+    def test_pellets_of_any_maze_size(self):
+        """Test the pellet bitmap follows the maze size, so wide columns do
+        not alias the next row and big mazes fit"""
+        game = makeGame()
+        for ncols, nrows in ((40, 20), (200, 200)):
+            game.pellets.ncols = ncols
+            game.pellets.nrows = nrows
+            cells = [(0, ncols - 1), (1, 2), (nrows - 1, ncols - 1)]
+            game.pellets.pelletList = [Pellet(row, col) for row, col in cells]
+
+            keyframe = Keyframe.unpack(Keyframe.capture(game, 0, 0).pack())
+
+            assert (keyframe.ncols, keyframe.nrows) == (ncols, nrows)
+            for row in range(nrows):
+                for col in range(ncols):
+                    assert keyframe.pellet(row, col) == ((row, col) in cells)
+
+    def test_keyframe_required_on_keyframe_ticks(self, tmp_path):
+        """Test the writer refuses a keyframe tick without a keyframe"""
+        writer = ReplayWriter(tmp_path / "game.pmr", makeHeader())
+        with pytest.raises(ValueError):
+            writer.write(0)
+        writer.close()
+
+    def test_hour_of_play_is_small(self, tmp_path):
+        """Test an hour with an input change every second stays a few KB"""
+        path = tmp_path / "hour.pmr"
+        rng = random.Random(1)
+        header = ReplayHeader(7, [("maze1", b"\x01" * 8)], [BLINKY])
+        writer = ReplayWriter(path, header)
+        input = 0
+        for tick in range(3600 * FPS):
+            if tick % FPS == 0:
+                input = encodeInput(rng.choice([UP, DOWN, LEFT, RIGHT]))
+            keyframe = None
+            if writer.isKeyframe(tick):
+                keyframe = makeKeyframe(tick, input, score=tick)
+            writer.write(input, keyframe)
+        writer.close()
+
+        assert path.stat().st_size < 16 * 1024
+        with ReplayReader(path) as reader:
+            keyframe = reader.seek(3600 * FPS - 1)
+        assert keyframe.tick == 3600 * FPS - header.keyframeInterval
+        assert keyframe.score == keyframe.tick
+
+
+class TestReplayHeader:
+    def test_mismatches(self, tmp_path):
+        """Test a replay reports a different engine or maze files"""
+        header = makeHeader()
+        path = tmp_path / "game.pmr"
+        writeReplay(path, [0], header)
+
+        with ReplayReader(path) as reader:
+            read = reader.header
+        assert read.mismatches([("maze1", b"\x01" * 8)], "test") == []
+        assert len(read.mismatches([("maze1", b"\x02" * 8)], "other")) == 2
+
+
+class TestRecordAndPlay:
+    def run(self, replay, game, ticks, keys=()):
+        keys = list(keys)
+        for _ in range(ticks):
+            if keys:
+                game.pacman.getValidKey.return_value = keys.pop(0)
+            replay.tick(game)
+            game.ticks += 1
+            game.score += 10
+
+    def test_playback_repeats_input_and_pause(self, tmp_path):
+        """Test a replay drives Pac-Man and the pause key on the same ticks"""
+        path = tmp_path / "game.pmr"
+        game = makeGame()
+        recorder = ReplayRecorder(path, makeHeader())
+        keys = [UP] * 5 + [LEFT] * 10 + [RIGHT] * 10
+        self.run(recorder, game, 2, keys)
+        recorder.pressPause()
+        self.run(recorder, game, 23, keys[2:])
+        recorder.close()
+        assert game.togglePause.call_count == 1
+
+        game = makeGame()
+        player = ReplayPlayer(path)
+        player.pressPause()
+        self.run(player, game, 25)
+
+        assert game.togglePause.call_count == 1
+        assert player.desyncs == 0
+        assert game.pacman.input == RIGHT
+
+    def test_start_restores_the_keyframe_before_a_tick(self, tmp_path):
+        """Test start restores the keyframe it seeks to, simulates only the
+        ticks after it and playback goes on from there"""
+        path = tmp_path / "game.pmr"
+        game = makeGame()
+        recorder = ReplayRecorder(path, makeHeader())
+        self.run(recorder, game, 25, [UP] * 12 + [LEFT] * 13)
+        recorder.close()
+
+        game = makeGame()
+
+        def restore(keyframe, game):
+            game.ticks = keyframe.tick
+            game.score = keyframe.score
+
+        def step(dt):
+            game.ticks += 1
+            game.score += 10
+
+        game.step.side_effect = step
+        game.replay = "playing"
+        player = ReplayPlayer(path)
+        with patch.object(Keyframe, "restore", autospec=True, side_effect=restore):
+            with patch.object(Keyframe, "capture", wraps=Keyframe.capture) as capture:
+                player.start(game, 15)
+
+        assert game.ticks == 15
+        assert game.step.call_count == 5
+        assert [call.args[1] for call in capture.call_args_list] == [10]
+        assert game.replay == "playing"
+        assert game.pacman.input == LEFT
+
+        self.run(player, game, 11)
+        assert player.desyncs == 0
+        assert player.finished
+
+    def test_reseeds_and_detects_desync(self, tmp_path):
+        """Test keyframes reseed the random generator and catch a drift"""
+        path = tmp_path / "game.pmr"
+        game = makeGame()
+        recorder = ReplayRecorder(path, makeHeader())
+        game.pacman.getValidKey.return_value = UP
+        self.run(recorder, game, 1)
+        recorded = random.random()
+        self.run(recorder, game, 30)
+        recorder.close()
+
+        game = makeGame()
+        player = ReplayPlayer(path)
+        self.run(player, game, 1)
+        assert random.random() == recorded
+        game.score += 5
+        self.run(player, game, 31)
+
+        assert player.desyncs == 3
+        assert player.finished
+        assert game.replay is None
+        assert game.pacman.input is None
+
+
+class TestSeek:
+    def test_start_lands_where_playback_does(self, tmp_path, display):
+        """Test a game restored from a keyframe and brought to a tick matches
+        one played from the start, and plays on in sync"""
+        path = tmp_path / "game.pmr"
+        interval = 2 * FPS
+        header = ReplayHeader(
+            3, mazeDigests(MazeData()), DEFAULTGHOSTS, keyframeInterval=interval
+        )
+        directions = itertools.cycle([LEFT] * 20 + [UP] * 20 + [RIGHT] * 20)
+        with patch.object(Pacman, "getValidKey", side_effect=lambda: next(directions)):
+            game = GameController((0, 0, 0))
+            game.startGame()
+            game.replay = ReplayRecorder(path, header)
+            game.replay.pressPause()
+            for _ in range(10 * FPS):
+                game.step(SIMSTEP)
+            game.replay.close()
+
+        game = GameController((0, 0, 0))
+        game.startGame()
+        game.replay = ReplayPlayer(path)
+        for _ in range(8 * FPS + 7):
+            game.step(SIMSTEP)
+        played = Keyframe.capture(game, game.ticks, 0)
+
+        game = GameController((0, 0, 0))
+        game.startGame()
+        player = ReplayPlayer(path)
+        with patch.object(game, "step", wraps=game.step) as step:
+            player.start(game, 8 * FPS + 7)
+        assert step.call_count == 7
+        assert Keyframe.capture(game, game.ticks, 0) == played
+
+        game.replay = player
+        while not player.finished:
+            game.step(SIMSTEP)
+        assert player.desyncs == 0
+        assert game.ticks == 10 * FPS + 1
@@ -0,0 +1,131 @@
+import pytest
+from unittest.mock import MagicMock
+from pauser import Pause
+from scheduler import Scheduler
+
+
+class TestScheduler:
+    def test_one_shot_fires_once_when_due(self):
+        """Test a timer fires on the update that reaches its due time"""
+        scheduler = Scheduler()
+        callback = MagicMock()
+        scheduler.after(0.5, callback, "a", 1)
+
+        scheduler.update(0.4)
+        callback.assert_not_called()
+        scheduler.update(0.1)
+        scheduler.update(1.0)
+
+        callback.assert_called_once_with("a", 1)
+        assert len(scheduler) == 0
+
+    def test_repeating_catches_up_on_long_steps(self):
+        """Test a repeating timer fires for every interval a step covers"""
+        scheduler = Scheduler()
+        callback = MagicMock()
+        timer = scheduler.every(0.2, callback)
+
+        scheduler.update(0.1)
+        assert callback.call_count == 0
+        scheduler.update(0.55)
+        assert callback.call_count == 3
+
+        timer.cancel()
+        scheduler.update(1.0)
+        assert callback.call_count == 3
+
+    def test_due_order_across_timers(self):
+        """Test timers due in the same step fire in due order"""
+        scheduler = Scheduler()
+        fired = []
+        scheduler.after(0.3, fired.append, "late")
+        scheduler.after(0.1, fired.append, "early")
+        scheduler.at(0.2, fired.append, "middle")
+
+        scheduler.update(1.0)
+
+        assert fired == ["early", "middle", "late"]
+
+    def test_game_time_stops_while_paused(self):
+        """Test game timers wait out a pause and realtime ones do not"""
+        scheduler = Scheduler()
+        game = MagicMock()
+        real = MagicMock()
+        scheduler.after(1, game)
+        scheduler.after(1, real, realtime=True)
+
+        scheduler.update(2, paused=True)
+        real.assert_called_once()
+        game.assert_not_called()
+
+        scheduler.update(1)
+        game.assert_called_once()
+
+    def test_callback_may_cancel_and_schedule(self):
+        """Test a callback can cancel other timers and add new ones"""
+        scheduler = Scheduler()
+        other = MagicMock()
+        follow = MagicMock()
+        pending = scheduler.after(0.2, other)
+
+        def first():
+            pending.cancel()
+            scheduler.after(0, follow)
+
+        scheduler.after(0.1, first)
+        scheduler.update(0.3)
+
+        other.assert_not_called()
+        follow.assert_called_once()
+
+    def test_waiting_timers_are_not_visited(self):
+        """Test an update with nothing due leaves the queue untouched"""
+        scheduler = Scheduler()
+        for i in range(1000):
+            scheduler.after(10 + i, MagicMock())
+        head = scheduler.gameQueue[0]
+
+        scheduler.update(1)
+
+        assert scheduler.gameQueue[0] is head
+        assert len(scheduler.gameQueue) == 1000
+
+    def test_clear_and_invalid_interval(self):
+        """Test clear cancels everything and intervals must be positive"""
+        scheduler = Scheduler()
+        timer = scheduler.every(1, MagicMock())
+        scheduler.clear()
+
+        assert not timer.active
+        assert len(scheduler) == 0
+        with pytest.raises(ValueError):
+            scheduler.every(0, MagicMock())
+
+
+class TestPause:
+    def test_timed_pause_resumes_and_calls_back(self):
+        """Test a timed pause ends on real time and runs its callback"""
+        scheduler = Scheduler()
+        pause = Pause(False, scheduler)
+        after = MagicMock()
+
+        pause.setPause(pauseTime=3, func=after)
+        scheduler.update(2, paused=pause.paused)
+        assert pause.paused is True
+        scheduler.update(1, paused=pause.paused)
+
+        assert pause.paused is False
+        after.assert_called_once_with()
+
+    def test_new_pause_replaces_pending_one(self):
+        """Test unpausing by hand cancels the pending timed resume"""
+        scheduler = Scheduler()
+        pause = Pause(False, scheduler)
+        after = MagicMock()
+
+        pause.setPause(pauseTime=1, func=after)
+        pause.setPause(playerPaused=True)
+        scheduler.update(2)
+
+        assert pause.paused is False
+        after.assert_not_called()
@@ -0,0 +1,162 @@
+import threading
+import pygame
+import pytest
+from PIL import Image
+from styles.sprite import sprite_manager
+from styles.sprite.sprite_manager import SpriteManager
+from unittest.mock import patch
+from constants import TILEWIDTH
+
+
+@pytest.fixture
+def gifs(tmp_path):
+    """Ten 32x32 frames, 4096 bytes each once decoded to RGBA"""
+    for i in range(10):
+        Image.new("RGBA", (32, 32), (i * 20, 0, 0, 255)).save(
+            tmp_path / f"frame {i + 1}.gif"
+        )
+    return tmp_path
+
+
+class TestSpriteManager:
+    def test_register_is_lazy(self, gifs):
+        """Test nothing is decoded until the sprite is asked for"""
+        manager = SpriteManager()
+        manager.register_sprite("cherry", str(gifs / "frame 1.gif"))
+
+        assert manager.get_stats()["loads"] == 0
+        assert manager.get_sprite("cherry").get_size() == (32, 32)
+        assert manager.get_sprite("cherry") is manager.get_sprite("cherry")
+        stats = manager.get_stats()
+        assert stats["loads"] == 1
+        assert stats["misses"] == 1
+        assert stats["hits"] == 2
+
+    def test_lru_evicts_least_recent(self, gifs):
+        """Test the byte budget evicts the least recently used sprite"""
+        manager = SpriteManager(max_bytes=2 * 4096)
+        for i in range(3):
+            manager.register_sprite(f"s{i}", str(gifs / f"frame {i + 1}.gif"))
+
+        manager.get_sprite("s0")
+        manager.get_sprite("s1")
+        manager.get_sprite("s0")
+        manager.get_sprite("s2")
+
+        assert list(manager.cache) == ["s0", "s2"]
+        stats = manager.get_stats()
+        assert stats["used_bytes"] == 2 * 4096
+        assert stats["evictions"] == 1
+        assert stats["evicted_bytes"] == 4096
+
+    def test_evicted_sprite_reloads(self, gifs):
+        """Test an evicted sprite is decoded again on the next request"""
+        manager = SpriteManager(max_bytes=4096)
+        manager.register_sprite("a", str(gifs / "frame 1.gif"))
+        manager.register_sprite("b", str(gifs / "frame 2.gif"))
+
+        manager.get_sprite("a")
+        manager.get_sprite("b")
+        assert manager.get_sprite("a") is not None
+        assert manager.get_stats()["loads"] == 3
+
+    def test_pinned_assets_are_not_evicted(self, gifs):
+        """Test pinned assets survive while others are evicted"""
+        manager = SpriteManager(max_bytes=2 * 4096)
+        manager.register_animation("walk", str(gifs / "frame {}.gif"), 2)
+        manager.register_sprite("a", str(gifs / "frame 3.gif"))
+        manager.register_sprite("b", str(gifs / "frame 4.gif"))
+
+        manager.set_pinned(["walk"])
+        manager.get_sprite("a")
+        manager.get_sprite("b")
+
+        assert "walk" in manager.cache
+        assert "a" not in manager.cache
+
+        manager.set_pinned([])
+        manager.get_sprite("a")
+        assert "walk" not in manager.cache
+
+    def test_ghost_aliases_share_frames(self, gifs):
+        """Test the per-ghost names reuse one animation's bytes"""
+        for i in range(2):
+            Image.new("RGBA", (16, 16)).save(gifs / f"ghost {i}.gif")
+        manager = SpriteManager()
+
+        assert manager.load_ghost_animations(str(gifs))
+        frame = manager.get_animation_frame("ghost_red_left", 1)
+
+        assert frame is manager.get_animation_frame("ghost", 1)
+        assert frame.get_size() == (TILEWIDTH, TILEWIDTH)
+        assert manager.get_stats()["entries"] == 1
+
+    def test_missing_files(self, tmp_path):
+        """Test broken and unknown assets report failure"""
+        manager = SpriteManager()
+        assert manager.load_sprite("nope", str(tmp_path / "nope.gif")) is False
+        assert manager.load_animation("nope", str(tmp_path / "{}.gif"), 2) is False
+        assert manager.get_animation_frame("unknown", 0) is None
+        assert manager.get_stats()["entries"] == 0
+
+    def test_broken_asset_is_loaded_once(self, tmp_path, capsys):
+        """Test a file that fails to load is not retried on every frame"""
+        manager = SpriteManager()
+        manager.register_animation("nope", str(tmp_path / "{}.gif"), 2)
+
+        for _ in range(10):
+            assert manager.get_animation_frame("nope", 0) is None
+
+        assert capsys.readouterr().out.count("Error loading") == 1
+        assert manager.get_stats()["misses"] == 1
+        assert manager.get_stats()["broken"] == 1
+
+
+class TestBatchLoading:
+    def test_decode_on_workers_surfaces_on_caller(self, gifs):
+        """Test GIFs decode on the pool and surfaces are made on this thread"""
+        decode_threads = set()
+        surface_threads = set()
+        decode = sprite_manager.decode_gif
+        fromstring = pygame.image.fromstring
+
+        def record_decode(path):
+            decode_threads.add(threading.current_thread().name)
+            return decode(path)
+
+        def record_fromstring(*args):
+            surface_threads.add(threading.current_thread().name)
+            return fromstring(*args)
+
+        manager = SpriteManager()
+        manager.register_animation("walk", str(gifs / "frame {}.gif"), 5)
+        manager.register_animation("idle", str(gifs / "frame {}.gif"), 10)
+        with (
+            patch.object(sprite_manager, "decode_gif", record_decode),
+            patch("pygame.image.fromstring", record_fromstring),
+        ):
+            report = manager.load_batch(["walk", "idle", "walk"], workers=4)
+
+        assert report["assets"] == 2
+        assert report["files"] == 10
+        assert report["seconds"] > 0
+        assert all(name.startswith("gif-decode") for name in decode_threads)
+        assert surface_threads == {threading.current_thread().name}
+        assert len(manager.get_animation_frame("idle", 0).get_size()) == 2
+        assert manager.get_stats()["batches"] == 1
+
+    def test_batch_skips_loaded_and_broken(self, gifs):
+        """Test cached assets are not reloaded and broken files fail alone"""
+        (gifs / "frame 11.gif").write_bytes(b"not a gif")
+        manager = SpriteManager()
+        manager.register_sprite("ok", str(gifs / "frame 1.gif"))
+        manager.register_sprite("bad", str(gifs / "frame 11.gif"))
+        manager.get_sprite("ok")
+
+        report = manager.load_batch(["ok", "bad"])
+
+        assert report["assets"] == 0
+        assert report["files"] == 1
+        assert manager.cache["bad"][0] is sprite_manager.BROKEN
+        assert manager.get_sprite("bad") is None
+        assert "ok" in manager.cache
@@ -0,0 +1,33 @@
+import pytest
+from telemetry.startup import StartupReport
+from telemetry.trace import NULLSPAN
+from unittest.mock import patch
+
+
+class TestStartupReport:
+    def test_disabled_report_is_free(self):
+        """Test phases are no-ops until the report is started"""
+        report = StartupReport()
+        assert report.phase("maze") is NULLSPAN
+        assert report.finish() == []
+
+    def test_phases_add_up_to_total(self):
+        """Test repeated phases accumulate and the rest is reported as other"""
+        report = StartupReport()
+        report.start(0.0)
+        report.add("import", 0.100)
+        ticks = iter([1.0, 1.020, 2.0, 2.005])
+        with patch("time.perf_counter", side_effect=lambda: next(ticks)):
+            with report.phase("assets"):
+                pass
+            with report.phase("assets"):
+                pass
+
+        lines = report.finish(now=0.250)
+
+        assert report.enabled is False
+        assert report.phases["assets"] == pytest.approx(0.025)
+        assert lines[1].split() == ["import", "100.0", "ms"]
+        assert lines[2].split() == ["assets", "25.0", "ms"]
+        assert lines[3].split() == ["other", "125.0", "ms"]
+        assert lines[4].split() == ["total", "250.0", "ms"]
@@ -0,0 +1,95 @@
+import os
+import pygame
+import pytest
+from unittest.mock import MagicMock, patch
+from constants import *
+from movement.vector import Vector2
+from styles import text
+from styles.camera import Camera
+from styles.text import POPUPPOINTS, POPUPSIZE, TextGroup, getLabel
+
+
+@pytest.fixture
+def textgroup():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.font.init()
+    yield TextGroup()
+    pygame.font.quit()
+    text.FONTS.clear()
+    text.LABELS.clear()
+
+
+class TestPopups:
+    def test_common_points_are_prerendered(self, textgroup):
+        """Test eating a ghost or fruit does not render or open a font"""
+        for points in POPUPPOINTS:
+            assert (str(points), WHITE, POPUPSIZE) in text.LABELS
+
+        with patch("pygame.font.Font") as font:
+            popup = textgroup.addPopup(1600, 10, 20)
+
+        font.assert_not_called()
+        assert popup.label is getLabel("1600", WHITE, POPUPSIZE)
+
+    def test_expired_slots_are_reused(self, textgroup):
+        """Test a popup slot goes back to the pool when its time is up"""
+        first = textgroup.addPopup(200, 0, 0, time=1)
+        second = textgroup.addPopup(400, 0, 0, time=2)
+
+        textgroup.update(1)
+        assert textgroup.popups == [second]
+
+        third = textgroup.addPopup(800, 5, 5)
+        assert third is first
+        assert third.position.x == 5 and third.label is not None
+
+    def test_pool_grows_when_empty(self, textgroup):
+        """Test more popups than slots still all show and return to the pool"""
+        popups = [textgroup.addPopup(i, 0, 0) for i in range(10)]
+
+        assert len(set(map(id, popups))) == 10
+        textgroup.update(1)
+        assert textgroup.popups == []
+        assert len(textgroup.freePopups) == 10
+
+    def test_render_draws_texts_and_popups(self, textgroup):
+        """Test popups are drawn after the fixed texts"""
+        screen = MagicMock()
+        popup = textgroup.addPopup(100, 3, 4)
+
+        textgroup.render(screen)
+
+        screen.blit.assert_called_with(popup.label, (3, 4))
+
+    def test_popups_follow_the_camera(self, textgroup):
+        """Test a popup stays where it was added in the maze when the
+        camera scrolls, while the fixed texts stay on screen"""
+        camera = Camera(100, 100)
+        camera.setWorldSize(1000, 1000)
+        camera.follow(Vector2(500, 400))
+        screen = MagicMock()
+        popup = textgroup.addPopup(200, 520, 410)
+
+        textgroup.render(screen, camera)
+
+        score = textgroup.alltext[SCORETXT]
+        screen.blit.assert_any_call(score.label, score.position.asTuple())
+        screen.blit.assert_called_with(popup.label, (70, 60))
+
+    def test_fonts_are_shared(self, textgroup):
+        """Test texts of the same size use one font object"""
+        first = textgroup.alltext[SCORETXT]
+        second = textgroup.alltext[LEVELTXT]
+
+        assert first.font is second.font
+
+    def test_font_cache_cleared_on_quit(self):
+        """Test fonts are dropped by every pygame.quit(), not just the first,
+        so none is used after its font module is gone"""
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        for _ in range(2):
+            pygame.init()
+            text.getFont(POPUPSIZE)
+            assert len(text.FONTS) == 1
+            pygame.quit()
+            assert text.FONTS == {}
@@ -0,0 +1,53 @@
+import json
+import pytest
+from telemetry.trace import TraceRecorder, NULLSPAN
+
+
+class TestTraceRecorder:
+    def test_disabled_span_is_shared_noop(self):
+        """Test spans cost nothing while tracing is off"""
+        recorder = TraceRecorder()
+
+        with recorder.span("GameController.update") as span:
+            pass
+
+        assert span is NULLSPAN
+        assert recorder.events == []
+
+    def test_trace_file_is_valid_chrome_trace(self, tmp_path):
+        """Test recorded spans are written as complete trace events"""
+        recorder = TraceRecorder()
+        path = tmp_path / "trace.json"
+
+        recorder.start(path, flushInterval=0.01)
+        with recorder.span("NodeGroup.build", "load"):
+            with recorder.span("inner", level=2):
+                pass
+        recorder.stop()
+
+        events = json.loads(path.read_text())
+        spans = {event["name"]: event for event in events if event["ph"] == "X"}
+        assert set(spans) == {"NodeGroup.build", "inner"}
+        assert spans["NodeGroup.build"]["cat"] == "load"
+        assert spans["inner"]["args"] == {"level": 2}
+        assert spans["inner"]["dur"] <= spans["NodeGroup.build"]["dur"]
+        assert recorder.span("after stop") is NULLSPAN
+
+    def test_flush_appends_between_batches(self, tmp_path):
+        """Test several background flushes still produce one JSON array"""
+        recorder = TraceRecorder()
+        path = tmp_path / "trace.json"
+
+        recorder.start(path, flushInterval=60)
+        for i in range(3):
+            with recorder.span(f"frame{i}"):
+                pass
+            recorder.flush()
+        recorder.stop()
+
+        events = json.loads(path.read_text())
+        assert [e["name"] for e in events if e["ph"] == "X"] == [
+            "frame0",
+            "frame1",
+            "frame2",
+        ]